@@ -2,14 +2,52 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
 from app.db import db
-import uuid, httpx
+from app.services.cache import cache_stats
+from app.services.bulk_import import import_payload, refresh_after_import
+from app.services import google_services, adk_client
+from app.services.adk_client import ADK_APP
+from app.services import indexes
+from app.services.walking_matrix import load_walking_matrix, schedule_walking_matrix_refresh
+from app.services.section_store import load_section_store
+from app.services.prereq_graph import load_prereq_graph
+from app.services.course_search import load_course_search_index
+from contextlib import asynccontextmanager
+import json, uuid, httpx
 from fastapi import Request, HTTPException
+from fastapi.responses import StreamingResponse
 import os
-ADK_BASE = os.getenv("ADK_BASE", "http://127.0.0.1:8001")
-ADK_APP  = os.getenv("ADK_APP",  "panther_agent")
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await indexes.ensure_indexes()
+    except Exception as e:
+        print(f"Could not create indexes: {e}")
+    try:
+        await load_prereq_graph()
+    except Exception as e:
+        print(f"Could not build prerequisite graph: {e}")
+    try:
+        await load_course_search_index()
+    except Exception as e:
+        print(f"Could not build course search index: {e}")
+    try:
+        await load_section_store()
+    except Exception as e:
+        print(f"Could not load section index: {e}")
+    try:
+        await load_walking_matrix()
+        schedule_walking_matrix_refresh()
+    except Exception as e:
+        print(f"Could not load walking matrix: {e}")
+    yield
+    # Close pooled outbound connections on shutdown
+    await google_services.close_client()
+    await adk_client.close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -35,6 +73,15 @@ async def test_db():
     except Exception as e:
         return {"status": "error", "message": f"Database connection failed: {str(e)}"}
 
+@app.get("/cache-stats")
+async def get_cache_stats():
+    return {"caches": cache_stats()}
+
+@app.get("/index-status")
+async def get_index_status():
+    """Outcome of the startup index bootstrap; status is created, exists or error."""
+    return {"indexes": indexes.index_status}
+
 @app.post("/seed-data")
 async def seed_data():
     try:
@@ -55,13 +102,6 @@ async def seed_data():
             ]
         }
         
-        # Insert or update major
-        await db.majors.replace_one(
-            {"major_id": "COMPSC:BS"}, 
-            sample_major, 
-            upsert=True
-        )
-        
         # Create sample course data for all required courses
         sample_courses = [
             # Foundation Programming
@@ -149,15 +189,25 @@ async def seed_data():
             {"code": "CIS 4951", "name": "Capstone II", "credits": 3, "prereqs": ["CIS 3950"], "coreqs": []}
         ]
         
-        # Insert sample courses
-        for course in sample_courses:
-            await db.courses.replace_one(
-                {"code": course["code"]}, 
-                course, 
-                upsert=True
-            )
+        # A few sections so the section index (and the agent's schedule tools) have data
+        sample_sections = [
+            {"term": "Fall 2025", "campus": "MMC", "course": "COP 2210", "crn": "10001", "days": ["MW"], "start": "10:00", "end": "11:15", "credits": 3},
+            {"term": "Fall 2025", "campus": "MMC", "course": "COP 3337", "crn": "10002", "days": ["TR"], "start": "09:30", "end": "10:45", "credits": 3},
+            {"term": "Fall 2025", "campus": "MMC", "course": "COP 3530", "crn": "10003", "days": ["MW"], "start": "12:00", "end": "13:15", "credits": 3},
+            {"term": "Fall 2025", "campus": "BBC", "course": "CDA 3102", "crn": "20001", "days": ["TR"], "start": "11:00", "end": "12:15", "credits": 3},
+        ]
+
+        # Upsert the major, courses and sections with bulk writes (sample courses have no description)
+        reports = await import_payload({
+            "majors": [sample_major],
+            "courses": [{"description": "", **course} for course in sample_courses],
+            "sections": sample_sections,
+        })
+
+        # Seeding bypasses the insert_* helpers, so refresh cached catalog state
+        await refresh_after_import({"majors", "courses", "sections"})
         
-        return {"status": "success", "message": "Sample data seeded successfully"}
+        return {"status": "success", "message": "Sample data seeded successfully", "imports": reports}
     except Exception as e:
         return {"status": "error", "message": f"Failed to seed data: {str(e)}"}
 
@@ -201,8 +251,7 @@ def _extract_adk_text(events):
 
 
 
-@app.post("/api/agent/ask")
-async def ai_chat(request: Request):
+async def _parse_ask_body(request: Request):
     try:
         body = await request.json()
     except Exception:
@@ -214,41 +263,137 @@ async def ai_chat(request: Request):
 
     session_id = body.get("session_id") or uuid.uuid4().hex
     user_id    = body.get("user_id") or "dev-user"
+    return q, user_id, session_id
 
-    # 1) ensure the ADK session exists
-# in your /api/agent/ask handler, replace the session create block with:
-
-    session_url = f"{ADK_BASE}/apps/{ADK_APP}/users/{user_id}/sessions/{session_id}"
-    async with httpx.AsyncClient(timeout=30) as client:
-        mk = await client.post(session_url, json={})
-        # Treat "already exists" as success across implementations.
-        ok_statuses = {200, 201, 409}
-        if mk.status_code not in ok_statuses:
-            # Some ADK builds return 400 with a 'Session already exists' message.
-            if mk.status_code == 400 and "Session already exists" in mk.text:
-                pass  # acceptable — continue
-            else:
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"ADK session create failed: {mk.status_code} {mk.text}"
-                )
-
-        # Now send the message
-        payload = {
-            "appName": ADK_APP,
-            "userId": user_id,
-            "sessionId": session_id,
-            "newMessage": {
-                "role": "user",
-                "parts": [{"text": q}],
-            },
-        }
-        r = await client.post(f"{ADK_BASE}/run", json=payload)
+
+def _run_payload(q, user_id, session_id, streaming=False):
+    payload = {
+        "appName": ADK_APP,
+        "userId": user_id,
+        "sessionId": session_id,
+        "newMessage": {
+            "role": "user",
+            "parts": [{"text": q}],
+        },
+    }
+    if streaming:
+        payload["streaming"] = True
+    return payload
+
+
+@app.post("/api/agent/ask")
+async def ai_chat(request: Request):
+    q, user_id, session_id = await _parse_ask_body(request)
+
+    async with adk_client._semaphore:
+        for attempt in range(2):
+            # 1) ensure the ADK session exists (skipped for sessions we already created)
+            await adk_client.ensure_session(user_id, session_id)
+
+            # 2) send the message
+            r = await adk_client.get_client().post("/run", json=_run_payload(q, user_id, session_id))
+            if r.status_code == 404 and attempt == 0:
+                # ADK lost the session (restart); create it again and retry once
+                adk_client.forget_session(user_id, session_id)
+                continue
+            break
         if r.status_code != 200:
             raise HTTPException(status_code=502, detail=f"ADK proxy failed: {r.status_code} {r.text}")
         data = r.json()
 
-
     # 3) extract readable reply
     answer = _extract_adk_text(data) or "(empty reply)"
-    return {"response": answer, "session_id": session_id}
\ No newline at end of file
+    return {"response": answer, "session_id": session_id}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _adk_stream_events(ev, state):
+    """
+    Turn one ADK event into (sse event, data) pairs.
+    Partial events carry text deltas; the final non-partial event repeats the
+    whole text, so it is only forwarded when no deltas were streamed for it.
+    """
+    out = []
+    text = []
+    for part in (ev.get("content") or {}).get("parts") or []:
+        if not isinstance(part, dict):
+            continue
+        if part.get("functionCall"):
+            call = part["functionCall"]
+            out.append(("tool_call", {"name": call.get("name"), "args": call.get("args") or {}}))
+        elif part.get("functionResponse"):
+            out.append(("tool_result", {"name": part["functionResponse"].get("name")}))
+        elif part.get("text") and not part.get("thought"):
+            text.append(part["text"])
+    if text:
+        chunk = "".join(text)
+        if ev.get("partial"):
+            state["streamed"] = True
+            state["deltas"].append(chunk)
+            out.append(("delta", {"text": chunk}))
+        else:
+            if not state["streamed"]:
+                out.append(("delta", {"text": chunk}))
+            state["streamed"] = False
+            state["final"] = chunk
+    return out
+
+
+@app.post("/api/agent/ask/stream")
+async def ai_chat_stream(request: Request):
+    """
+    Streaming /api/agent/ask over Server-Sent Events, proxied from ADK /run_sse.
+    Events: session {session_id}, delta {text}, tool_call {name, args},
+    tool_result {name}, error {detail}, done {response, session_id}.
+    """
+    q, user_id, session_id = await _parse_ask_body(request)
+
+    async def events():
+        yield _sse("session", {"session_id": session_id})
+        state = {"streamed": False, "deltas": [], "final": None}
+        try:
+            async with adk_client._semaphore:
+                client = adk_client.get_client()
+                payload = _run_payload(q, user_id, session_id, streaming=True)
+                for attempt in range(2):
+                    await adk_client.ensure_session(user_id, session_id)
+                    async with client.stream("POST", "/run_sse", json=payload,
+                                             timeout=httpx.Timeout(adk_client.ADK_HTTP_TIMEOUT, read=None)) as r:
+                        if r.status_code == 404 and attempt == 0:
+                            # ADK lost the session (restart); create it again and retry once
+                            adk_client.forget_session(user_id, session_id)
+                            continue
+                        if r.status_code != 200:
+                            await r.aread()
+                            yield _sse("error", {"detail": f"ADK proxy failed: {r.status_code} {r.text}"})
+                            return
+                        async for line in r.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            try:
+                                ev = json.loads(line[5:].strip())
+                            except ValueError:
+                                continue
+                            if ev.get("error"):
+                                yield _sse("error", {"detail": ev["error"]})
+                                continue
+                            for name, data in _adk_stream_events(ev, state):
+                                yield _sse(name, data)
+                        break
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+            return
+        except httpx.HTTPError as e:
+            yield _sse("error", {"detail": f"ADK proxy failed: {e}"})
+            return
+        answer = state["final"] or "".join(state["deltas"]) or "(empty reply)"
+        yield _sse("done", {"response": answer, "session_id": session_id})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
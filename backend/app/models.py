@@ -11,12 +11,33 @@ class Course(BaseModel):
     prereqs: List[str] = []
     coreqs: List[str] = []
 
+class CourseBatchRequest(BaseModel):
+    codes: List[str]
+
+class EligibilityRequest(BaseModel):
+    taken: List[str] = []
+    codes: List[str]
+
+# ----------------- Section -----------------
+class Section(BaseModel):
+    term: str
+    campus: str
+    course: str
+    crn: str
+    days: List[str] = []
+    start: str  # "HH:MM"
+    end: str
+    credits: int = 0
+    location: Optional[str] = None
+
 # ----------------- Location -----------------
 class Location(BaseModel):
     code: str
     full_name: str
     address: Optional[str] = None
     google_maps_place_id: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
 
 # ----------------- Schedule -----------------
 class Block(BaseModel):
@@ -52,3 +73,16 @@ class User(BaseModel):
     major: str
     taken_courses: List[str] = []  # list of course codes
     current_courses: List[CurrentCourse] = []
+
+class UserPatchOp(BaseModel):
+    # add_taken_course | remove_taken_course | set_day | set_major | add_current_course | remove_current_course
+    op: str
+    code: Optional[str] = None
+    day: Optional[str] = None  # mon .. sun
+    blocks: Optional[List[Block]] = None
+    major: Optional[str] = None
+    course: Optional[CurrentCourse] = None
+
+class UserPatch(BaseModel):
+    revision: Optional[int] = None  # expected revision; omit to apply unconditionally
+    ops: List[UserPatchOp]
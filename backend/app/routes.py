@@ -1,35 +1,87 @@
 
-from typing import Dict, List
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from app.models import Course, CurrentCourse, Major, User, Location
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pymongo.errors import DuplicateKeyError
+from app.models import Course, CourseBatchRequest, EligibilityRequest, CurrentCourse, Major, User, UserPatch, Location, Section
 from app.services.mongo_services import (
-    insert_course, get_course,
+    insert_course, get_course, get_courses,
     insert_current_course, get_current_course,
     insert_major, get_major,
-    insert_user, get_user, update_user,
-    insert_location, get_location
-)
-from app.services.google_services import (
-    get_route as g_get_route,
-    get_route_times as g_get_route_times
+    insert_user, get_user, update_user, patch_user, RevisionConflict,
+    insert_location, get_location,
+    insert_section, list_page, get_versions
 )
+from app.services.route_cache import get_route as g_get_route
+from app.services import route_provider, walking_matrix
+from app.services.section_store import get_section_store
+from app.services.schedule_bits import DAYS, WeekBits, to_minutes
+from app.services.compatibility import compatible_sections, walking_times
+from app.services.itinerary import get_itinerary
+from app.services.prereq_graph import get_prereq_graph, eligibility_report
+from app.services.degree_planner import cached_plan
+from app.services.bulk_import import DEFAULT_CHUNK_SIZE, parse_payload, import_payload, refresh_after_import
+from app.services.catalog_parser import import_catalog
+from app.services.course_search import get_course_search_index
+from app.services.place_resolver import resolve_locations
 
 router = APIRouter(prefix="/api")
 
+MAX_PAGE_SIZE = 1000
+
+
+def _page_response(request: Request, items: list, next_cursor):
+    """
+    {items, next_cursor} with a content ETag; answers 304 when the client's
+    If-None-Match already matches the page.
+    """
+    body = {"items": items, "next_cursor": next_cursor}
+    raw = json.dumps(body, sort_keys=True, default=str).encode("utf-8")
+    etag = '"' + hashlib.sha1(raw).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=raw, media_type="application/json", headers=headers)
+
 @router.post("/locations")
 async def create_location(location: Location):
-    existing = await get_location(location.code)
-    if existing:
+    try:
+        await insert_location(location)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="location with this code already exists")
-    await insert_location(location)
+    if location.google_maps_place_id:
+        walking_matrix.schedule_walking_matrix_refresh()
     return {"status": "success"}
 
 @router.get("/locations")
-async def list_locations():
-    locations = await db.locations.find().to_list(length=100)
-    # Only return code, full_name and id for dropdown
-    return [{"code": l.get("code"), "full_name": l.get("full_name"), "id": l.get("google_maps_place_id")} for l in locations]
+async def list_locations(
+    request: Request,
+    prefix: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Locations in code order, for dropdowns: code, full_name and id (place id).
+    Usage: /api/locations?prefix=EC&limit=100, then ?after=<next_cursor> for the next page
+    """
+    locations, next_cursor = await list_page(
+        "locations", "code", ["code", "full_name", "google_maps_place_id"],
+        prefix=prefix, after=after, limit=limit,
+    )
+    items = [{"code": l.get("code"), "full_name": l.get("full_name"), "id": l.get("google_maps_place_id")} for l in locations]
+    return _page_response(request, items, next_cursor)
+
+@router.get("/locations/walking-times")
+async def read_walking_times(code: List[str] = Query(...)):
+    """
+    Walking minutes between locations, from the walking matrix; pairs with no
+    known walk are left out.
+    Usage: /api/locations/walking-times?code=PG6&code=EC  ->  {"EC|PG6": 7, "PG6|EC": 7}
+    """
+    return await walking_times(c.strip() for value in code for c in value.split(",") if c.strip())
 
 @router.get("/locations/{code}")
 async def read_location(code: str):
@@ -39,14 +91,71 @@ async def read_location(code: str):
     return location
 
 # ----------------- Courses -----------------
+@router.get("/courses")
+async def list_courses(
+    request: Request,
+    prefix: Optional[str] = None,
+    credits: Optional[int] = None,
+    min_credits: Optional[int] = None,
+    max_credits: Optional[int] = None,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Courses in code order: code, name and credits.
+    Usage: /api/courses?prefix=COP&credits=3, then ?after=<next_cursor> for the next page
+    """
+    filters = {}
+    if credits is not None:
+        filters["credits"] = credits
+    elif min_credits is not None or max_credits is not None:
+        filters["credits"] = {}
+        if min_credits is not None:
+            filters["credits"]["$gte"] = min_credits
+        if max_credits is not None:
+            filters["credits"]["$lte"] = max_credits
+    courses, next_cursor = await list_page(
+        "courses", "code", ["code", "name", "credits"], filters,
+        prefix=prefix, after=after, limit=limit,
+    )
+    return _page_response(request, courses, next_cursor)
+
+@router.get("/courses/search")
+async def search_courses(q: str = "", limit: int = Query(20, ge=1, le=100)):
+    """
+    Type-ahead course search over code prefix, name tokens and description text.
+    Usage: /api/courses/search?q=cop%2035 or ?q=data%20struct
+    """
+    index = await get_course_search_index()
+    started = time.perf_counter()
+    results = index.search(q, limit)
+    return {
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
 @router.post("/courses")
 async def create_course(course: Course):
-    existing = await get_course(course.code)
-    if existing:
+    try:
+        await insert_course(course)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Course with this code already exists")
-    await insert_course(course)
     return {"status": "success"}
 
+@router.post("/courses:batch")
+async def read_courses_batch(request: CourseBatchRequest):
+    """
+    Look up many courses in a single query.
+    Returns found courses in request order and lists codes that do not exist.
+    """
+    codes = list(dict.fromkeys(c.strip() for c in request.codes if c and c.strip()))
+    found = await get_courses(codes)
+    return {
+        "courses": [found[c] for c in codes if c in found],
+        "missing": [c for c in codes if c not in found],
+    }
+
 @router.get("/courses/{code}")
 async def read_course(code: str):
     course = await get_course(code)
@@ -54,23 +163,102 @@ async def read_course(code: str):
         raise HTTPException(status_code=404, detail="Course not found")
     return course
 
+# ----------------- Prerequisites -----------------
+@router.get("/prereqs/{code}")
+async def read_prereqs(code: str):
+    """Transitive prereqs, what the course unlocks, and its prereq chain length."""
+    graph = get_prereq_graph()
+    if code not in graph:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return {
+        "code": code,
+        "all_prereqs": graph.all_prereqs(code),
+        "unlocks": graph.unlocks(code),
+        "unlocks_all": graph.unlocks(code, transitive=True),
+        "chain_length": graph.critical_path_length(code),
+    }
+
+@router.post("/prereqs/eligibility")
+async def check_eligibility(request: EligibilityRequest):
+    """Which of `codes` can be taken given the `taken` courses, and what each is missing."""
+    return eligibility_report(get_prereq_graph(), request.taken, request.codes)
+
+# ----------------- Degree plan -----------------
+@router.get("/plan/{user_id}")
+async def read_degree_plan(user_id: str, max_credits: int = Query(15, ge=1), time_budget_ms: int = Query(1000, ge=0)):
+    """
+    Semester-by-semester plan for the user's remaining required courses.
+    Usage: /api/plan/{user_id}?max_credits=12
+    """
+    user = await get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    major = await get_major(user.get("major", ""))
+    if not major:
+        raise HTTPException(status_code=404, detail="Major not found")
+    plan, from_cache = cached_plan(
+        major["major_id"], get_prereq_graph(), major.get("required_courses") or [],
+        user.get("taken_courses") or [], max_credits, time_budget_ms,
+    )
+    return {"user_id": user_id, "major_id": major["major_id"], "cached": from_cache, **plan}
+
+# ----------------- Sections -----------------
+@router.post("/sections")
+async def create_section(section: Section):
+    try:
+        await insert_section(section)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Section with this term and CRN already exists")
+    return {"status": "success"}
+
+@router.get("/sections/terms")
+async def list_section_terms():
+    """Terms in the section index with their section counts."""
+    return get_section_store().terms()
+
+@router.get("/sections")
+async def list_sections(
+    term: str,
+    campus: List[str] = Query(default=[]),
+    course: List[str] = Query(default=[]),
+    days: Optional[str] = None,
+    start_after: Optional[str] = None,
+    end_before: Optional[str] = None,
+):
+    """
+    Filter sections from the in-memory section index.
+    Usage: /api/sections?term=Fall%202025&campus=MMC&course=COP%202210&course=COP%203337
+    """
+    return get_section_store().query(
+        term, campus or None, course or None,
+        days=days, start_after=start_after, end_before=end_before,
+    )
+
  # ----------------- Majors -----------------
 @router.post("/majors")
 async def create_major(major: Major):
-    existing = await get_major(major.major_id)
-    if existing:
+    try:
+        await insert_major(major)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Major with this id already exists")
-    await insert_major(major)
     return {"status": "success"}
 
-# GET all majors for dropdown
-from app.db import db
-
 @router.get("/majors")
-async def list_majors():
-    majors = await db.majors.find().to_list(length=100)
-    # Only return major_id and name for dropdown
-    return [{"major_id": m.get("major_id"), "name": m.get("name")} for m in majors]
+async def list_majors(
+    request: Request,
+    prefix: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Majors in major_id order: major_id and name, for dropdowns.
+    Usage: /api/majors?prefix=COMP, then ?after=<next_cursor> for the next page
+    """
+    majors, next_cursor = await list_page(
+        "majors", "major_id", ["major_id", "name"],
+        prefix=prefix, after=after, limit=limit,
+    )
+    return _page_response(request, majors, next_cursor)
 
 @router.get("/majors/{major_id}")
 async def read_major(major_id: str):
@@ -93,10 +281,10 @@ async def create_user(user_data: dict):
     
     user = User(**user_data)
     
-    existing = await get_user(user.user_id)
-    if existing:
+    try:
+        await insert_user(user)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="User with this id already exists")
-    await insert_user(user)
     return {"status": "success"}
 
 @router.get("/users/{user_id}")
@@ -108,28 +296,13 @@ async def read_user(user_id: str):
 
 @router.put("/users/{user_id}")
 async def edit_user(user_id: str, update_data: dict):
+    """Replace whole top-level fields. Prefer PATCH for single edits."""
     try:
-        print(f"Updating user {user_id} with data: {update_data}")
-        
-        # Handle schedule conversion if present
+        # Validate the schedule shape if present
         if 'schedule' in update_data and isinstance(update_data['schedule'], dict):
             from app.models import Schedule
             update_data['schedule'] = Schedule(**update_data['schedule'])
-        
-        # Convert Pydantic models to dicts before passing to update_user
-        def convert_to_dict(obj):
-            if hasattr(obj, 'dict'):
-                return obj.dict()
-            elif isinstance(obj, list):
-                return [convert_to_dict(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {k: convert_to_dict(v) for k, v in obj.items()}
-            else:
-                return obj
-        
-        update_data = convert_to_dict(update_data)
         await update_user(user_id, update_data)
-        print(f"Successfully updated user {user_id}")
         return {"status": "updated"}
     except Exception as e:
         print(f"Error updating user {user_id}: {str(e)}")
@@ -137,11 +310,114 @@ async def edit_user(user_id: str, update_data: dict):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.patch("/users/{user_id}")
+async def patch_user_fields(user_id: str, patch: UserPatch):
+    """
+    Field-level user edits applied atomically.
+    Body: {"revision": 3, "ops": [{"op": "add_taken_course", "code": "COP 2210"},
+                                  {"op": "set_day", "day": "mon", "blocks": [...]}]}
+    With "revision", the patch is rejected with 409 if the user changed since that revision.
+    """
+    try:
+        revision = await patch_user(user_id, patch.ops, patch.revision)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RevisionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "revision": e.current})
+    if revision is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"status": "updated", "revision": revision}
+
+
+def _parse_hhmm(value: str, name: str) -> int:
+    try:
+        return to_minutes(value)
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail=f"Invalid {name} time: {value}")
+
+async def _user_week(user_id: str) -> WeekBits:
+    user = await get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return WeekBits.for_user(user)
+
+def _day_index(day: str) -> int:
+    try:
+        return WeekBits.day_index(day)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid day: {day}")
+
+@router.get("/users/{user_id}/free-time")
+async def read_free_time(user_id: str, day: str, min_minutes: int = Query(0, ge=0),
+                         start: str = "00:00", end: str = "24:00"):
+    """
+    Free intervals on one day of the user's schedule.
+    Usage: /api/users/{user_id}/free-time?day=mon&min_minutes=30&start=08:00&end=20:00
+    """
+    week = await _user_week(user_id)
+    i = _day_index(day)
+    lo, hi = _parse_hhmm(start, "start"), _parse_hhmm(end, "end")
+    return {
+        "day": DAYS[i],
+        "free": [{"start": f"{a // 60:02d}:{a % 60:02d}", "end": f"{b // 60:02d}:{b % 60:02d}"}
+                 for a, b in week.free_time(i, min_minutes, lo, hi)],
+    }
+
+@router.get("/users/{user_id}/conflicts")
+async def read_conflicts(user_id: str, day: str, start: str, end: str):
+    """
+    Whether [start, end) on `day` overlaps the user's schedule, and with which blocks.
+    Usage: /api/users/{user_id}/conflicts?day=tue&start=09:30&end=10:45
+    """
+    week = await _user_week(user_id)
+    i = _day_index(day)
+    lo, hi = _parse_hhmm(start, "start"), _parse_hhmm(end, "end")
+    return {"day": DAYS[i], "conflict": week.conflicts(i, lo, hi), "blocks": week.conflicting_blocks(i, lo, hi)}
+
+
+@router.get("/users/{user_id}/compatible-sections")
+async def read_compatible_sections(
+    user_id: str,
+    term: str,
+    courses: List[str] = Query(...),
+    campus: List[str] = Query(default=[]),
+    buffer_minutes: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Ranked sections of `courses` that fit around the user's schedule, including
+    walking time to and from back-to-back blocks.
+    Usage: /api/users/{user_id}/compatible-sections?term=Fall%202025&courses=COP%203337,COP%203530
+    """
+    user = await get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    codes = [c.strip() for value in courses for c in value.split(",") if c.strip()]
+    return {
+        "user_id": user_id,
+        **await compatible_sections(user, term, codes, campus or None, buffer_minutes, limit),
+    }
+
+@router.get("/users/{user_id}/itinerary/{day}")
+async def read_itinerary(user_id: str, day: str):
+    """
+    Ordered stops, encoded polyline and per-leg walking times for one day of
+    the user's schedule. Stored on the user and only recomputed when the
+    day's stops change.
+    Usage: /api/users/{user_id}/itinerary/mon
+    """
+    user = await get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    day = DAYS[_day_index(day)]
+    itinerary = await get_itinerary(user, day)
+    if itinerary is None:
+        raise HTTPException(status_code=502, detail="Could not resolve route")
+    return {"user_id": user_id, "day": day, **itinerary}
 
 #----------------- Route Stuff -----------------
 @router.get("/route/get_route")
-
-def get_route_query(place_id_list: List[str] = Query(...)):
+async def get_route_query(place_id_list: List[str] = Query(...)):
     """
     Get route using query parameters.
     Usage: /api/route/get_route?place_id_list=id1&place_id_list=id2&place_id_list=id3
@@ -149,12 +425,12 @@ def get_route_query(place_id_list: List[str] = Query(...)):
     try:
         # Convert list of place_id strings to list of dicts
         place_ids = [{"place_id": pid} for pid in place_id_list]
-        return g_get_route(place_ids)
+        return await g_get_route(place_ids)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing route: {str(e)}")
 
 @router.get("/route/get_route/{place_ids}")
-def get_route_endpoint(place_ids: str):
+async def get_route_endpoint(place_ids: str):
     """
     Get route using path parameter with JSON string.
     Usage: /api/route/get_route/[{"place_id":"id1"},{"place_id":"id2"}]
@@ -163,7 +439,7 @@ def get_route_endpoint(place_ids: str):
     try:
         # Decode URL-encoded JSON string
         place_id_list = json.loads(place_ids)
-        return g_get_route(place_id_list)
+        return await g_get_route(place_id_list)
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
     except Exception as e:
@@ -171,7 +447,71 @@ def get_route_endpoint(place_ids: str):
 
 
 @router.get("/route/get_route_travel_time{class_list_string}")
-def get_route_times(class_list_string: str):
-    class_list = class_list_string.split(',')
-    return g_get_route_times(class_list)
+async def get_route_times(class_list_string: str):
+    place_ids = class_list_string.split(',')
+    # Fast path: every leg is already in the precomputed walking matrix
+    times = walking_matrix.matrix.route_times(place_ids)
+    if times is not None:
+        return times
+    class_list = [{"place_id": pid} for pid in place_ids]
+    return await route_provider.provider.get_route_times(class_list)
+
+@router.get("/route/provider")
+async def read_route_provider():
+    """Which route provider this process uses (see ROUTE_PROVIDER)."""
+    return route_provider.provider.describe()
 
+
+#----------------- Versions -----------------
+@router.get("/versions")
+async def read_versions(user_id: Optional[str] = None):
+    """
+    Catalog version and (optionally) a user's revision, for clients that cache
+    catalog- or user-derived results.
+    """
+    return await get_versions(user_id)
+
+#----------------- Admin -----------------
+@router.post("/admin/import")
+async def admin_import(
+    request: Request,
+    kind: Optional[str] = None,
+    format: Optional[str] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1),
+):
+    """
+    Bulk upsert courses, majors, locations and/or sections.
+    Body is JSON ({"courses": [...], "majors": [...], "locations": [...], "sections": [...]} or a list with ?kind=)
+    or JSONL (?format=jsonl, one record per line, optional "kind" field per line),
+    or catalog text (?format=catalog), parsed into courses.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "jsonl" if "ndjson" in content_type or "jsonl" in content_type else "json"
+    text = (await request.body()).decode("utf-8", errors="replace")
+    if format == "catalog":
+        report = await import_catalog(text.splitlines(), chunk_size)
+        await refresh_after_import({"courses"})
+        return {"status": "success", "imports": [report]}
+    try:
+        grouped = parse_payload(text, format, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid import payload: {str(e)}")
+    reports = await import_payload(grouped, chunk_size)
+    await refresh_after_import(set(grouped))
+    return {"status": "success", "imports": reports}
+
+@router.post("/admin/resolve-locations")
+async def admin_resolve_locations(codes: List[str] = Query(default=[]), retry_failed: bool = False):
+    """
+    Look up place ids and coordinates for locations that have an address but
+    no (or an outdated) place id, and store them on the locations.
+    Usage: POST /api/admin/resolve-locations, or ?codes=PG6&codes=ECS&retry_failed=true
+    """
+    try:
+        report = await resolve_locations(codes or None, retry_failed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report["written"]:
+        await refresh_after_import({"locations"})
+    return {"status": "success", **report}
@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+import httpx
+from fastapi import HTTPException
+
+from app.services.cache import MISSING, adk_session_cache
+
+ADK_BASE = os.getenv("ADK_BASE", "http://127.0.0.1:8001")
+ADK_APP  = os.getenv("ADK_APP",  "panther_agent")
+
+# Shared HTTP client settings for calls to the ADK server
+ADK_HTTP_TIMEOUT = float(os.getenv("ADK_HTTP_TIMEOUT", "30"))
+ADK_MAX_CONNECTIONS = int(os.getenv("ADK_MAX_CONNECTIONS", "20"))
+# Agent runs in flight at once; further requests wait their turn
+ADK_MAX_CONCURRENCY = int(os.getenv("ADK_MAX_CONCURRENCY", "8"))
+
+_client = None
+_semaphore = asyncio.Semaphore(ADK_MAX_CONCURRENCY)
+
+def get_client():
+    """Return the shared keep-alive AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=ADK_BASE,
+            timeout=ADK_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=ADK_MAX_CONNECTIONS,
+                max_keepalive_connections=ADK_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def ensure_session(user_id, session_id):
+    """
+    Create the ADK session unless it is known to exist.
+    Known sessions are remembered in adk_session_cache, so follow-up messages
+    skip the create call.
+    """
+    key = (user_id, session_id)
+    if adk_session_cache.get(key) is not MISSING:
+        return
+    mk = await get_client().post(f"/apps/{ADK_APP}/users/{user_id}/sessions/{session_id}", json={})
+    # Treat "already exists" as success across implementations.
+    ok_statuses = {200, 201, 409}
+    if mk.status_code not in ok_statuses:
+        # Some ADK builds return 400 with a 'Session already exists' message.
+        if mk.status_code == 400 and "Session already exists" in mk.text:
+            pass  # acceptable — continue
+        else:
+            raise HTTPException(
+                status_code=502,
+                detail=f"ADK session create failed: {mk.status_code} {mk.text}"
+            )
+    adk_session_cache.set(key, True)
+
+def forget_session(user_id, session_id):
+    """Drop a session the ADK server no longer knows (e.g. after it restarted)."""
+    adk_session_cache.invalidate((user_id, session_id))
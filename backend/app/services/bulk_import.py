@@ -0,0 +1,193 @@
+import json
+import re
+import time
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.db import db
+from app.models import Course, Major, Location, Section
+from app.services.cache import invalidate_catalog
+from app.services import course_search, route_provider
+from app.services.mongo_services import bump_catalog_version
+from app.services.prereq_graph import load_prereq_graph, normalize_code
+from app.services.section_store import load_section_store
+from app.services.walking_matrix import schedule_walking_matrix_refresh
+
+# kind -> (model, collection name, unique key or tuple of key fields)
+IMPORT_KINDS = {
+    "courses": (Course, "courses", "code"),
+    "majors": (Major, "majors", "major_id"),
+    "locations": (Location, "locations", "code"),
+    "sections": (Section, "sections", ("term", "crn")),
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+# Kinds whose "code" is matched however it is spaced: "COP 2210" updates a stored "COP2210"
+SPACED_CODE_KINDS = {"courses"}
+
+
+def parse_payload(text: str, fmt: str = "json", kind: str = None) -> dict:
+    """
+    Turn an import payload into {kind: [records]}.
+
+    json:  a list of records (needs `kind`) or {"courses": [...], "majors": [...], "sections": [...], ...}
+    jsonl: one record per line; lines may carry their own "kind" field
+    """
+    grouped = {}
+    if fmt == "jsonl":
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}")
+            if not isinstance(record, dict):
+                raise ValueError(f"line {number}: expected a JSON object, got {type(record).__name__}")
+            record_kind = record.pop("kind", None) or kind
+            grouped.setdefault(record_kind, []).append(record)
+    else:
+        data = json.loads(text)
+        if isinstance(data, list):
+            grouped[kind] = data
+        elif isinstance(data, dict):
+            grouped = {k: v for k, v in data.items() if k in IMPORT_KINDS}
+        else:
+            raise ValueError(f"expected a list or an object of record lists, got {type(data).__name__}")
+    unknown = [k for k in grouped if k not in IMPORT_KINDS]
+    if unknown:
+        raise ValueError(f"Unknown import kind(s): {unknown}; expected one of {sorted(IMPORT_KINDS)}")
+    not_lists = [k for k, v in grouped.items() if not isinstance(v, list)]
+    if not_lists:
+        raise ValueError(f"expected a list of records for {not_lists}")
+    return grouped
+
+
+async def import_records(kind: str, records: list, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         overwrite_empty: bool = True) -> dict:
+    """
+    Validate `records` against the kind's model and upsert them on the unique key
+    with unordered bulk_write calls of `chunk_size` operations.
+    Invalid records and failed writes are reported by their position in `records`.
+    Course codes are compared without spaces, and a course already stored
+    under another spelling keeps that spelling. With overwrite_empty=False, empty fields ("", [], 0, None) are only written
+    when the document is new and never replace stored values.
+    """
+    model, collection, key = IMPORT_KINDS[kind]
+    started = time.perf_counter()
+    errors = []
+    latest = {}  # key value -> (position, doc); a repeated key keeps the last record
+    for i, record in enumerate(records):
+        try:
+            doc = model(**record).dict()
+        except (ValidationError, TypeError) as e:
+            errors.append({"index": i, "key": _key_value(record, key) if isinstance(record, dict) else None,
+                           "error": str(e)})
+            continue
+        value = _key_value(doc, key)
+        latest[normalize_code(value) if kind in SPACED_CODE_KINDS else value] = (i, doc)
+    if kind in SPACED_CODE_KINDS:
+        stored = await _stored_codes(collection, list(latest), chunk_size)
+        for normalized, (_, doc) in latest.items():
+            doc["code"] = stored.get(normalized, doc["code"])
+    positions = [i for i, _ in latest.values()]
+    ops = [UpdateOne(_key_filter(doc, key), _update(doc, overwrite_empty), upsert=True)
+           for _, doc in latest.values()]
+    valid = len(records) - len(errors)
+
+    counts = {"matched": 0, "modified": 0, "upserted": 0}
+    failed_writes = 0
+    for start in range(0, len(ops), chunk_size):
+        chunk = ops[start:start + chunk_size]
+        try:
+            result = await db[collection].bulk_write(chunk, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            failed_writes += len(details.get("writeErrors", []))
+            for err in details.get("writeErrors", []):
+                i = positions[start + err["index"]]
+                errors.append({"index": i, "key": _key_value(records[i], key), "error": err.get("errmsg")})
+        counts["matched"] += details.get("nMatched", 0)
+        counts["modified"] += details.get("nModified", 0)
+        counts["upserted"] += details.get("nUpserted", 0)
+
+    if counts["modified"] or counts["upserted"]:
+        await bump_catalog_version()
+
+    seconds = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "received": len(records),
+        "written": len(ops) - failed_writes,
+        "invalid": len(records) - valid,
+        "duplicates": valid - len(ops),
+        **counts,
+        "errors": sorted(errors, key=lambda e: e["index"]),
+        "seconds": round(seconds, 3),
+        "records_per_second": round(len(records) / seconds, 1) if seconds else None,
+    }
+
+
+def _spellings(normalized: str) -> list:
+    """"COP2210" -> ["COP2210", "COP 2210"]: the spellings a stored code may have."""
+    m = re.match(r"([A-Z]+)(\d.*)$", normalized)
+    return [normalized, f"{m.group(1)} {m.group(2)}"] if m else [normalized]
+
+
+async def _stored_codes(collection: str, normalized: list, chunk_size: int) -> dict:
+    """normalized code -> the spelling it is stored under, for codes already in `collection`."""
+    stored = {}
+    for start in range(0, len(normalized), chunk_size):
+        variants = [v for code in normalized[start:start + chunk_size] for v in _spellings(code)]
+        cursor = db[collection].find({"code": {"$in": variants}}, {"_id": 0, "code": 1})
+        for doc in await cursor.to_list(length=None):
+            stored[normalize_code(doc["code"])] = doc["code"]
+    return stored
+
+
+def _key_value(doc: dict, key):
+    if isinstance(key, tuple):
+        return "|".join(str(doc.get(k)) for k in key)
+    return doc.get(key)
+
+
+def _key_filter(doc: dict, key) -> dict:
+    fields = key if isinstance(key, tuple) else (key,)
+    return {k: doc[k] for k in fields}
+
+
+def _update(doc: dict, overwrite_empty: bool) -> dict:
+    if overwrite_empty:
+        return {"$set": doc}
+    update = {"$set": {k: v for k, v in doc.items() if v}}
+    empty = {k: v for k, v in doc.items() if not v}
+    if empty:
+        update["$setOnInsert"] = empty
+    return update
+
+
+async def import_payload(grouped: dict, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """Import every kind in {kind: [records]}; majors and sections after the courses they list."""
+    order = ["locations", "courses", "majors", "sections"]
+    return [
+        # Re-importing a location list without place ids must not wipe resolved ones
+        await import_records(kind, grouped[kind], chunk_size, overwrite_empty=kind != "locations")
+        for kind in order if kind in grouped
+    ]
+
+
+async def refresh_after_import(kinds):
+    """Bring this process's in-memory catalog state up to date after a bulk write."""
+    invalidate_catalog()
+    if "courses" in kinds:
+        await load_prereq_graph()
+        course_search.mark_stale()
+    if "sections" in kinds:
+        await load_section_store()
+    if "locations" in kinds:
+        route_provider.provider.invalidate()
+        schedule_walking_matrix_refresh()
@@ -0,0 +1,91 @@
+import copy
+import os
+import time
+from collections import OrderedDict
+
+# Sentinel so a cached "not found" (None) can be told apart from a miss
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache where every entry expires after `ttl` seconds."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        # Hand out copies so callers can't mutate what is cached
+        return copy.deepcopy(entry[1])
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _make_cache(name: str, default_ttl: float) -> TTLCache:
+    prefix = f"CACHE_{name.upper()}"
+    return TTLCache(
+        name,
+        maxsize=int(os.getenv(f"{prefix}_MAXSIZE", "4096")),
+        ttl=float(os.getenv(f"{prefix}_TTL", str(default_ttl))),
+    )
+
+
+# ----------------- Catalog caches -----------------
+course_cache = _make_cache("courses", 600)
+major_cache = _make_cache("majors", 600)
+location_cache = _make_cache("locations", 3600)
+# Degree plans depend on courses and majors, so they are dropped with the catalog
+plan_cache = _make_cache("plans", 600)
+
+catalog_caches = {c.name: c for c in (course_cache, major_cache, location_cache, plan_cache)}
+
+# ----------------- Route cache (memory front tier) -----------------
+route_cache = _make_cache("routes", 3600)
+
+# ----------------- ADK sessions known to exist -----------------
+adk_session_cache = _make_cache("adk_sessions", 1800)
+
+caches = {**catalog_caches, route_cache.name: route_cache, adk_session_cache.name: adk_session_cache}
+
+
+def invalidate_catalog():
+    for c in catalog_caches.values():
+        c.invalidate()
+
+
+def cache_stats():
+    return [c.stats() for c in caches.values()]
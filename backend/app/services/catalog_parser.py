@@ -0,0 +1,150 @@
+import re
+from itertools import islice
+
+from app.services.bulk_import import DEFAULT_CHUNK_SIZE, import_records
+
+# "COP 3337", "COP3337", "CHM-1045L"
+CODE_RE = re.compile(r"\b([A-Z]{3})[ -]?(\d{4}[A-Z]?)\b")
+# A line that starts a course entry: optional footnote star, code, then a title
+ENTRY_RE = re.compile(r"^\*?\s*([A-Z]{3})[ -]?(\d{4}[A-Z]?)\s+([A-Z0-9].*)$")
+# "Title (3)." / "Title (1-3)" in course description listings
+PAREN_CREDITS_RE = re.compile(r"^(.*?)\s*\((\d+)(?:\s*-\s*\d+)?\)\.?\s*(.*)$")
+# "Title 3" in degree requirement listings
+TRAILING_CREDITS_RE = re.compile(r"^(.*\S)\s+(\d{1,2})$")
+CLAUSE_RE = re.compile(
+    r"\b(Prerequisites?|Corequisites?)\s*:\s*(.*?)(?=\b(?:Prerequisites?|Corequisites?)\s*:|\.\s+[A-Z]|\.?$)"
+)
+
+
+def normalize_catalog_code(subject: str, number: str) -> str:
+    """Catalog spelling for new courses; import_records keeps a stored "COP2210" as it is."""
+    return f"{subject} {number}"
+
+
+def parse_requisites(text: str) -> list:
+    """
+    "COP 2210 or COP 2250, and MAC 2311" -> ["COP 2210|COP 2250", "MAC 2311"]
+    Parts are split on "and", ";" and (when there is no "or") ","; the codes
+    within one part are alternatives, in the "A|B" group format the prereq
+    graph understands.
+    """
+    groups = []
+    for part in re.split(r";|\band\b", text):
+        pieces = [part] if re.search(r"\bor\b", part) else part.split(",")
+        for piece in pieces:
+            codes = [normalize_catalog_code(s, n) for s, n in CODE_RE.findall(piece)]
+            codes = list(dict.fromkeys(codes))
+            if codes:
+                groups.append("|".join(codes))
+    return groups
+
+
+class CatalogParser:
+    """
+    Line-at-a-time parser for catalog text. Feed lines in order; each call
+    returns the course records finished by that line. Only the entry being
+    read is held in memory, so catalogs of any length parse in constant space.
+
+    Two layouts are recognized:
+      description listings  "COP 3337 Computer Programming II (3). Text...
+                             Prerequisites: COP 2210 or COP 2250."
+      requirement listings  "COP 3530 Data Structures 3", where a title without
+                             credits may wrap onto one more line.
+    """
+
+    def __init__(self):
+        self._entry = None  # [code, first line text, continuation lines, has description]
+
+    def _start(self, code, text):
+        has_description = bool(PAREN_CREDITS_RE.match(text))
+        self._entry = [code, text, [], has_description]
+
+    def feed(self, line: str) -> list:
+        line = line.strip()
+        done = []
+        m = ENTRY_RE.match(line)
+        if m:
+            done = self.close()
+            self._start(normalize_catalog_code(m.group(1), m.group(2)), m.group(3))
+            return done
+        if self._entry is None:
+            return done
+        code, first, rest, has_description = self._entry
+        if not line or line.lower() in ("or", "and"):
+            return self.close()
+        if has_description:
+            rest.append(line)
+        elif not rest and not TRAILING_CREDITS_RE.match(first) and TRAILING_CREDITS_RE.match(line):
+            # Requirement listing title wrapped onto a second line
+            rest.append(line)
+            return self.close()
+        else:
+            return self.close()
+        return done
+
+    def close(self) -> list:
+        """Finish the entry in progress, if any."""
+        if self._entry is None:
+            return []
+        code, first, rest, has_description = self._entry
+        self._entry = None
+        text = " ".join([first] + rest)
+        record = {"code": code, "name": "", "description": "", "credits": 0, "prereqs": [], "coreqs": []}
+
+        m = PAREN_CREDITS_RE.match(text) if has_description else None
+        if m:
+            record["name"], record["credits"], record["description"] = m.group(1), int(m.group(2)), m.group(3)
+            for label, clause in CLAUSE_RE.findall(record["description"]):
+                key = "prereqs" if label.startswith("Pre") else "coreqs"
+                record[key].extend(g for g in parse_requisites(clause) if g not in record[key])
+        else:
+            m = TRAILING_CREDITS_RE.match(text)
+            if m:
+                record["name"], record["credits"] = m.group(1), int(m.group(2))
+            else:
+                record["name"] = text
+            # A leading footnote number ("COP 2210 1 Computer Programming I")
+            record["name"] = re.sub(r"^\d+\s+(?=[A-Z])", "", record["name"])
+        record["name"] = record["name"].strip(" *.")
+        return [record] if record["name"] else []
+
+
+def iter_catalog_courses(lines):
+    """Yield course records from an iterable of catalog lines (e.g. an open file)."""
+    parser = CatalogParser()
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.close()
+
+
+async def import_catalog(lines, batch_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Parse catalog lines and upsert the courses in batches of `batch_size`.
+    Empty parsed fields (no description, no prereqs listed) never overwrite
+    what is already stored, so a requirement listing can't wipe data loaded
+    from a description listing or a JSON import.
+    """
+    records = iter_catalog_courses(lines)
+    total = None
+    offset = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        report = await import_records("courses", batch, batch_size, overwrite_empty=False)
+        for err in report["errors"]:
+            err["index"] += offset
+        offset += len(batch)
+        total = _merge_reports(total, report)
+    return total or await import_records("courses", [], batch_size)
+
+
+def _merge_reports(total, report):
+    if total is None:
+        return report
+    for field in ("received", "written", "invalid", "duplicates", "matched", "modified", "upserted"):
+        total[field] += report[field]
+    total["errors"].extend(report["errors"])
+    total["seconds"] = round(total["seconds"] + report["seconds"], 3)
+    total["records_per_second"] = round(total["received"] / total["seconds"], 1) if total["seconds"] else None
+    return total
@@ -0,0 +1,117 @@
+import math
+
+from app.services import walking_matrix
+from app.services.mongo_services import get_location
+from app.services.schedule_bits import DAY_LETTERS, DAYS, WeekBits
+from app.services.section_store import get_section_store
+
+# Ranking weights (lower score is better)
+WALK_WEIGHT = 1.0    # per walking minute to/from the neighbouring blocks
+GAP_WEIGHT = 0.1     # per idle minute next to the neighbouring blocks
+NEW_DAY_WEIGHT = 15.0  # per meeting day the student is not on campus yet
+
+
+async def _place_id(code, cache):
+    if code not in cache:
+        location = await get_location(code) if code else None
+        cache[code] = (location or {}).get("google_maps_place_id")
+    return cache[code]
+
+
+async def _walk_minutes(a, b, cache):
+    """Walking minutes between two location codes, 0 for the same place, None if unknown."""
+    if not a or not b:
+        return None
+    if a == b:
+        return 0
+    origin, destination = await _place_id(a, cache), await _place_id(b, cache)
+    if not origin or not destination:
+        return None
+    leg = walking_matrix.matrix.leg(origin, destination)
+    return math.ceil(leg[0] / 60) if leg else None
+
+
+async def walking_times(codes):
+    """{"A|B": minutes} from each location code to each other one; pairs with no known walk are left out."""
+    codes = sorted({c for c in codes if c})
+    places, times = {}, {}
+    for a in codes:
+        for b in codes:
+            if a != b:
+                minutes = await _walk_minutes(a, b, places)
+                if minutes is not None:
+                    times[f"{a}|{b}"] = minutes
+    return times
+
+
+async def compatible_sections(user, term, courses, campuses=None, buffer_minutes=0, limit=10):
+    """
+    Sections of `courses` that fit around the user's stored schedule.
+
+    A section is rejected when its precomputed slot mask overlaps the
+    schedule's week mask, or when the walk from the block before it (or to
+    the block after it) does not fit in the gap, plus `buffer_minutes`.
+    Unknown walking times are not enforced and are flagged instead.
+    The rest are ranked per course by walking time, idle gaps and extra
+    days on campus.
+    """
+    week = WeekBits.for_user(user)
+    busy = week.week_mask()
+    store = get_section_store()
+    places = {}
+    results = {}
+    rejected = {"conflict": 0, "walk": 0}
+
+    for sid in store.query_ids(term, campuses, courses):
+        if store.masks[sid] & busy:
+            rejected["conflict"] += 1
+            continue
+        section = store.sections[sid]
+        start, end, days = store.meta[sid]
+        location = section.get("location")
+        walk_total, gap_total, new_days, unknown, feasible = 0, 0, 0, False, True
+        for letter in sorted(days, key=DAY_LETTERS.index):
+            day = DAY_LETTERS.index(letter)
+            if not week.bits[day]:
+                new_days += 1
+                continue
+            before, after = week.neighbours(day, start, end)
+            # (origin, destination, gap): into the section from the block before, out to the one after
+            legs = []
+            if before:
+                legs.append((before[1], location, start - before[0]))
+            if after:
+                legs.append((location, after[1], after[0] - end))
+            for origin, destination, gap in legs:
+                walk = await _walk_minutes(origin, destination, places)
+                if walk is None:
+                    unknown = True
+                    walk = 0
+                if walk + buffer_minutes > gap:
+                    feasible = False
+                    break
+                walk_total += walk
+                gap_total += gap - walk
+            if not feasible:
+                break
+        if not feasible:
+            rejected["walk"] += 1
+            continue
+        score = WALK_WEIGHT * walk_total + GAP_WEIGHT * gap_total + NEW_DAY_WEIGHT * new_days
+        results.setdefault(section["course"], []).append({
+            **section,
+            "score": round(score, 2),
+            "walk_minutes": walk_total,
+            "new_days": new_days,
+            "walk_unknown": unknown,
+        })
+
+    for options in results.values():
+        options.sort(key=lambda o: (o["score"], o["start"], o.get("crn", "")))
+        del options[limit:]
+    return {
+        "term": term,
+        "schedule_days": [DAYS[i] for i, bits in enumerate(week.bits) if bits],
+        "results": results,
+        "rejected": rejected,
+    }
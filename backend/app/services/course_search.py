@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+CODE_RE = re.compile(r"^([a-z]+)(\d+[a-z]?)$")
+
+# Field weights; an exact token match counts double a prefix match
+CODE_WEIGHT = 8
+NAME_WEIGHT = 4
+TEXT_WEIGHT = 1
+# Bounds the work a one- or two-letter prefix can cause
+MAX_EXPANSIONS = 500
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def compact_code(code):
+    return re.sub(r"[^a-z0-9]", "", (code or "").lower())
+
+
+class CourseSearchIndex:
+    """
+    In-memory search over course code, name and description.
+
+    Code and name tokens ("title" terms) match by prefix, so "cop 33" or
+    "data str" find courses while typing. Description tokens ("text" terms)
+    match exactly, and by prefix only for the last query token once it has
+    three characters. Every query token must match (AND); results are ranked
+    by field weight, exactness and a bonus for a code prefix match.
+    """
+
+    def __init__(self):
+        self.docs = []          # doc id -> {"code", "name", "credits"}
+        self.by_code = {}       # compact code -> doc id
+        self.codes = []         # sorted compact codes
+        self.title_terms = []   # sorted
+        self.text_terms = []    # sorted
+        self.title = {}         # term -> {doc id: weight}
+        self.text = {}
+
+    @classmethod
+    def from_courses(cls, courses):
+        index = cls()
+        for course in courses:
+            index._add(course, keep_sorted=False)
+        index.codes.sort()
+        index.title_terms.sort()
+        index.text_terms.sort()
+        return index
+
+    def add(self, course):
+        """Index one course (or re-index it after an update)."""
+        self._add(course, keep_sorted=True)
+
+    def _add(self, course, keep_sorted):
+        code = compact_code(course.get("code"))
+        if not code:
+            return
+        doc = self.by_code.get(code)
+        if doc is None:
+            doc = len(self.docs)
+            self.docs.append(None)
+            self.by_code[code] = doc
+            self._insert(self.codes, code, keep_sorted)
+        else:
+            self._remove(doc)
+        self.docs[doc] = {"code": course.get("code"), "name": course.get("name", ""), "credits": course.get("credits", 0)}
+
+        title = {}
+        m = CODE_RE.match(code)
+        for term in [code] + (list(m.groups()) if m else []):
+            title[term] = CODE_WEIGHT
+        for term in tokenize(course.get("name")):
+            title.setdefault(term, NAME_WEIGHT)
+        for term, weight in title.items():
+            self._post(self.title, self.title_terms, term, doc, weight, keep_sorted)
+        text = self.text
+        for term in set(tokenize(course.get("description"))):
+            docs = text.get(term)
+            if docs is None:
+                docs = text[term] = {}
+                self._insert(self.text_terms, term, keep_sorted)
+            docs[doc] = TEXT_WEIGHT
+
+    def _remove(self, doc):
+        for postings in (self.title, self.text):
+            for docs in postings.values():
+                docs.pop(doc, None)
+
+    @staticmethod
+    def _insert(terms, term, keep_sorted):
+        if keep_sorted:
+            insort(terms, term)
+        else:
+            terms.append(term)
+
+    def _post(self, postings, terms, term, doc, weight, keep_sorted):
+        docs = postings.get(term)
+        if docs is None:
+            docs = postings[term] = {}
+            self._insert(terms, term, keep_sorted)
+        docs[doc] = weight
+
+    @staticmethod
+    def _expand(terms, token):
+        i = bisect_left(terms, token)
+        end = min(len(terms), i + MAX_EXPANSIONS)
+        while i < end and terms[i].startswith(token):
+            yield terms[i]
+            i += 1
+
+    def _match(self, token, last):
+        """{doc id: best score} for one query token."""
+        scores = {}
+
+        def hit(postings, term):
+            factor = 2 if term == token else 1
+            for doc, weight in postings[term].items():
+                if weight * factor > scores.get(doc, 0):
+                    scores[doc] = weight * factor
+
+        for term in self._expand(self.title_terms, token):
+            hit(self.title, term)
+        if last and len(token) >= 3:
+            for term in self._expand(self.text_terms, token):
+                hit(self.text, term)
+        elif token in self.text:
+            hit(self.text, token)
+        return scores
+
+    def search(self, q, limit=20):
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+        code_q = "".join(tokens)
+        if len(code_q) < 2:
+            # A single character would touch most of the index; list codes only
+            return [{**self.docs[self.by_code[c]], "score": 20}
+                    for c in islice(self._expand(self.codes, code_q), limit)]
+        matches = [self._match(t, i == len(tokens) - 1) for i, t in enumerate(tokens)]
+        matches.sort(key=len)
+        candidates = set(matches[0])
+        for m in matches[1:]:
+            candidates &= m.keys()
+            if not candidates:
+                return []
+
+        # Whole query read as a code ("cop 33" -> "cop33")
+        bonus = {}
+        for code in self._expand(self.codes, code_q):
+            bonus[self.by_code[code]] = 50 if code == code_q else 20
+
+        scored = ((sum(m[d] for m in matches) + bonus.get(d, 0), d) for d in candidates)
+        top = heapq.nsmallest(limit, scored, key=lambda x: (-x[0], self.docs[x[1]]["code"]))
+        return [{**self.docs[d], "score": score} for score, d in top]
+
+    def __len__(self):
+        return len(self.by_code)
+
+
+_index = CourseSearchIndex()
+_stale = True
+_lock = asyncio.Lock()
+
+
+async def load_course_search_index():
+    """Rebuild the index from the courses collection."""
+    global _index, _stale
+    from app.db import db
+    _stale = False
+    courses = await db.courses.find(
+        {}, {"_id": 0, "code": 1, "name": 1, "description": 1, "credits": 1}
+    ).to_list(length=None)
+    # Tokenizing a large catalog takes a while; keep it off the event loop
+    _index = await asyncio.to_thread(CourseSearchIndex.from_courses, courses)
+    return _index
+
+
+def mark_stale():
+    """The catalog changed in bulk; rebuild on the next search."""
+    global _stale
+    _stale = True
+
+
+def add_course(course):
+    _index.add(course)
+
+
+async def get_course_search_index():
+    async with _lock:
+        if _stale:
+            await load_course_search_index()
+    return _index
@@ -0,0 +1,231 @@
+import math
+import time
+
+from app.services.cache import MISSING, plan_cache
+
+DEFAULT_CREDITS = 3  # assumed for prereqs that are not in the catalog
+
+
+class _Course:
+    __slots__ = ("code", "credits", "prereqs", "coreqs", "height")
+
+    def __init__(self, code, credits, prereqs, coreqs):
+        self.code = code
+        self.credits = credits
+        self.prereqs = prereqs  # list of sets of alternative codes
+        self.coreqs = coreqs
+        self.height = 1
+
+
+def _collect(graph, required, taken):
+    """
+    Courses that still have to be planned: untaken required courses plus any
+    untaken prereqs they pull in. For an "A|B" group with nothing taken, the
+    first alternative is planned unless another one is already in the plan.
+    """
+    courses, assumed = {}, []
+    pending = [c for c in required if c not in taken]
+    while pending:
+        code = pending.pop()
+        if code in courses or code in taken:
+            continue
+        info = graph.course(code)
+        if info is None:
+            courses[code] = _Course(code, DEFAULT_CREDITS, [], [])
+            assumed.append(code)
+            continue
+        course = _Course(info["code"], info["credits"] or DEFAULT_CREDITS, info["prereqs"], info["coreqs"])
+        courses[code] = course
+        for group in course.prereqs + course.coreqs:
+            if not group & (taken | courses.keys()):
+                pending.append(sorted(group)[0])
+    # Only keep alternatives that are either done or being planned
+    for course in courses.values():
+        course.prereqs = [g & courses.keys() for g in course.prereqs if not g & taken]
+        course.coreqs = [g & courses.keys() for g in course.coreqs if not g & taken]
+    return courses, sorted(assumed)
+
+
+def _heights(courses):
+    """Longest chain of planned courses that starts at each course (critical path)."""
+    children = {c: [] for c in courses}
+    for code, course in courses.items():
+        for group in course.prereqs:
+            for p in group:
+                children[p].append(code)
+    memo, visiting = {}, set()
+
+    def height(code):
+        if code in memo:
+            return memo[code]
+        if code in visiting:  # cycle; break it here
+            return 1
+        visiting.add(code)
+        h = 1 + max((height(ch) for ch in children[code]), default=0)
+        visiting.discard(code)
+        memo[code] = h
+        return h
+
+    for code, course in courses.items():
+        course.height = height(code)
+
+
+def _available(courses, remaining, done):
+    ready = []
+    for code in remaining:
+        course = courses[code]
+        if all(g & done for g in course.prereqs):
+            ready.append(code)
+    return ready
+
+
+def _fill_term(courses, ready, done, max_credits):
+    """Place `ready` courses in order while they fit; coreqs may land in the same term."""
+    term, credits, placed = [], 0, set()
+    changed = True
+    while changed:
+        changed = False
+        for code in ready:
+            if code in placed:
+                continue
+            course = courses[code]
+            if credits + course.credits > max_credits:
+                continue
+            if not all(g & (done | placed) for g in course.coreqs):
+                continue
+            term.append(code)
+            placed.add(code)
+            credits += course.credits
+            changed = True
+    return term
+
+
+def _greedy(courses, max_credits):
+    remaining, done, terms = set(courses), set(), []
+    while remaining:
+        ready = sorted(_available(courses, remaining, done),
+                       key=lambda c: (-courses[c].height, -courses[c].credits, c))
+        term = _fill_term(courses, ready, done, max_credits)
+        if not term:
+            break
+        terms.append(term)
+        done |= set(term)
+        remaining -= set(term)
+    return terms, sorted(remaining)
+
+
+def _search(courses, max_credits, limit, deadline):
+    """
+    Depth-first search for a plan with at most `limit` terms.
+    Prunes when the remaining credits or the longest remaining chain cannot
+    fit in the terms left. Raises TimeoutError past the deadline.
+    """
+    checks = [0]
+
+    def fits(remaining, terms_left):
+        if not remaining:
+            return True
+        if terms_left <= 0:
+            return False
+        total = sum(courses[c].credits for c in remaining)
+        longest = max(courses[c].height for c in remaining)
+        return total <= terms_left * max_credits and longest <= terms_left
+
+    def dfs(remaining, done, terms):
+        checks[0] += 1
+        if checks[0] % 256 == 0 and time.monotonic() > deadline:
+            raise TimeoutError
+        if not remaining:
+            return terms
+        terms_left = limit - len(terms)
+        if not fits(remaining, terms_left):
+            return None
+        ready = sorted(_available(courses, remaining, done),
+                       key=lambda c: (-courses[c].height, -courses[c].credits, c))
+        # Anything whose chain needs every remaining term must start now
+        must = [c for c in ready if courses[c].height >= terms_left]
+        if sum(courses[c].credits for c in must) > max_credits:
+            return None
+        optional = [c for c in ready if c not in must]
+
+        def choose(i, picked, credits):
+            if i == len(optional):
+                term = _fill_term(courses, must + picked, done, max_credits)
+                if not term:
+                    return None
+                placed = set(term)
+                return dfs(remaining - placed, done | placed, terms + [term])
+            code = optional[i]
+            if credits + courses[code].credits <= max_credits:
+                found = choose(i + 1, picked + [code], credits + courses[code].credits)
+                if found:
+                    return found
+            return choose(i + 1, picked, credits)
+
+        return choose(0, [], sum(courses[c].credits for c in must))
+
+    return dfs(frozenset(courses), frozenset(), [])
+
+
+def build_plan(graph, required, taken, max_credits=15, time_budget_ms=1000):
+    """
+    Semester-by-semester plan for the untaken `required` courses.
+    Starts from a critical-path list schedule, then searches for a plan with
+    fewer terms until it reaches the lower bound or the time budget runs out.
+    """
+    taken = {graph.display_code(c) for c in taken}
+    required = [graph.display_code(c) for c in required]
+    courses, assumed = _collect(graph, required, taken)
+    _heights(courses)
+
+    terms, unplaceable = _greedy(courses, max_credits)
+    total = sum(c.credits for c in courses.values())
+    lower = max(math.ceil(total / max_credits),
+                max((c.height for c in courses.values()), default=0))
+
+    optimal = not unplaceable and len(terms) <= lower
+    if not unplaceable and not optimal:
+        deadline = time.monotonic() + time_budget_ms / 1000.0
+        try:
+            for limit in range(lower, len(terms)):
+                better = _search(courses, max_credits, limit, deadline)
+                if better:
+                    terms, optimal = better, True
+                    break
+            else:
+                optimal = True  # nothing shorter exists
+        except TimeoutError:
+            pass
+
+    return {
+        "terms": [
+            {
+                "term": n,
+                "courses": [{"code": c, "credits": courses[c].credits} for c in sorted(term)],
+                "credits": sum(courses[c].credits for c in term),
+            }
+            for n, term in enumerate(terms, start=1)
+        ],
+        "total_terms": len(terms),
+        "lower_bound": lower,
+        "optimal": optimal,
+        "unplaceable": unplaceable,
+        "assumed_credits": assumed,
+    }
+
+
+def cached_plan(major_id, graph, required, taken, max_credits=15, time_budget_ms=1000):
+    """
+    build_plan memoized per (major, taken set, credit cap). Returns (plan, from_cache).
+    A plan that is not known to be optimal is only reused for a time budget no
+    larger than the one it was searched with.
+    """
+    key = (major_id, frozenset(c.strip().upper().replace(" ", "") for c in taken), max_credits)
+    cached = plan_cache.get(key)
+    if cached is not MISSING:
+        plan, budget = cached
+        if plan["optimal"] or time_budget_ms <= budget:
+            return plan, True
+    plan = build_plan(graph, required, set(taken), max_credits, time_budget_ms)
+    plan_cache.set(key, (plan, time_budget_ms))
+    return plan, False
@@ -1,5 +1,5 @@
-from xml.etree.ElementTree import tostring
-import requests
+import asyncio
+import httpx
 import os
 from dotenv import load_dotenv
 
@@ -7,140 +7,165 @@ load_dotenv()  # Loads variables from .env
 
 api_key = os.getenv("GOOGLE_API_KEY")
 
+ROUTES_URL = "https://routes.googleapis.com/directions/v2:computeRoutes"
+ROUTE_MATRIX_URL = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+FIND_PLACE_URL = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
+# computeRouteMatrix accepts at most 625 origin x destination elements per call
+ROUTE_MATRIX_MAX_SIDE = 25
+TRAVEL_MODE = "WALK"
+
+# Shared HTTP client settings for Google calls
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "10"))
+GOOGLE_CONNECT_TIMEOUT = float(os.getenv("GOOGLE_CONNECT_TIMEOUT", "5"))
+GOOGLE_MAX_CONNECTIONS = int(os.getenv("GOOGLE_MAX_CONNECTIONS", "20"))
+GOOGLE_MAX_CONCURRENCY = int(os.getenv("GOOGLE_MAX_CONCURRENCY", "10"))
+
+_client = None
+_semaphore = asyncio.Semaphore(GOOGLE_MAX_CONCURRENCY)
+
+def get_client():
+    """Return the shared keep-alive AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_HTTP_TIMEOUT, connect=GOOGLE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=GOOGLE_MAX_CONNECTIONS,
+                max_keepalive_connections=GOOGLE_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 def make_waypoint(placeId):
     return {"via": False,
             "sideOfRoad": False,
             "placeId": placeId["place_id"]
             }
 
-def get_route(location_list):
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
-
+def build_route_request(location_list):
     # Assume location_list is a list of dicts: [{"place_id": ...}, ...]
-
-
     origin = make_waypoint(location_list[0])
     destination = make_waypoint(location_list[-1])
     intermediates = [make_waypoint(loc) for loc in location_list[1:-1]]
 
-    request = {
+    return {
         "origin": origin,
         "destination": destination,
         "intermediates": intermediates,
-        "travelMode": "WALK",
+        "travelMode": TRAVEL_MODE,
         "languageCode": "en-US",
         "units": "IMPERIAL"
         # Add other required fields as needed
     }
 
-    try: 
-        response = requests.post(
-            "https://routes.googleapis.com/directions/v2:computeRoutes",
-            headers={
-                "X-Goog-Api-Key": api_key,
-                "X-Goog-FieldMask": "routes.duration,routes.distanceMeters,routes.polyline.encodedPolyline,routes.legs.polyline.encodedPolyline,routes.legs.staticDuration,routes.legs.distanceMeters"
-            },
-            json=request
-        )
+async def _post_routes_api(url, request, field_mask):
+    """POST to a Routes API endpoint through the shared client. Returns None on failure."""
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
+
+    try:
+        async with _semaphore:
+            response = await get_client().post(
+                url,
+                headers={
+                    "X-Goog-Api-Key": api_key,
+                    "X-Goog-FieldMask": field_mask
+                },
+                json=request
+            )
 
         if response.status_code == 200:
-            route = response.json()
-            return route
+            return response.json()
         else:
             print('Error:', response.status_code, response.text)
             return None
-        
-    except requests.exceptions.RequestException as e:
+
+    except httpx.HTTPError as e:
         print('Error:', e)
         return None
 
-    # Placeholder return
-    return {
-        "routes": [
-            {
-                "distanceMeters": 772,
-                "duration": "165s",
-                "polyline": {
-                    "encodedPolyline": "ipkcFfichVnP@j@BLoFVwM{E?"
-                }
-            }
-        ]
-    }
-    
-def get_route_times(location_list):
+async def compute_routes(request, field_mask):
+    return await _post_routes_api(ROUTES_URL, request, field_mask)
 
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
-
-    # Assume location_list is a list of dicts: [{"place_id": ...}, ...]
-
-
-    origin = make_waypoint(location_list[0])
-    destination = make_waypoint(location_list[-1])
-    intermediates = [make_waypoint(loc) for loc in location_list[1:-1]]
+async def compute_route_matrix(origin_ids, destination_ids):
+    """
+    Walking durations/distances for every origin x destination pair.
+    Both sides must have at most ROUTE_MATRIX_MAX_SIDE place ids.
+    Returns the list of matrix elements, or None on failure.
+    """
+    def waypoint(pid):
+        return {"waypoint": {"placeId": pid}}
 
     request = {
-        "origin": origin,
-        "destination": destination,
-        "intermediates": intermediates,
-        "travelMode": "WALK",
-        "languageCode": "en-US",
-        "units": "IMPERIAL"
-        # Add other required fields as needed
+        "origins": [waypoint(pid) for pid in origin_ids],
+        "destinations": [waypoint(pid) for pid in destination_ids],
+        "travelMode": TRAVEL_MODE,
     }
+    return await _post_routes_api(
+        ROUTE_MATRIX_URL,
+        request,
+        "originIndex,destinationIndex,duration,distanceMeters,condition"
+    )
 
-    try: 
-        response = requests.post(
-            "https://routes.googleapis.com/directions/v2:computeRoutes",
-            headers={
-                "X-Goog-Api-Key": api_key,
-                "X-Goog-FieldMask": "routes.legs.duration"
-            },
-            json=request
-        )
+async def get_route(location_list):
+    return await compute_routes(
+        build_route_request(location_list),
+        "routes.duration,routes.distanceMeters,routes.polyline.encodedPolyline,routes.legs.polyline.encodedPolyline,routes.legs.staticDuration,routes.legs.distanceMeters"
+    )
 
-        if response.status_code == 200:
-            route = response.json()
-            return route
-        else:
-            print('Error:', response.status_code, response.text)
-            return None
-        
-    except requests.exceptions.RequestException as e:
-        print('Error:', e)
-        return None
+async def get_route_times(location_list):
+    return await compute_routes(build_route_request(location_list), "routes.legs.duration")
 
-def get_place_id(address):
+async def find_place(address):
+    """
+    Find Place lookup for a free-text address.
+    Returns (status, candidate): the API status ("OK", "ZERO_RESULTS",
+    "OVER_QUERY_LIMIT", ...), or "ERROR" if the request failed, and the first
+    candidate as {"place_id", "lat", "lng"} or None.
+    """
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable is not set.")
 
-    url_request = (
-        "https://maps.googleapis.com/maps/api/place/findplacefromtext/json?input="
-        + address
-        + "&inputtype=textquery&fields=place_id&key="
-        + api_key
-    )
-
-    url = url_request
-    
     try:
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            places = response.json()
-            if places['candidates']:
-                print(places['candidates'][0]['place_id'])
-                return places['candidates'][0]['place_id']
-            else:
-                return None
-        else:
-            print('Error:', response.status_code)
-            return None
-    except requests.exceptions.RequestException as e:
+        async with _semaphore:
+            response = await get_client().get(
+                FIND_PLACE_URL,
+                params={
+                    "input": address,
+                    "inputtype": "textquery",
+                    "fields": "place_id,geometry/location",
+                    "key": api_key,
+                },
+            )
+    except httpx.HTTPError as e:
         print('Error:', e)
-        return None
-    
-
-
+        return "ERROR", None
 
+    if response.status_code != 200:
+        print('Error:', response.status_code, response.text)
+        return "ERROR", None
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        print('Error: unexpected Find Place response:', response.text[:200])
+        return "ERROR", None
+    candidates = body.get("candidates") or []
+    if not candidates:
+        return body.get("status", "ZERO_RESULTS"), None
+    if not candidates[0].get("place_id"):
+        print('Error: Find Place candidate without a place_id:', candidates[0])
+        return "ERROR", None
+    location = (candidates[0].get("geometry") or {}).get("location") or {}
+    return "OK", {
+        "place_id": candidates[0]["place_id"],
+        "lat": location.get("lat"),
+        "lng": location.get("lng"),
+    }
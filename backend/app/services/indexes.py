@@ -0,0 +1,56 @@
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from app.db import db
+from app.services.route_cache import ROUTE_CACHE_TTL
+
+# collection -> [(keys, options)]. Unique keys back the lookups in mongo_services
+# and replace the find-then-insert duplicate checks.
+INDEXES = {
+    "courses": [([("code", ASCENDING)], {"unique": True})],
+    "majors": [([("major_id", ASCENDING)], {"unique": True})],
+    "users": [([("user_id", ASCENDING)], {"unique": True})],
+    "locations": [([("code", ASCENDING)], {"unique": True})],
+    "current_courses": [([("code", ASCENDING)], {})],
+    "sections": [([("term", ASCENDING), ("crn", ASCENDING)], {"unique": True})],
+    "route_cache": [
+        ([("key", ASCENDING)], {"unique": True}),
+        ([("created_at", ASCENDING)], {"expireAfterSeconds": ROUTE_CACHE_TTL}),
+    ],
+}
+
+# Result of the last ensure_indexes() run, served by /index-status
+index_status = []
+
+
+async def ensure_indexes():
+    """
+    Create every declared index that is missing. A failure (e.g. existing
+    duplicates blocking a unique index) is recorded and does not stop the rest.
+    Returns one status entry per index.
+    """
+    global index_status
+    status = []
+    for collection, specs in INDEXES.items():
+        try:
+            existing = await db[collection].index_information()
+        except PyMongoError:
+            existing = {}
+        for keys, options in specs:
+            name = "_".join(f"{k}_{d}" for k, d in keys)  # Mongo's default index name
+            entry = {
+                "collection": collection,
+                "name": name,
+                "keys": [k for k, _ in keys],
+                "unique": options.get("unique", False),
+            }
+            try:
+                await db[collection].create_index(keys, **options)
+                entry["status"] = "exists" if name in existing else "created"
+            except PyMongoError as e:
+                entry["status"] = "error"
+                entry["error"] = str(e)
+                print(f"Could not create index {collection}.{name}: {e}")
+            status.append(entry)
+    index_status = status
+    return status
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from app.db import db
+from app.services import route_cache
+from app.services.mongo_services import get_location
+from app.services.schedule_bits import to_minutes
+
+
+async def day_stops(blocks):
+    """
+    Ordered stops for one day: the blocks sorted by start time with their
+    place ids, taken from the block's Location or, when it was saved without
+    one, from the locations collection.
+    """
+    stops = []
+    for block in sorted(blocks or [], key=lambda b: to_minutes(b["start_time"])):
+        location = block.get("location") or {}
+        code = location.get("code")
+        place_id = location.get("google_maps_place_id")
+        if not place_id and code:
+            place_id = ((await get_location(code)) or {}).get("google_maps_place_id")
+        stops.append({
+            "code": code,
+            "place_id": place_id,
+            "start": str(block["start_time"])[:5],
+            "end": str(block["end_time"])[:5],
+        })
+    return stops
+
+
+def route_stops(stops):
+    """Stops that can be routed, with back-to-back blocks in the same place collapsed."""
+    route = []
+    for stop in stops:
+        if stop["place_id"] and (not route or route[-1]["place_id"] != stop["place_id"]):
+            route.append(stop)
+    return route
+
+
+def _summarize(stops, route):
+    r = route["routes"][0]
+    legs = r.get("legs") or []
+    return {
+        "polyline": (r.get("polyline") or {}).get("encodedPolyline"),
+        "legs": [
+            {
+                "from": a["code"],
+                "to": b["code"],
+                "duration_s": route_cache.duration_seconds(leg.get("staticDuration") or leg.get("duration")),
+                "distance_m": leg.get("distanceMeters", 0),
+                "polyline": (leg.get("polyline") or {}).get("encodedPolyline"),
+            }
+            for a, b, leg in zip(stops, stops[1:], legs)
+        ],
+        "total_duration_s": route_cache.duration_seconds(r.get("duration")),
+        "total_distance_m": r.get("distanceMeters", 0),
+    }
+
+
+async def get_itinerary(user: dict, day: str):
+    """
+    The user's route for `day`, stored on the user under itineraries.<day>.
+
+    The stored entry is keyed by the ordered place ids it was computed from,
+    so it is served as-is until that day's blocks change where the user goes;
+    only then is the route resolved again (through the route cache).
+    Returns None if the route could not be resolved.
+    """
+    stops = await day_stops((user.get("schedule") or {}).get(day))
+    route = route_stops(stops)
+    fingerprint = route_cache.route_key([s["place_id"] for s in route])
+    unresolved = [s["code"] for s in stops if not s["place_id"]]
+
+    stored = (user.get("itineraries") or {}).get(day)
+    if stored and stored.get("fingerprint") == fingerprint:
+        return {**stored, "stops": stops, "unresolved": unresolved, "cached": True}
+
+    if len(route) < 2:
+        summary = {"polyline": None, "legs": [], "total_duration_s": 0, "total_distance_m": 0}
+    else:
+        result = await route_cache.get_route([{"place_id": s["place_id"]} for s in route])
+        if not result or not result.get("routes"):
+            return None
+        summary = _summarize(route, result)
+
+    itinerary = {
+        "fingerprint": fingerprint,
+        **summary,
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    # Derived data: written without bumping the user's revision
+    await db.users.update_one({"user_id": user["user_id"]}, {"$set": {f"itineraries.{day}": itinerary}})
+    return {**itinerary, "stops": stops, "unresolved": unresolved, "cached": False}
@@ -1,20 +1,103 @@
+# Inserts rely on the unique indexes from app.services.indexes and raise
+# pymongo.errors.DuplicateKeyError when the key is taken.
+import re
+
+from pymongo import ReturnDocument
+
 from app.db import db, serialize_doc
-from app.models import Course, CurrentCourse, Major, User, Location
+from app.models import Course, CurrentCourse, Major, User, Location, Section
+from app.services.cache import MISSING, course_cache, major_cache, location_cache, plan_cache
+from app.services.section_store import get_section_store
+from app.services.prereq_graph import get_prereq_graph
+from app.services import course_search
+from app.services.schedule_bits import DAYS, encode_day, encode_schedule
+
+# ----------------- Versions -----------------
+# Counters that let out-of-process caches (the agent's tool cache) tell
+# whether the catalog or a user changed since they cached something.
+async def bump_catalog_version():
+    await db.meta.update_one({"_id": "catalog"}, {"$inc": {"version": 1}}, upsert=True)
+
+async def get_versions(user_id: str = None):
+    """{"catalog": n} plus {"user": revision} when user_id is given (None if no such user)."""
+    meta = await db.meta.find_one({"_id": "catalog"}) or {}
+    versions = {"catalog": meta.get("version", 0)}
+    if user_id is not None:
+        user = await db.users.find_one({"user_id": user_id}, {"_id": 0, "revision": 1})
+        versions["user"] = user.get("revision", 0) if user is not None else None
+    return versions
+
+# ----------------- Listing -----------------
+async def list_page(collection: str, key: str, fields: list, filters: dict = None,
+                    prefix: str = None, after: str = None, limit: int = 100):
+    """
+    One page of a collection in `key` order, projected to `fields`.
+    Keyset pagination: pass the previous page's next_cursor as `after`.
+    Returns (docs, next_cursor); next_cursor is None on the last page.
+    """
+    query = dict(filters or {})
+    key_filter = {}
+    if prefix:
+        key_filter["$regex"] = "^" + re.escape(prefix)  # anchored, so it is an index range scan
+    if after is not None:
+        key_filter["$gt"] = after
+    if key_filter:
+        query[key] = key_filter
+    projection = {"_id": 0, **{f: 1 for f in fields}}
+    cursor = db[collection].find(query, projection).sort(key, 1).limit(limit + 1)
+    docs = await cursor.to_list(length=limit + 1)
+    next_cursor = docs[limit - 1][key] if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
 # ----------------- Location -----------------
 async def insert_location(location: Location):
     await db.locations.insert_one(location.dict())
+    location_cache.invalidate(location.code)
+    await bump_catalog_version()
 
 async def get_location(code: str):
-    doc = await db.locations.find_one({"code": code})
-    return serialize_doc(doc)
+    cached = location_cache.get(code)
+    if cached is not MISSING:
+        return cached
+    doc = serialize_doc(await db.locations.find_one({"code": code}))
+    location_cache.set(code, doc)
+    return doc
 
 # ----------------- Course -----------------
 async def insert_course(course: Course):
     await db.courses.insert_one(course.dict())
+    course_cache.invalidate(course.code)
+    plan_cache.invalidate()
+    get_prereq_graph().add_course(course.dict())
+    course_search.add_course(course.dict())
+    await bump_catalog_version()
 
 async def get_course(code: str):
-    doc = await db.courses.find_one({"code": code})
-    return serialize_doc(doc)
+    cached = course_cache.get(code)
+    if cached is not MISSING:
+        return cached
+    doc = serialize_doc(await db.courses.find_one({"code": code}))
+    course_cache.set(code, doc)
+    return doc
+
+async def get_courses(codes: list):
+    found = {}
+    to_fetch = []
+    for code in codes:
+        cached = course_cache.get(code)
+        if cached is MISSING:
+            to_fetch.append(code)
+        elif cached is not None:
+            found[code] = cached
+    if to_fetch:
+        # One $in query for the whole batch instead of a find_one per code
+        cursor = db.courses.find({"code": {"$in": to_fetch}})
+        docs = await cursor.to_list(length=None)
+        fetched = {doc["code"]: serialize_doc(doc) for doc in docs}
+        for code in to_fetch:
+            course_cache.set(code, fetched.get(code))
+        found.update(fetched)
+    return found
 
 # ----------------- CurrentCourse -----------------
 async def insert_current_course(current_course: CurrentCourse):
@@ -24,40 +107,136 @@ async def get_current_course(code: str):
     doc = await db.current_courses.find_one({"code": code})
     return serialize_doc(doc)
 
+# ----------------- Section -----------------
+async def insert_section(section: Section):
+    await db.sections.insert_one(section.dict())
+    get_section_store().add(section.dict())
+    await bump_catalog_version()
+
 # ----------------- Major -----------------
 async def insert_major(major: Major):
     await db.majors.insert_one(major.dict())
+    major_cache.invalidate(major.major_id)
+    plan_cache.invalidate()
+    await bump_catalog_version()
 
 async def get_major(major_id: str):
-    doc = await db.majors.find_one({"major_id": major_id})
-    return serialize_doc(doc)
+    cached = major_cache.get(major_id)
+    if cached is not MISSING:
+        return cached
+    doc = serialize_doc(await db.majors.find_one({"major_id": major_id}))
+    major_cache.set(major_id, doc)
+    return doc
 
 # ----------------- User -----------------
 async def insert_user(user: User):
-    existing = await db.users.find_one({"user_id": user.user_id})
-    if existing:
-        return None  # Or raise an exception if preferred
-    await db.users.insert_one(user.dict())
+    doc = _to_mongo(user)
+    doc["schedule_bits"] = encode_schedule(doc.get("schedule"))
+    await db.users.insert_one(doc)
 
 async def get_user(user_id: str):
     doc = await db.users.find_one({"user_id": user_id})
     return serialize_doc(doc)
 
+def _to_mongo(obj):
+    """Convert Pydantic models and time/datetime values into plain BSON-friendly data."""
+    if hasattr(obj, 'dict'):  # Pydantic model
+        return _to_mongo(obj.dict())
+    elif hasattr(obj, 'isoformat'):  # datetime objects
+        return obj.isoformat()
+    elif isinstance(obj, list):
+        return [_to_mongo(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {k: _to_mongo(v) for k, v in obj.items()}
+    else:
+        return obj
+
 async def update_user(user_id: str, update_data: dict):
     update_data.pop('_id', None)  # Remove _id if present
-    
-    # Convert any Pydantic models back to dicts for MongoDB
-    def serialize_for_mongo(obj):
-        if hasattr(obj, 'dict'):  # Pydantic model
-            return obj.dict()
-        elif hasattr(obj, 'isoformat'):  # datetime objects
-            return obj.isoformat()
-        elif isinstance(obj, list):
-            return [serialize_for_mongo(item) for item in obj]
-        elif isinstance(obj, dict):
-            return {k: serialize_for_mongo(v) for k, v in obj.items()}
+    update_data = _to_mongo(update_data)
+    update_data.pop('revision', None)
+    update_data.pop('schedule_bits', None)
+    update_data.pop('itineraries', None)
+    if isinstance(update_data.get('schedule'), dict):
+        update_data['schedule_bits'] = encode_schedule(update_data['schedule'])
+    await db.users.update_one({"user_id": user_id}, {"$set": update_data, "$inc": {"revision": 1}})
+
+SCHEDULE_DAYS = DAYS
+
+class RevisionConflict(Exception):
+    """The user document changed since the client read it."""
+
+    def __init__(self, current):
+        super().__init__(f"User was modified (current revision {current})")
+        self.current = current
+
+def build_user_update(ops: list) -> dict:
+    """
+    Translate patch operations into one field-level update document:
+      add_taken_course / remove_taken_course  -> $addToSet / $pull on taken_courses
+      set_day (day, blocks)                   -> $set schedule.<day> and schedule_bits.<day>
+      set_major                               -> $set major
+      add_current_course / remove_current_course -> $push / $pull on current_courses
+    Raises ValueError for unknown or conflicting operations.
+    """
+    add_taken, remove_taken, add_current, remove_current = [], [], [], []
+    sets = {}
+    for op in ops:
+        if op.op == "add_taken_course" and op.code:
+            add_taken.append(op.code.strip())
+        elif op.op == "remove_taken_course" and op.code:
+            remove_taken.append(op.code.strip())
+        elif op.op == "set_day" and op.day in SCHEDULE_DAYS and op.blocks is not None:
+            blocks = _to_mongo(op.blocks)
+            sets[f"schedule.{op.day}"] = blocks
+            sets[f"schedule_bits.{op.day}"] = encode_day(blocks)
+        elif op.op == "set_major" and op.major is not None:
+            sets["major"] = op.major
+        elif op.op == "add_current_course" and op.course is not None:
+            add_current.append(_to_mongo(op.course))
+        elif op.op == "remove_current_course" and op.code:
+            remove_current.append(op.code.strip())
         else:
-            return obj
-    
-    update_data = serialize_for_mongo(update_data)
-    await db.users.update_one({"user_id": user_id}, {"$set": update_data})
+            raise ValueError(f"Invalid operation: {op.op}")
+    # Mongo can't touch one array with two operators in the same update
+    if add_taken and remove_taken:
+        raise ValueError("Cannot add and remove taken courses in one patch")
+    if add_current and remove_current:
+        raise ValueError("Cannot add and remove current courses in one patch")
+
+    update = {"$inc": {"revision": 1}}
+    if sets:
+        update["$set"] = sets
+    if add_taken:
+        update["$addToSet"] = {"taken_courses": {"$each": list(dict.fromkeys(add_taken))}}
+    pull = {}
+    if remove_taken:
+        pull["taken_courses"] = {"$in": remove_taken}
+    if remove_current:
+        pull["current_courses"] = {"code": {"$in": remove_current}}
+    if pull:
+        update["$pull"] = pull
+    if add_current:
+        update["$push"] = {"current_courses": {"$each": add_current}}
+    return update
+
+async def patch_user(user_id: str, ops: list, revision: int = None):
+    """
+    Apply patch operations in one atomic update and return the new revision.
+    With `revision`, the update only applies if the stored revision still matches;
+    otherwise RevisionConflict is raised. Returns None if the user does not exist.
+    """
+    update = build_user_update(ops)
+    query = {"user_id": user_id}
+    if revision is not None:
+        # Users created before revisions existed have no field; treat that as 0
+        query["revision"] = revision if revision else {"$in": [0, None]}
+    doc = await db.users.find_one_and_update(
+        query, update, projection={"_id": 0, "revision": 1}, return_document=ReturnDocument.AFTER,
+    )
+    if doc is not None:
+        return doc["revision"]
+    current = await db.users.find_one({"user_id": user_id}, {"_id": 0, "revision": 1})
+    if current is None:
+        return None
+    raise RevisionConflict(current.get("revision", 0))
@@ -0,0 +1,175 @@
+"""
+Resolve location addresses to Google place ids (and coordinates) in bulk.
+
+Results are written onto the Location documents:
+
+    google_maps_place_id, lat, lng   the first Find Place candidate
+    place_address                    the normalized address they came from
+    place_status                     "resolved", "not_found" or "error"
+    place_resolved_at
+
+A location is resolved again only when it has no place id, or its address no
+longer matches `place_address`; "not_found" entries are skipped unless
+retry_failed is set. A not-found address also clears the location's old
+place id and coordinates, and a failed lookup keeps the previous
+`place_address`, so the next run tries again. Addresses are normalized and deduplicated first, and an
+address already resolved on another location is reused without a call. The
+remaining lookups run concurrently (bounded by GOOGLE_MAX_CONCURRENCY) and are
+paced by a token bucket at PLACES_RATE_PER_SEC.
+"""
+import asyncio
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from app.db import db
+from app.services import google_services
+from app.services.mongo_services import bump_catalog_version
+
+PLACES_RATE_PER_SEC = float(os.getenv("PLACES_RATE_PER_SEC", "10"))
+PLACES_MAX_RETRIES = int(os.getenv("PLACES_MAX_RETRIES", "2"))
+# Statuses worth another try after a pause
+RETRY_STATUSES = {"ERROR", "OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+
+def normalize_address(address):
+    """"1240 S.W. 108 AVE,  Miami" -> "1240 sw 108 ave miami" """
+    address = (address or "").lower().replace(".", "")
+    return " ".join(re.split(r"[\s,;]+", address)).strip()
+
+
+class RateLimiter:
+    """Token bucket: `rate` acquisitions per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def _lookup(address, limiter):
+    """(status, candidate) for one address, retrying quota/transport errors with backoff."""
+    for attempt in range(PLACES_MAX_RETRIES + 1):
+        await limiter.acquire()
+        status, candidate = await google_services.find_place(address)
+        if status not in RETRY_STATUSES or attempt == PLACES_MAX_RETRIES:
+            return status, candidate
+        await asyncio.sleep(2 ** attempt)
+
+
+async def resolve_addresses(addresses, rate=PLACES_RATE_PER_SEC):
+    """
+    {address: (status, candidate)} for distinct addresses, looked up concurrently.
+    A lookup that raises is reported as ("ERROR", None) for its address only.
+    """
+    limiter = RateLimiter(rate)
+    addresses = list(dict.fromkeys(addresses))
+    if addresses and not google_services.api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
+    results = await asyncio.gather(*(_lookup(a, limiter) for a in addresses), return_exceptions=True)
+    out = {}
+    for address, result in zip(addresses, results):
+        if isinstance(result, Exception):
+            print(f"Error resolving {address!r}: {result!r}")
+            result = ("ERROR", None)
+        out[address] = result
+    return out
+
+
+def _needs_resolving(doc, retry_failed):
+    key = normalize_address(doc.get("address"))
+    if not key:
+        return False
+    if doc.get("google_maps_place_id"):
+        # Manually entered ids have no place_address and are left alone
+        return doc.get("place_address") not in (None, key)
+    return retry_failed or doc.get("place_status") != "not_found" or doc.get("place_address") != key
+
+
+async def resolve_locations(codes=None, retry_failed=False, rate=PLACES_RATE_PER_SEC):
+    """
+    Resolve every location (or just `codes`) that needs it and store the
+    results. Returns a report of what was looked up, reused and written; the
+    caller refreshes in-memory state (refresh_after_import) when it wrote any.
+    """
+    started = time.perf_counter()
+    query = {"code": {"$in": list(codes)}} if codes else {}
+    docs = await db.locations.find(
+        query, {"_id": 0, "code": 1, "address": 1, "google_maps_place_id": 1, "lat": 1, "lng": 1,
+                "place_address": 1, "place_status": 1},
+    ).to_list(length=None)
+    pending = [d for d in docs if _needs_resolving(d, retry_failed)]
+    by_key = {}
+    for d in pending:
+        by_key.setdefault(normalize_address(d["address"]), []).append(d)
+
+    # Addresses some other location already resolved
+    known = {}
+    if by_key:
+        cursor = db.locations.find(
+            {"place_address": {"$in": list(by_key)}, "place_status": "resolved",
+             "google_maps_place_id": {"$nin": [None, ""]}},
+            {"_id": 0, "place_address": 1, "google_maps_place_id": 1, "lat": 1, "lng": 1},
+        )
+        for d in await cursor.to_list(length=None):
+            known[d["place_address"]] = ("OK", {"place_id": d["google_maps_place_id"],
+                                                "lat": d.get("lat"), "lng": d.get("lng")})
+
+    # One call per distinct normalized address, sent as the first original spelling
+    to_call = {key: group[0]["address"] for key, group in by_key.items() if key not in known}
+    looked_up = await resolve_addresses(to_call.values(), rate)
+    results = {**known, **{key: looked_up[address] for key, address in to_call.items()}}
+
+    now = datetime.now(timezone.utc)
+    ops, counts, dropped = [], {"resolved": 0, "not_found": 0, "error": 0}, 0
+    for key, group in by_key.items():
+        status, candidate = results[key]
+        update = {}
+        if candidate:
+            fields = {"google_maps_place_id": candidate["place_id"], "lat": candidate["lat"],
+                      "lng": candidate["lng"], "place_status": "resolved", "place_address": key}
+        elif status == "ZERO_RESULTS":
+            # The old id belonged to the old address; drop it so nothing routes to the wrong place
+            fields = {"place_status": "not_found", "place_address": key}
+            update["$unset"] = {"google_maps_place_id": "", "lat": "", "lng": ""}
+            dropped += sum(1 for d in group if d.get("google_maps_place_id"))
+        else:
+            # place_address is left behind, so the next run tries this address again
+            fields = {"place_status": "error"}
+        counts[fields["place_status"]] += len(group)
+        fields["place_resolved_at"] = now
+        update["$set"] = fields
+        ops.extend(UpdateOne({"code": d["code"]}, update) for d in group)
+
+    if ops:
+        await db.locations.bulk_write(ops, ordered=False)
+        if counts["resolved"] or dropped:
+            await bump_catalog_version()
+
+    seconds = time.perf_counter() - started
+    return {
+        "locations": len(docs),
+        "pending": len(pending),
+        "unique_addresses": len(by_key),
+        "reused": len(known),
+        "looked_up": len(to_call),
+        "written": len(ops),
+        **counts,
+        "seconds": round(seconds, 3),
+    }
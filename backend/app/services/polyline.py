@@ -0,0 +1,35 @@
+"""Google encoded polyline format, on points given as integer 1e-5 degrees."""
+
+
+def decode_polyline(encoded):
+    points, index, lat, lng = [], 0, 0, 0
+    while index < len(encoded):
+        for coord in range(2):
+            shift, result = 0, 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            delta = ~(result >> 1) if result & 1 else result >> 1
+            if coord == 0:
+                lat += delta
+            else:
+                lng += delta
+        points.append((lat, lng))
+    return points
+
+
+def encode_polyline(points):
+    out, prev_lat, prev_lng = [], 0, 0
+    for lat, lng in points:
+        for delta in (lat - prev_lat, lng - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lng = lat, lng
+    return "".join(out)
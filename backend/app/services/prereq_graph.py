@@ -0,0 +1,303 @@
+from collections import deque
+
+
+def normalize_code(code: str) -> str:
+    return (code or "").strip().upper().replace(" ", "")
+
+
+class PrereqGraph:
+    """
+    Course prerequisite DAG over the courses collection.
+
+    Each course's prereqs are a list of groups; "MAC 1140|MAC 1147" is one group
+    satisfied by either course. The transitive closure of courses each course
+    needs (not counting alternatives that could be skipped) is kept as one int
+    bitset of ancestor node ids, so eligibility and "what does this unlock"
+    are bit operations against a bitset of taken courses.
+    """
+
+    def __init__(self):
+        self.index = {}           # normalized code -> node id
+        self.codes = []           # node id -> display code
+        self.known = []           # node id -> True once the course itself was added
+        self.credits = []         # node id -> credits (0 if unknown)
+        self.prereq_groups = []   # node id -> [(raw string, bitset of alternatives)]
+        self.coreq_groups = []
+        self.parents = []         # node id -> bitset of direct prereq nodes
+        self.children = []        # node id -> set of direct dependents
+        self.ancestors = []       # node id -> bitset of every course it needs whichever alternatives are taken
+        self.depth = []           # node id -> longest prereq chain ending here (None if cyclic)
+        self.cyclic = set()
+
+    # ----------------- Building -----------------
+    @classmethod
+    def from_courses(cls, courses):
+        graph = cls()
+        for c in courses:
+            graph._set_course(c.get("code"), c.get("prereqs"), c.get("coreqs"), c.get("credits"))
+        graph._recompute(range(len(graph.codes)))
+        return graph
+
+    @classmethod
+    def from_prereq_map(cls, prereqs):
+        """{code: [prereq codes]} -> graph, for sample data."""
+        return cls.from_courses({"code": k, "prereqs": v} for k, v in prereqs.items())
+
+    def _node(self, code):
+        key = normalize_code(code)
+        idx = self.index.get(key)
+        if idx is None:
+            idx = len(self.codes)
+            self.index[key] = idx
+            self.codes.append(code.strip())
+            self.known.append(False)
+            self.credits.append(0)
+            self.prereq_groups.append([])
+            self.coreq_groups.append([])
+            self.parents.append(0)
+            self.children.append(set())
+            self.ancestors.append(0)
+            self.depth.append(0)
+        return idx
+
+    def _groups(self, raw_list):
+        groups = []
+        for raw in raw_list or []:
+            mask = 0
+            for alt in raw.split("|"):
+                if alt.strip():
+                    mask |= 1 << self._node(alt)
+            if mask:
+                groups.append((raw, mask))
+        return groups
+
+    def _set_course(self, code, prereqs, coreqs, credits=None):
+        idx = self._node(code)
+        self.codes[idx] = code.strip()
+        self.known[idx] = True
+        self.credits[idx] = int(credits or 0)
+        old_parents = self.parents[idx]
+        self.prereq_groups[idx] = self._groups(prereqs)
+        self.coreq_groups[idx] = self._groups(coreqs)
+        new_parents = 0
+        for _, mask in self.prereq_groups[idx]:
+            new_parents |= mask
+        self.parents[idx] = new_parents
+        for p in self._bits(old_parents & ~new_parents):
+            self.children[p].discard(idx)
+        for p in self._bits(new_parents):
+            self.children[p].add(idx)
+        return idx
+
+    def add_course(self, course):
+        """Insert or replace one course and recompute only it and its dependents."""
+        idx = self._set_course(course.get("code"), course.get("prereqs"), course.get("coreqs"), course.get("credits"))
+        affected = {idx}
+        queue = deque([idx])
+        while queue:
+            for child in self.children[queue.popleft()]:
+                if child not in affected:
+                    affected.add(child)
+                    queue.append(child)
+        self._recompute(affected)
+
+    def _recompute(self, nodes):
+        """Recompute closure and depth for `nodes`, whose outside parents are already final."""
+        nodes = set(nodes)
+        indegree = {n: sum(1 for p in self._bits(self.parents[n]) if p in nodes) for n in nodes}
+        queue = deque(n for n, d in indegree.items() if d == 0)
+        done = set()
+        while queue:
+            n = queue.popleft()
+            done.add(n)
+            depth = 0
+            for p in self._bits(self.parents[n]):
+                if self.depth[p] is None:
+                    depth = None
+                elif depth is not None:
+                    depth = max(depth, self.depth[p] + 1)
+            self.ancestors[n] = self._required_ancestors(n)
+            self.depth[n] = depth
+            # Behind a cycle through an outside parent: no depth, same as a full build
+            if depth is None:
+                self.cyclic.add(n)
+            else:
+                self.cyclic.discard(n)
+            for child in self.children[n]:
+                if child in indegree:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        queue.append(child)
+        # Whatever Kahn's algorithm could not order sits on or behind a cycle
+        for n in nodes - done:
+            self.cyclic.add(n)
+            # Closures on a cycle aren't final yet; follow single-course groups only
+            anc, seen = 0, {n}
+            stack = list(self._bits(self._single_prereqs(n)))
+            while stack:
+                p = stack.pop()
+                anc |= 1 << p
+                if p not in seen:
+                    seen.add(p)
+                    stack.extend(self._bits(self._single_prereqs(p)))
+            self.ancestors[n] = anc
+            self.depth[n] = None
+
+    def _required_ancestors(self, n):
+        """
+        Courses `n` needs whichever alternatives are taken: for each prereq
+        group, what every one of its alternatives (with its own ancestors) shares.
+        "A|B" alone adds neither A nor B, but a course both of them need.
+        """
+        anc = 0
+        for _, mask in self.prereq_groups[n]:
+            common = -1
+            for p in self._bits(mask):
+                common &= (1 << p) | self.ancestors[p]
+            anc |= common
+        return anc
+
+    def _single_prereqs(self, n):
+        mask = 0
+        for _, group in self.prereq_groups[n]:
+            if group & (group - 1) == 0:
+                mask |= group
+        return mask
+
+    # ----------------- Helpers -----------------
+    @staticmethod
+    def _bits(mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def _id(self, code):
+        return self.index.get(normalize_code(code))
+
+    def _names(self, mask):
+        return sorted(self.codes[i] for i in self._bits(mask))
+
+    def mask(self, codes):
+        """Bitset for a set of course codes; unknown codes are ignored."""
+        m = 0
+        for code in codes or []:
+            idx = self._id(code)
+            if idx is not None:
+                m |= 1 << idx
+        return m
+
+    def __contains__(self, code):
+        idx = self._id(code)
+        return idx is not None and self.known[idx]
+
+    def display_code(self, code):
+        """The graph's spelling of `code` ("cop2210" -> "COP 2210"); unknown codes come back as given."""
+        idx = self._id(code)
+        return self.codes[idx] if idx is not None else code
+
+    def course(self, code):
+        """
+        {code, credits, prereqs, coreqs} for a course that was added, with each
+        requirement group as a set of alternative codes; None otherwise.
+        """
+        idx = self._id(code)
+        if idx is None or not self.known[idx]:
+            return None
+        return {
+            "code": self.codes[idx],
+            "credits": self.credits[idx],
+            "prereqs": [set(self._names(mask)) for _, mask in self.prereq_groups[idx]],
+            "coreqs": [set(self._names(mask)) for _, mask in self.coreq_groups[idx]],
+        }
+
+    # ----------------- Queries -----------------
+    def missing_prereqs(self, code, taken_mask):
+        """Raw prereq groups of `code` not satisfied by the taken bitset."""
+        idx = self._id(code)
+        if idx is None:
+            return []
+        return [raw for raw, mask in self.prereq_groups[idx] if not mask & taken_mask]
+
+    def missing_coreqs(self, code, taken_mask):
+        idx = self._id(code)
+        if idx is None:
+            return []
+        return [raw for raw, mask in self.coreq_groups[idx] if not mask & taken_mask]
+
+    def is_eligible(self, code, taken_mask):
+        return not self.missing_prereqs(code, taken_mask)
+
+    def eligible(self, codes, taken_mask):
+        """Codes from `codes` not yet taken whose prereqs are all satisfied."""
+        out = []
+        for code in codes:
+            idx = self._id(code)
+            if idx is not None and taken_mask >> idx & 1:
+                continue
+            if self.is_eligible(code, taken_mask):
+                out.append(code)
+        return out
+
+    def all_prereqs(self, code):
+        idx = self._id(code)
+        return self._names(self.ancestors[idx]) if idx is not None else []
+
+    def unlocks(self, code, transitive=False):
+        """Courses that list `code` as a prereq directly, or (transitive) that can't be taken without it."""
+        idx = self._id(code)
+        if idx is None:
+            return []
+        if not transitive:
+            return sorted(self.codes[c] for c in self.children[idx])
+        bit = 1 << idx
+        return sorted(self.codes[n] for n, anc in enumerate(self.ancestors) if anc & bit)
+
+    def critical_path_length(self, code=None):
+        """Longest prerequisite chain (in courses) ending at `code`, or across the graph."""
+        if code is not None:
+            idx = self._id(code)
+            if idx is None or self.depth[idx] is None:
+                return None
+            return self.depth[idx] + 1
+        depths = [d for d in self.depth if d is not None]
+        return max(depths) + 1 if depths else 0
+
+    def topological_order(self):
+        """All acyclic courses ordered so every course follows its prereqs."""
+        order = [i for i in range(len(self.codes)) if i not in self.cyclic]
+        order.sort(key=lambda i: (self.depth[i], self.codes[i]))
+        return [self.codes[i] for i in order]
+
+    def cycles(self):
+        return sorted(self.codes[i] for i in self.cyclic)
+
+
+def eligibility_report(graph, taken, codes):
+    """Per-code eligibility for a list of taken course codes (the /prereqs/eligibility payload)."""
+    taken_mask = graph.mask(taken)
+    results = {
+        code: {
+            "eligible": graph.is_eligible(code, taken_mask),
+            "missing": graph.missing_prereqs(code, taken_mask),
+            "missing_coreqs": graph.missing_coreqs(code, taken_mask),
+        }
+        for code in codes
+    }
+    return {"results": results, "eligible": graph.eligible(codes, taken_mask)}
+
+
+prereq_graph = PrereqGraph()
+
+
+async def load_prereq_graph():
+    """Rebuild the graph from the courses collection."""
+    global prereq_graph
+    from app.db import db  # deferred so the agent tools can import the graph without Mongo
+    courses = await db.courses.find({}, {"_id": 0, "code": 1, "prereqs": 1, "coreqs": 1, "credits": 1}).to_list(length=None)
+    prereq_graph = PrereqGraph.from_courses(courses)
+    return prereq_graph
+
+
+def get_prereq_graph():
+    return prereq_graph
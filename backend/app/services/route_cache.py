@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, timezone
+
+from app.db import db
+from app.services import route_provider
+from app.services.cache import MISSING, route_cache
+from app.services.polyline import decode_polyline, encode_polyline
+
+# How long a persisted route stays in Mongo before the TTL monitor drops it
+ROUTE_CACHE_TTL = int(os.getenv("ROUTE_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def normalize_place_ids(location_list):
+    """[{"place_id": ...}, ...] -> ordered tuple of stripped place ids."""
+    return tuple(loc["place_id"].strip() for loc in location_list)
+
+
+def route_key(place_ids, mode=None):
+    mode = mode or route_provider.provider.mode
+    return "|".join((mode,) + tuple(place_ids))
+
+
+async def _load(key):
+    route = route_cache.get(key)
+    if route is not MISSING:
+        return route
+    doc = await db.route_cache.find_one({"key": key}, {"route": 1})
+    if not doc:
+        return None
+    route_cache.set(key, doc["route"])
+    return doc["route"]
+
+
+async def _store(key, place_ids, route):
+    route_cache.set(key, route)
+    await db.route_cache.replace_one(
+        {"key": key},
+        {
+            "key": key,
+            "mode": route_provider.provider.mode,
+            "place_ids": list(place_ids),
+            "route": route,
+            "created_at": datetime.now(timezone.utc),
+        },
+        upsert=True,
+    )
+
+
+def duration_seconds(duration):
+    """Routes API duration string ("754s", "12.5s") -> whole seconds; missing is 0."""
+    return int(float((duration or "0s").rstrip("s")))
+
+
+def _leg_routes(route):
+    """Split a multi-stop Google response into single-leg responses."""
+    legs = route["routes"][0].get("legs") or []
+    out = []
+    for leg in legs:
+        out.append({
+            "routes": [{
+                "duration": leg.get("staticDuration", "0s"),
+                "distanceMeters": leg.get("distanceMeters", 0),
+                "polyline": leg.get("polyline", {}),
+                "legs": [leg],
+            }]
+        })
+    return out
+
+
+def _single_leg(route):
+    """The one leg of a cached single-leg response, or None if it has none."""
+    routes = (route or {}).get("routes") or [{}]
+    legs = routes[0].get("legs") or []
+    return legs[0] if len(legs) == 1 else None
+
+
+def _assemble(legs):
+    """Join cached legs back into one multi-stop response."""
+    points = []
+    for leg in legs:
+        leg_points = decode_polyline((leg.get("polyline") or {}).get("encodedPolyline", ""))
+        # Each leg starts where the previous one ended
+        if points and leg_points and leg_points[0] == points[-1]:
+            leg_points = leg_points[1:]
+        points.extend(leg_points)
+    return {
+        "routes": [{
+            "duration": f"{sum(duration_seconds(leg.get('staticDuration')) for leg in legs)}s",
+            "distanceMeters": sum(leg.get("distanceMeters", 0) for leg in legs),
+            "polyline": {"encodedPolyline": encode_polyline(points)},
+            "legs": legs,
+        }]
+    }
+
+
+# ----------------- Public API -----------------
+async def get_route(location_list):
+    """
+    Cached drop-in for the route provider's get_route.
+    Checks memory, then Mongo, then tries to assemble the route from cached
+    per-leg results, and only calls the Routes API when a leg is missing.
+    """
+    place_ids = normalize_place_ids(location_list)
+    key = route_key(place_ids)
+    route = await _load(key)
+    if route is not None:
+        return route
+
+    legs = list(zip(place_ids, place_ids[1:]))
+    if len(legs) > 1:
+        # A cached pair without exactly one leg can't be reused; fetch the whole route instead
+        cached_legs = [_single_leg(await _load(route_key(leg))) for leg in legs]
+        if all(cached_legs):
+            route = _assemble(cached_legs)
+            await _store(key, place_ids, route)
+            return route
+
+    route = await route_provider.provider.get_route([{"place_id": pid} for pid in place_ids])
+    if not route or not route.get("routes"):
+        return route
+
+    await _store(key, place_ids, route)
+    leg_routes = _leg_routes(route)
+    if len(legs) > 1 and len(leg_routes) == len(legs):
+        # Backfill single legs so other sequences sharing them can be assembled
+        for leg, leg_route in zip(legs, leg_routes):
+            await _store(route_key(leg), leg, leg_route)
+    return route
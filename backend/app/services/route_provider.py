@@ -0,0 +1,212 @@
+"""
+Where routes come from.
+
+Everything that needs a route, a list of leg times or a walking matrix goes
+through `provider`, chosen with ROUTE_PROVIDER:
+
+    google     the Routes API (default)
+    local      straight walking legs between stored building coordinates
+               (Location.lat/lng), great-circle distance at WALKING_SPEED_MPS
+    synthetic  local, plus ROUTE_SYNTHETIC_LATENCY_MS (+/- JITTER) per call and
+               stable made-up coordinates for place ids without any, so route
+               endpoints can be load-tested with no API key or geodata
+
+Every provider returns the Routes API response shapes, and results are cached
+under the provider's `mode`, so local routes never mix with Google ones.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+
+from app.services import google_services
+from app.services.polyline import encode_polyline
+
+ROUTE_PROVIDER = os.getenv("ROUTE_PROVIDER", "google")
+WALKING_SPEED_MPS = float(os.getenv("WALKING_SPEED_MPS", "1.4"))
+ROUTE_SYNTHETIC_LATENCY_MS = float(os.getenv("ROUTE_SYNTHETIC_LATENCY_MS", "150"))
+ROUTE_SYNTHETIC_JITTER_MS = float(os.getenv("ROUTE_SYNTHETIC_JITTER_MS", "50"))
+# Synthetic coordinates are scattered within RADIUS_M of this point (FIU MMC)
+SYNTHETIC_CENTER = (25.7574, -80.3733)
+SYNTHETIC_RADIUS_M = 800
+
+EARTH_RADIUS_M = 6371000
+
+
+def great_circle_m(a, b):
+    """Haversine distance in meters between two (lat, lng) points."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+class GoogleRouteProvider:
+    name = "google"
+    mode = google_services.TRAVEL_MODE
+    max_matrix_side = google_services.ROUTE_MATRIX_MAX_SIDE
+
+    async def get_route(self, location_list):
+        return await google_services.get_route(location_list)
+
+    async def get_route_times(self, location_list):
+        return await google_services.get_route_times(location_list)
+
+    async def compute_route_matrix(self, origin_ids, destination_ids):
+        return await google_services.compute_route_matrix(origin_ids, destination_ids)
+
+    def invalidate(self):
+        pass
+
+    def describe(self):
+        return {"provider": self.name, "mode": self.mode}
+
+
+class LocalRouteProvider:
+    """
+    Walking legs as straight lines between building coordinates.
+    Place ids without coordinates are unroutable (the route is None and the
+    matrix pair is left out), unless `synthetic_coords` makes some up.
+    """
+    max_matrix_side = 1000
+
+    def __init__(self, speed_mps=WALKING_SPEED_MPS, latency_ms=0.0, jitter_ms=0.0, synthetic_coords=False):
+        self.name = "synthetic" if synthetic_coords or latency_ms else "local"
+        self.mode = f"{self.name.upper()}_{google_services.TRAVEL_MODE}"
+        self.speed_mps = speed_mps
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.synthetic_coords = synthetic_coords
+        self._coords = None  # place id -> (lat, lng)
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Locations changed; reload coordinates on the next call."""
+        self._coords = None
+
+    def describe(self):
+        return {
+            "provider": self.name,
+            "mode": self.mode,
+            "walking_speed_mps": self.speed_mps,
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "synthetic_coords": self.synthetic_coords,
+        }
+
+    async def _load_coords(self):
+        async with self._lock:
+            if self._coords is None:
+                from app.db import db
+                docs = await db.locations.find(
+                    {"google_maps_place_id": {"$nin": [None, ""]}, "lat": {"$ne": None}, "lng": {"$ne": None}},
+                    {"_id": 0, "google_maps_place_id": 1, "lat": 1, "lng": 1},
+                ).to_list(length=None)
+                self._coords = {d["google_maps_place_id"]: (d["lat"], d["lng"]) for d in docs}
+        return self._coords
+
+    @staticmethod
+    def _made_up(place_id):
+        """A stable point for `place_id` near SYNTHETIC_CENTER."""
+        digest = hashlib.sha1(place_id.encode()).digest()
+        angle = int.from_bytes(digest[:4], "big") / 2 ** 32 * 2 * math.pi
+        dist = math.sqrt(int.from_bytes(digest[4:8], "big") / 2 ** 32) * SYNTHETIC_RADIUS_M
+        lat0, lng0 = SYNTHETIC_CENTER
+        return (
+            lat0 + math.degrees(dist * math.cos(angle) / EARTH_RADIUS_M),
+            lng0 + math.degrees(dist * math.sin(angle) / (EARTH_RADIUS_M * math.cos(math.radians(lat0)))),
+        )
+
+    async def _points(self, place_ids):
+        coords = await self._load_coords()
+        points = []
+        for pid in place_ids:
+            point = coords.get(pid)
+            if point is None and self.synthetic_coords:
+                point = coords[pid] = self._made_up(pid)
+            points.append(point)
+        return points
+
+    async def _delay(self):
+        if self.latency_ms or self.jitter_ms:
+            ms = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(ms, 0) / 1000)
+
+    def _leg(self, a, b):
+        meters = round(great_circle_m(a, b))
+        return math.ceil(meters / self.speed_mps), meters
+
+    @staticmethod
+    def _e5(point):
+        return round(point[0] * 1e5), round(point[1] * 1e5)
+
+    async def get_route(self, location_list):
+        await self._delay()
+        points = await self._points([loc["place_id"] for loc in location_list])
+        if len(points) < 2 or None in points:
+            return None
+        legs = []
+        for a, b in zip(points, points[1:]):
+            seconds, meters = self._leg(a, b)
+            legs.append({
+                "staticDuration": f"{seconds}s",
+                "distanceMeters": meters,
+                "polyline": {"encodedPolyline": encode_polyline([self._e5(a), self._e5(b)])},
+            })
+        return {
+            "routes": [{
+                "duration": f"{sum(int(leg['staticDuration'][:-1]) for leg in legs)}s",
+                "distanceMeters": sum(leg["distanceMeters"] for leg in legs),
+                "polyline": {"encodedPolyline": encode_polyline([self._e5(p) for p in points])},
+                "legs": legs,
+            }]
+        }
+
+    async def get_route_times(self, location_list):
+        route = await self.get_route(location_list)
+        if route is None:
+            return None
+        return {"routes": [{"legs": [{"duration": leg["staticDuration"]} for leg in route["routes"][0]["legs"]]}]}
+
+    async def compute_route_matrix(self, origin_ids, destination_ids):
+        await self._delay()
+        origins = await self._points(origin_ids)
+        destinations = await self._points(destination_ids)
+        elements = []
+        for i, a in enumerate(origins):
+            for j, b in enumerate(destinations):
+                if a is None or b is None:
+                    continue
+                seconds, meters = self._leg(a, b)
+                elements.append({
+                    "originIndex": i,
+                    "destinationIndex": j,
+                    "duration": f"{seconds}s",
+                    "distanceMeters": meters,
+                    "condition": "ROUTE_EXISTS",
+                })
+        return elements
+
+
+def make_provider(name):
+    if name == "google":
+        return GoogleRouteProvider()
+    if name == "local":
+        return LocalRouteProvider()
+    if name == "synthetic":
+        return LocalRouteProvider(
+            latency_ms=ROUTE_SYNTHETIC_LATENCY_MS,
+            jitter_ms=ROUTE_SYNTHETIC_JITTER_MS,
+            synthetic_coords=True,
+        )
+    raise ValueError(f"Unknown route provider: {name}")
+
+
+provider = make_provider(ROUTE_PROVIDER)
+
+
+def set_provider(new_provider):
+    """Swap the process-wide provider (benchmarks, tests). Accepts a name or an instance."""
+    global provider
+    provider = make_provider(new_provider) if isinstance(new_provider, str) else new_provider
+    return provider
@@ -0,0 +1,174 @@
+"""
+Compact schedule encoding.
+
+Each day of a user's schedule is kept as a 288-bit bitmap of five-minute
+slots (stored as a 72-character hex string), the blocks as [start, end) slot
+pairs and a parallel array of location codes:
+
+    schedule_bits.mon = {"bits": "00..ff..", "blocks": [[120, 135]], "locations": ["PG6"]}
+
+It is stored next to the verbose `schedule` field and rewritten whenever a
+day changes, so conflict and free-time checks are bit operations on ints
+instead of walks over nested Block/Location dicts.
+"""
+import re
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_LETTERS = "MTWRFSU"  # same order as DAYS
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_HEX_WIDTH = SLOTS_PER_DAY // 4
+
+
+def slot_range(start: int, end: int):
+    """Minutes [start, end) -> slot indexes [first, last), rounding outwards."""
+    return start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+
+
+def slot_mask(start: int, end: int) -> int:
+    first, last = slot_range(start, end)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def to_minutes(value) -> int:
+    """"HH:MM", "HH:MM:SS" or a datetime.time -> minutes after midnight."""
+    if hasattr(value, "hour"):
+        return value.hour * 60 + value.minute
+    h, m = str(value).strip().split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+def _day_token(token: str) -> list:
+    """One word -> day indexes: a day name or abbreviation ("Tu", "Thurs"), else day letters ("MWF")."""
+    letters = all(ch in DAY_LETTERS for ch in token.upper())
+    if len(token) > 1 and not (letters and token.isupper()):
+        for i, name in enumerate(DAY_NAMES):
+            if name.startswith(token.lower()):
+                return [i]
+    # Anything else that is not all day letters ("TBA") is not a day
+    return [DAY_LETTERS.index(ch) for ch in token.upper()] if letters else []
+
+
+def parse_days(days) -> list:
+    """["MW"], "TR", ["M", "Th"], "TuTh", "Fri" -> sorted day indexes (M=0 ... U=6)."""
+    if isinstance(days, str):
+        days = [days]
+    found = set()
+    for part in days or []:
+        # "MWTh" -> "MW", "Th"; all-caps runs stay whole so "THU" is a name, "TR" letters
+        for token in re.findall(r"[A-Z]{2,}(?![a-z])|[A-Z]?[a-z]+|[A-Z]", str(part)):
+            found.update(_day_token(token))
+    return sorted(found)
+
+
+def encode_day(blocks) -> dict:
+    """Verbose blocks ({start_time, end_time, location}) -> compact day entry."""
+    bits, pairs, locations = 0, [], []
+    for block in sorted(blocks or [], key=lambda b: to_minutes(b["start_time"])):
+        start, end = to_minutes(block["start_time"]), to_minutes(block["end_time"])
+        bits |= slot_mask(start, end)
+        pairs.append(list(slot_range(start, end)))
+        locations.append((block.get("location") or {}).get("code"))
+    return {"bits": format(bits, f"0{_HEX_WIDTH}x"), "blocks": pairs, "locations": locations}
+
+
+def encode_schedule(schedule) -> dict:
+    schedule = schedule or {}
+    return {day: encode_day(schedule.get(day)) for day in DAYS}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class WeekBits:
+    """Decoded compact schedule: one int bitmap per day plus blocks and locations."""
+
+    def __init__(self, days):
+        self.bits = [int(d.get("bits") or "0", 16) for d in days]
+        self.blocks = [[tuple(b) for b in d.get("blocks") or []] for d in days]
+        self.locations = [list(d.get("locations") or []) for d in days]
+
+    @classmethod
+    def from_compact(cls, compact: dict):
+        return cls([compact.get(day) or {} for day in DAYS])
+
+    @classmethod
+    def from_schedule(cls, schedule: dict):
+        return cls.from_compact(encode_schedule(schedule))
+
+    @classmethod
+    def for_user(cls, user: dict):
+        """Uses the stored encoding; days saved before it existed are encoded on the fly."""
+        compact = user.get("schedule_bits") or {}
+        schedule = user.get("schedule") or {}
+        return cls([compact.get(day) or encode_day(schedule.get(day)) for day in DAYS])
+
+    @staticmethod
+    def day_index(day) -> int:
+        """0..6, "mon", "Tuesday", "thurs" or one day letter ("R") -> day index; ValueError otherwise."""
+        if isinstance(day, int):
+            if 0 <= day < len(DAYS):
+                return day
+        else:
+            name = day.strip().lower()
+            if len(name) == 1 and name.upper() in DAY_LETTERS:
+                return DAY_LETTERS.index(name.upper())
+            if len(name) >= 3:
+                for i, full in enumerate(DAY_NAMES):
+                    if full.startswith(name):
+                        return i
+        raise ValueError(f"Invalid day: {day!r}")
+
+    def week_mask(self) -> int:
+        """All seven days as one 7 x 288-bit int, Monday in the low bits."""
+        mask = 0
+        for i, bits in enumerate(self.bits):
+            mask |= bits << (i * SLOTS_PER_DAY)
+        return mask
+
+    def conflicts(self, day, start: int, end: int) -> bool:
+        return bool(self.bits[self.day_index(day)] & slot_mask(start, end))
+
+    def conflicting_blocks(self, day, start: int, end: int) -> list:
+        i = self.day_index(day)
+        first, last = slot_range(start, end)
+        return [
+            {"start": _hhmm(s * SLOT_MINUTES), "end": _hhmm(e * SLOT_MINUTES), "location": loc}
+            for (s, e), loc in zip(self.blocks[i], self.locations[i])
+            if s < last and first < e
+        ]
+
+    def free_time(self, day, min_minutes: int = 0, start: int = 0, end: int = 24 * 60) -> list:
+        """Free [start, end) intervals in minutes on `day`, at least `min_minutes` long."""
+        busy = self.bits[self.day_index(day)]
+        first, last = slot_range(start, end)
+        free, run_start = [], None
+        for slot in range(first, last + 1):
+            is_free = slot < last and not busy >> slot & 1
+            if is_free and run_start is None:
+                run_start = slot
+            elif not is_free and run_start is not None:
+                lo, hi = max(run_start * SLOT_MINUTES, start), min(slot * SLOT_MINUTES, end)
+                if hi - lo >= max(min_minutes, 1):
+                    free.append((lo, hi))
+                run_start = None
+        return free
+
+    def neighbours(self, day, start: int, end: int):
+        """(location before, location after) for a slot range: the blocks ending/starting closest to it."""
+        i = self.day_index(day)
+        first, last = slot_range(start, end)
+        before = after = None
+        for (s, e), loc in zip(self.blocks[i], self.locations[i]):
+            if e <= first and (before is None or e > before[0]):
+                before = (e, loc)
+            if s >= last and (after is None or s < after[0]):
+                after = (s, loc)
+        return (
+            (before[0] * SLOT_MINUTES, before[1]) if before else None,
+            (after[0] * SLOT_MINUTES, after[1]) if after else None,
+        )
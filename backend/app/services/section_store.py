@@ -0,0 +1,149 @@
+from bisect import bisect_left, insort
+
+from app.db import db
+from app.services.schedule_bits import DAY_LETTERS, SLOTS_PER_DAY, parse_days, slot_mask, to_minutes
+
+
+def normalize_code(code: str) -> str:
+    return (code or "").strip().upper().replace(" ", "")
+
+
+class _DayIndex:
+    """Meeting intervals for one (term, day), sorted by start time."""
+
+    def __init__(self):
+        self.starts = []  # sorted (start, end, section id)
+        self.max_duration = 0
+
+    def add(self, start, end, sid, keep_sorted=True):
+        if keep_sorted:
+            insort(self.starts, (start, end, sid))
+        else:
+            self.starts.append((start, end, sid))
+        self.max_duration = max(self.max_duration, end - start)
+
+    def overlapping(self, lo, hi):
+        """Ids meeting at any point in [lo, hi)."""
+        # Nothing starting before lo - max_duration can still be running at lo
+        i = bisect_left(self.starts, (lo - self.max_duration,))
+        j = bisect_left(self.starts, (hi,))
+        return {sid for start, end, sid in self.starts[i:j] if end > lo}
+
+
+class SectionStore:
+    """
+    In-memory section index.
+    term -> campus -> course -> [section ids], plus a per-(term, day)
+    interval index on meeting times.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.meta = {}  # id -> (start minute, end minute, meeting days)
+        self.masks = {}  # id -> week bitmask of occupied 5-minute slots (see schedule_bits)
+        self.by_term = {}
+        self.by_day = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.sections)
+
+    def terms(self):
+        """{term: number of sections}"""
+        return {
+            term: sum(len(ids) for courses in campuses.values() for ids in courses.values())
+            for term, campuses in self.by_term.items()
+        }
+
+    def add(self, section: dict, keep_sorted=True):
+        sid = self._next_id
+        self._next_id += 1
+        self.sections[sid] = section
+        term = section["term"].strip()
+        course = normalize_code(section["course"])
+        (self.by_term.setdefault(term, {})
+            .setdefault(section.get("campus"), {})
+            .setdefault(course, [])
+            .append(sid))
+        start, end = to_minutes(section["start"]), to_minutes(section["end"])
+        indexes = parse_days(section.get("days"))
+        days = [DAY_LETTERS[i] for i in indexes]
+        self.meta[sid] = (start, end, frozenset(days))
+        day_mask = slot_mask(start, end)
+        self.masks[sid] = sum(day_mask << (i * SLOTS_PER_DAY) for i in indexes)
+        for day in days:
+            self.by_day.setdefault((term, day), _DayIndex()).add(start, end, sid, keep_sorted)
+        return sid
+
+    def extend(self, sections):
+        """Bulk add, sorting each day index once at the end."""
+        for section in sections:
+            self.add(section, keep_sorted=False)
+        for index in self.by_day.values():
+            index.starts.sort()
+
+    def query(self, term, campuses=None, courses=None, days=None,
+              start_after=None, end_before=None, avoid=None):
+        """
+        Sections for a term, optionally narrowed by campus, course, meeting days,
+        a time window every meeting must fit in, and (day, start, end) blocks
+        the section must not overlap.
+        """
+        return [self.sections[i] for i in self.query_ids(term, campuses, courses, days,
+                                                         start_after, end_before, avoid)]
+
+    def query_ids(self, term, campuses=None, courses=None, days=None,
+                  start_after=None, end_before=None, avoid=None):
+        """Like query, but returns section ids (keys into sections, meta and masks)."""
+        campus_index = self.by_term.get((term or "").strip(), {})
+        campus_keys = campuses if campuses else list(campus_index)
+        ids = []
+        for campus in campus_keys:
+            course_index = campus_index.get(campus, {})
+            if courses:
+                for code in {normalize_code(c) for c in courses}:
+                    ids.extend(course_index.get(code, ()))
+            else:
+                for course_ids in course_index.values():
+                    ids.extend(course_ids)
+        if not ids:
+            return []
+
+        term = term.strip()
+        if days:
+            wanted = {DAY_LETTERS[i] for i in parse_days(days)}
+            ids = [i for i in ids if self.meta[i][2] <= wanted]
+        if start_after is not None or end_before is not None:
+            lo = to_minutes(start_after) if start_after else 0
+            hi = to_minutes(end_before) if end_before else 24 * 60
+            ids = [i for i in ids if self.meta[i][0] >= lo and self.meta[i][1] <= hi]
+        if avoid:
+            clash = set()
+            for day, start, end in avoid:
+                clash |= self.meeting_during(term, day, start, end)
+            ids = [i for i in ids if i not in clash]
+        return sorted(ids)
+
+
+    def meeting_during(self, term, day, start, end):
+        """Ids of every section in the term that meets on `day` during [start, end)."""
+        index = self.by_day.get(((term or "").strip(), day))
+        if not index:
+            return set()
+        return index.overlapping(to_minutes(start), to_minutes(end))
+
+
+section_store = SectionStore()
+
+
+async def load_section_store():
+    """Rebuild the in-memory index from the sections collection."""
+    global section_store
+    store = SectionStore()
+    store.extend(await db.sections.find({}, {"_id": 0}).to_list(length=None))
+    section_store = store
+    return store
+
+
+def get_section_store():
+    return section_store
@@ -0,0 +1,181 @@
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.db import db
+from app.services import route_provider
+
+# Marks a pair that has not been computed (or that Google could not route)
+UNKNOWN = -1
+
+class WalkingMatrix:
+    """Pairwise walking durations (seconds) and distances (meters) between place ids."""
+
+    def __init__(self, place_ids=(), durations=None, distances=None):
+        self.place_ids = list(place_ids)
+        self.index = {pid: i for i, pid in enumerate(self.place_ids)}
+        n = len(self.place_ids)
+        self.durations = self._as_matrix(durations, n)
+        self.distances = self._as_matrix(distances, n)
+
+    @staticmethod
+    def _as_matrix(values, n):
+        if values is None or n == 0:
+            m = np.full((n, n), UNKNOWN, dtype=np.int32)
+            np.fill_diagonal(m, 0)
+            return m
+        return np.asarray(values, dtype=np.int32).reshape(n, n)
+
+    def leg(self, origin, destination):
+        """(duration_s, distance_m) for one leg, or None if it is not known."""
+        i, j = self.index.get(origin), self.index.get(destination)
+        if i is None or j is None or self.durations[i, j] == UNKNOWN:
+            return None
+        return int(self.durations[i, j]), int(self.distances[i, j])
+
+    def route_times(self, place_ids):
+        """
+        Answer a get_route_times request from the matrix.
+        Returns the same shape as the Routes API response, or None if any leg is unknown.
+        """
+        legs = []
+        for origin, destination in zip(place_ids, place_ids[1:]):
+            leg = self.leg(origin, destination)
+            if leg is None:
+                return None
+            legs.append({"duration": f"{leg[0]}s"})
+        return {"routes": [{"legs": legs}]}
+
+    def unfilled(self, place_ids):
+        """
+        (origins, destinations) among `place_ids` whose rows / columns still
+        hold UNKNOWN pairs, e.g. from a matrix block that failed.
+        """
+        if not place_ids:
+            return [], []
+        idx = np.array([self.index[pid] for pid in place_ids])
+        unknown = self.durations[np.ix_(idx, idx)] == UNKNOWN
+        rows = [place_ids[i] for i in np.flatnonzero(unknown.any(axis=1))]
+        cols = [place_ids[j] for j in np.flatnonzero(unknown.any(axis=0))]
+        return rows, cols
+
+    def resized(self, place_ids):
+        """Copy onto a new set of place ids, keeping every pair both sets share."""
+        other = WalkingMatrix(place_ids)
+        keep = [pid for pid in place_ids if pid in self.index]
+        if keep:
+            src = np.array([self.index[pid] for pid in keep])
+            dst = np.array([other.index[pid] for pid in keep])
+            other.durations[np.ix_(dst, dst)] = self.durations[np.ix_(src, src)]
+            other.distances[np.ix_(dst, dst)] = self.distances[np.ix_(src, src)]
+        return other
+
+    def to_doc(self):
+        return {
+            "_id": route_provider.provider.mode,
+            "place_ids": self.place_ids,
+            "durations": self.durations.ravel().tolist(),
+            "distances": self.distances.ravel().tolist(),
+            "updated_at": datetime.now(timezone.utc),
+        }
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc["place_ids"], doc["durations"], doc["distances"])
+
+
+matrix = WalkingMatrix()
+_refresh_lock = asyncio.Lock()
+_refresh_task = None
+_refresh_pending = False
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def _fill(m, origins, destinations):
+    """Fetch every origin x destination block from the route provider into `m`."""
+    side = route_provider.provider.max_matrix_side
+    blocks = [
+        (o, d)
+        for o in _chunks(origins, side)
+        for d in _chunks(destinations, side)
+    ]
+    results = await asyncio.gather(
+        *(route_provider.provider.compute_route_matrix(o, d) for o, d in blocks)
+    )
+    for (o, d), elements in zip(blocks, results):
+        for el in elements or []:
+            if el.get("condition") != "ROUTE_EXISTS":
+                continue
+            i = m.index[o[el["originIndex"]]]
+            j = m.index[d[el["destinationIndex"]]]
+            m.durations[i, j] = int(el.get("duration", "0s").rstrip("s"))
+            m.distances[i, j] = el.get("distanceMeters", 0)
+
+
+async def load_walking_matrix():
+    global matrix
+    doc = await db.walking_matrix.find_one({"_id": route_provider.provider.mode})
+    matrix = WalkingMatrix.from_doc(doc) if doc else WalkingMatrix()
+    return matrix
+
+
+async def refresh_walking_matrix():
+    """
+    Bring the matrix in line with the locations collection.
+    Only rows and columns for place ids that are new since the last run are fetched,
+    plus pairs an earlier run left unknown (a failed block, or no route found);
+    ids that no longer belong to a location are dropped.
+    """
+    global matrix
+    async with _refresh_lock:
+        cursor = db.locations.find(
+            {"google_maps_place_id": {"$nin": [None, ""]}},
+            {"google_maps_place_id": 1},
+        )
+        place_ids = sorted({doc["google_maps_place_id"] for doc in await cursor.to_list(length=None)})
+        new_ids = [pid for pid in place_ids if pid not in matrix.index]
+        retry_rows, retry_cols = matrix.unfilled([pid for pid in place_ids if pid in matrix.index])
+        if not new_ids and not retry_rows and len(place_ids) == len(matrix.place_ids):
+            return matrix
+
+        m = matrix.resized(place_ids)
+        if retry_rows:
+            await _fill(m, retry_rows, retry_cols)
+        if new_ids:
+            # New rows against everything, then old origins against the new columns
+            await _fill(m, new_ids, place_ids)
+            new_set = set(new_ids)
+            old_ids = [pid for pid in place_ids if pid not in new_set]
+            if old_ids:
+                await _fill(m, old_ids, new_ids)
+
+        await db.walking_matrix.replace_one({"_id": route_provider.provider.mode}, m.to_doc(), upsert=True)
+        matrix = m
+        return matrix
+
+
+def _report_refresh(task):
+    if not task.cancelled() and task.exception():
+        print(f"Walking matrix refresh failed: {task.exception()}")
+
+
+async def _refresh_loop():
+    global _refresh_pending
+    # Requests that arrive mid-refresh are folded into one more pass
+    while _refresh_pending:
+        _refresh_pending = False
+        await refresh_walking_matrix()
+
+
+def schedule_walking_matrix_refresh():
+    """Queue a background refresh, coalescing with one that is already running."""
+    global _refresh_task, _refresh_pending
+    _refresh_pending = True
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop())
+        _refresh_task.add_done_callback(_report_refresh)
+    return _refresh_task
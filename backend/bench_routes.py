@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Load-test the /api/route/* endpoints and report latency percentiles and
+throughput per route provider and endpoint.
+
+Examples:
+    python bench_routes.py --provider synthetic
+    python bench_routes.py --provider local synthetic --requests 2000 --concurrency 50
+    python bench_routes.py --api http://127.0.0.1:8000/api --endpoint get_route
+
+By default the app runs in-process (over an ASGI transport, still backed by
+MongoDB) once per --provider, so providers can be compared in one run without
+restarting anything; "google" needs GOOGLE_API_KEY and spends quota. With
+--api a running server is benchmarked with whatever ROUTE_PROVIDER it uses.
+
+Requests are random 2..--max-stops stop sequences drawn from the location
+place ids (or --place-ids), with a fixed --seed, so repeated sequences hit the
+route cache as they would in real use.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import quote
+
+import httpx
+
+ENDPOINTS = {
+    "get_route": lambda ids: "/route/get_route?" + "&".join(f"place_id_list={quote(pid)}" for pid in ids),
+    "get_route_json": lambda ids: "/route/get_route/" + quote(json.dumps([{"place_id": pid} for pid in ids])),
+    "travel_time": lambda ids: "/route/get_route_travel_time" + quote(",".join(ids), safe=","),
+}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def make_sequences(place_ids, count, max_stops, seed):
+    rng = random.Random(seed)
+    sequences = []
+    for _ in range(count):
+        stops, length = [rng.choice(place_ids)], rng.randint(2, max_stops)
+        while len(stops) < length:
+            pid = rng.choice(place_ids)
+            if pid != stops[-1]:
+                stops.append(pid)
+        sequences.append(stops)
+    return sequences
+
+
+async def fetch_place_ids(client):
+    place_ids, cursor = [], None
+    while True:
+        params = {"limit": 1000, **({"after": cursor} if cursor else {})}
+        r = await client.get("/locations", params=params)
+        r.raise_for_status()
+        page = r.json()
+        place_ids += [loc["id"] for loc in page["items"] if loc.get("id")]
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return sorted(set(place_ids))
+
+
+async def run(client, paths, concurrency):
+    """Issue every path with `concurrency` requests in flight; returns (latencies_ms, statuses, seconds)."""
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies, statuses = [], Counter()
+
+    async def worker():
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                r = await client.get(path)
+                # A 200 with a null body is an unroutable sequence
+                statuses["null" if r.status_code == 200 and r.content == b"null" else r.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies), statuses, time.perf_counter() - start
+
+
+def print_row(provider, endpoint, latencies, statuses, seconds, extra=""):
+    print(f"{provider:<10} {endpoint:<15} {len(latencies):>6} "
+          f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f} "
+          f"{len(latencies) / seconds if seconds else 0:>9.1f}  "
+          + " ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)) + extra)
+
+
+async def bench(client, provider, args, place_ids, hit_counter=None):
+    if len(set(place_ids)) < 2:
+        print(f"{provider:<10} skipped: need at least two place ids")
+        return
+    sequences = make_sequences(place_ids, args.requests, args.max_stops, args.seed)
+    for endpoint in args.endpoint:
+        build = ENDPOINTS[endpoint]
+        if args.warmup:
+            await run(client, [build(s) for s in sequences[:args.warmup]], args.concurrency)
+        before = hit_counter() if hit_counter else None
+        latencies, statuses, seconds = await run(client, [build(s) for s in sequences], args.concurrency)
+        extra = ""
+        if hit_counter:
+            hits, misses = (a - b for a, b in zip(hit_counter(), before))
+            extra = f"  route_cache hits={hits} misses={misses}"
+        print_row(provider, endpoint, latencies, statuses, seconds, extra)
+
+
+async def bench_in_process(args):
+    from app.main import app
+    from app.services import google_services, route_provider, walking_matrix
+    from app.services.cache import route_cache
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench/api", timeout=60) as client:
+        place_ids = args.place_ids or await fetch_place_ids(client)
+        for name in args.provider:
+            route_provider.set_provider(name)
+            await walking_matrix.load_walking_matrix()
+            route_cache.invalidate()
+            ids = place_ids or [f"bench-place-{i}" for i in range(50)]
+            if not place_ids and name != "synthetic":
+                print(f"{name:<10} skipped: no locations with place ids")
+                continue
+            await bench(client, name, args, ids, lambda: (route_cache.hits, route_cache.misses))
+    await google_services.close_client()
+
+
+async def bench_api(args):
+    async with httpx.AsyncClient(base_url=args.api, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        provider = (await client.get("/route/provider")).json().get("provider", "server")
+        place_ids = args.place_ids or await fetch_place_ids(client)
+        await bench(client, provider, args, place_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", nargs="+", default=["synthetic"], choices=["google", "local", "synthetic"],
+                        help="providers to run in-process, one after another")
+    parser.add_argument("--api", help="benchmark a running server at this API base URL instead")
+    parser.add_argument("--endpoint", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per provider and endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=0, help="requests to send (and ignore) before measuring")
+    parser.add_argument("--max-stops", type=int, default=5)
+    parser.add_argument("--place-ids", nargs="+", help="default: every location's place id")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'provider':<10} {'endpoint':<15} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9}  status")
+    asyncio.run(bench_api(args) if args.api else bench_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
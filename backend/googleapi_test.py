@@ -1,4 +1,4 @@
-from xml.etree.ElementTree import tostring
+import asyncio
 import requests
 import os
 from dotenv import load_dotenv
@@ -47,10 +47,10 @@ def main():
     # route_info = google_api.get_route([{"place_id": "ChIJbWv74i-_2YgRqsagPWgY2Qs"}, {"place_id": "ChIJh1r4NS6_2YgR-jjbTyCaHZI"}])
     # print (route_info)
     print()
-    print(google_services.get_route([
+    print(asyncio.run(google_services.get_route([
         {"place_id": "ChIJo6bEHZq_2YgRGzXukZLjhIs"},
         {"place_id": "ChIJhQ84ooC_2YgRwg5aW-ElL28"},
         {"place_id": "ChIJxZbHujq_2YgRdqaxvf4LcBQ"}
-        ]))
+        ])))
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Bulk-load courses, majors, locations and sections from JSON or JSONL files, or courses
+from catalog text.
+
+Examples:
+    python import_catalog.py catalog.json
+    python import_catalog.py courses.jsonl --kind courses
+    python import_catalog.py "../course catalog.txt"
+    python import_catalog.py catalog.json --api http://127.0.0.1:8000/api
+    python import_catalog.py new_campus_locations.json --kind locations --resolve-places
+
+Catalog text (.txt, or --format catalog) is streamed line by line and
+upserted in batches of --chunk-size, so large catalogs load in bounded memory.
+By default records are written straight to MongoDB. With --api the file is
+sent to POST /api/admin/import instead, so the running server refreshes its
+caches right away.
+With --resolve-places, locations that have an address but no place id are
+then looked up in one rate-limited batch (see app/services/place_resolver.py).
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import requests
+
+from app.services.bulk_import import DEFAULT_CHUNK_SIZE, IMPORT_KINDS, parse_payload, import_payload
+from app.services.catalog_parser import import_catalog
+from app.services.place_resolver import resolve_locations
+
+
+def print_report(report):
+    print(f"{report['kind']}: {report['received']} received, {report['written']} written "
+          f"({report['upserted']} new, {report['modified']} changed), {report['invalid']} invalid, "
+          f"{report['duplicates']} duplicates in {report['seconds']}s "
+          f"({report['records_per_second']} records/s)")
+    for err in report["errors"]:
+        print(f"  #{err['index']} {err['key']}: {err['error']}")
+
+
+def guess_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".txt":
+        return "catalog"
+    return "json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="JSON, JSONL or catalog text files")
+    parser.add_argument("--kind", choices=sorted(IMPORT_KINDS),
+                        help="record kind for a plain list / lines without a kind field")
+    parser.add_argument("--format", choices=["json", "jsonl", "catalog"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--api", help="backend API base URL; import through the server instead of MongoDB")
+    parser.add_argument("--resolve-places", action="store_true",
+                        help="afterwards, look up place ids for locations that have an address but no place id")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.paths:
+        fmt = args.format or guess_format(path)
+        print(f"== {path}")
+        if fmt == "catalog" and not args.api:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                reports = [asyncio.run(import_catalog(f, args.chunk_size))]
+        elif args.api:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            r = requests.post(
+                f"{args.api}/admin/import",
+                params={"kind": args.kind, "format": fmt, "chunk_size": args.chunk_size},
+                data=text.encode("utf-8"),
+            )
+            if r.status_code != 200:
+                print("Error:", r.status_code, r.text)
+                failed = True
+                continue
+            reports = r.json()["imports"]
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            reports = asyncio.run(import_payload(parse_payload(text, fmt, args.kind), args.chunk_size))
+        for report in reports:
+            print_report(report)
+            failed = failed or bool(report["errors"])
+
+    if args.resolve_places:
+        print("== resolving location place ids")
+        if args.api:
+            r = requests.post(f"{args.api}/admin/resolve-locations")
+            if r.status_code != 200:
+                print("Error:", r.status_code, r.text)
+                sys.exit(1)
+            report = r.json()
+        else:
+            report = asyncio.run(resolve_locations())
+        print(f"{report['pending']} pending, {report['unique_addresses']} distinct addresses, "
+              f"{report['reused']} reused, {report['looked_up']} looked up: {report['resolved']} resolved, "
+              f"{report['not_found']} not found, {report['error']} errors in {report['seconds']}s")
+        if report["written"] and not args.api:
+            # Written straight to MongoDB: a running server still has the old walking matrix
+            print("Note: restart the server, or resolve with --api, so it rebuilds its walking matrix.")
+        failed = failed or bool(report["error"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# panther_agent/data_access.py
+"""
+Where the agent tools get their data.
+
+"direct" reads MongoDB in-process through the backend's Motor client and
+service layer, so a tool call costs a Mongo query (often a cache hit) instead
+of a loopback HTTP request. "http" talks to the FastAPI server through one
+pooled AsyncClient and is the option for deployments where the agent runs
+apart from the backend. The default, "auto", uses direct access when the
+backend package can be imported; nothing else in panther_agent imports `app`.
+
+The direct source runs in the agent process, so it has its own copies of the
+backend's catalog caches, section index and walking matrix. It compares the
+catalog version in `meta` before each catalog read (inside a cached tool call,
+the version the tool cache already fetched) and drops those copies when the
+backend has written since; the section index and walking matrix are also
+reloaded every PANTHER_SECTION_RELOAD_SECONDS.
+"""
+import contextvars
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000/api")
+DATA_SOURCE = os.getenv("PANTHER_DATA_SOURCE", "auto").lower()
+HTTP_TIMEOUT = float(os.getenv("PANTHER_HTTP_TIMEOUT", "10"))
+SECTION_RELOAD_SECONDS = float(os.getenv("PANTHER_SECTION_RELOAD_SECONDS", "300"))
+
+# Versions the tool cache fetched for the tool call in progress:
+# {"catalog": n, "users": {user_id: revision}}, or None outside a cached call
+call_versions: contextvars.ContextVar = contextvars.ContextVar("panther_tool_versions", default=None)
+
+# What a data source raises when the backend or database can't be reached
+SOURCE_ERRORS = (httpx.HTTPError, OSError)
+try:
+    from pymongo.errors import PyMongoError
+    SOURCE_ERRORS += (PyMongoError,)
+except ImportError:
+    pass
+
+
+class HttpDataSource:
+    """Backend REST API over a single keep-alive client."""
+
+    name = "http"
+
+    def __init__(self, base: str = API_BASE):
+        self.base = base
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def _get(self, path: str, params: Dict[str, Any] = None) -> Any:
+        r = await self.client.get(path, params=params)
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json()
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Any:
+        r = await self.client.post(path, json=payload)
+        r.raise_for_status()
+        return r.json()
+
+    async def get_course(self, code: str) -> Optional[Dict[str, Any]]:
+        return await self._get(f"/courses/{code}")
+
+    async def get_courses(self, codes: List[str]) -> Dict[str, Any]:
+        return await self._post("/courses:batch", {"codes": codes})
+
+    async def get_major(self, major_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get(f"/majors/{major_id}")
+
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get(f"/users/{user_id}")
+
+    async def eligibility(self, taken: List[str], codes: List[str]) -> Dict[str, Any]:
+        return await self._post("/prereqs/eligibility", {"taken": taken, "codes": codes})
+
+    async def sections(self, term: str, campuses: List[str], courses: List[str]) -> List[Dict[str, Any]]:
+        return await self._get("/sections", {"term": term, "campus": campuses, "course": courses})
+
+    async def section_terms(self) -> Dict[str, int]:
+        return await self._get("/sections/terms")
+
+    async def walking_times(self, codes: List[str]) -> Dict[str, int]:
+        return await self._get("/locations/walking-times", {"code": codes})
+
+    async def versions(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        return await self._get("/versions", {"user_id": user_id} if user_id is not None else None)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class DirectDataSource:
+    """In-process reads through app.services (shared Motor client and catalog caches)."""
+
+    name = "direct"
+
+    def __init__(self):
+        from app.services import cache, compatibility, mongo_services, section_store, prereq_graph, walking_matrix
+        self.cache = cache
+        self.compatibility = compatibility
+        self.walking_matrix = walking_matrix
+        self.mongo = mongo_services
+        self.section_store = section_store
+        self.prereq_graph = prereq_graph
+        self._sections_loaded_at = 0.0
+        self._matrix_loaded_at = 0.0
+        self._catalog_version = None
+
+    def _saw_catalog_version(self, version):
+        if version != self._catalog_version:
+            self.cache.invalidate_catalog()
+            self._sections_loaded_at = self._matrix_loaded_at = 0.0
+            self._catalog_version = version
+
+    async def _sync_catalog(self):
+        """Drop this process's catalog caches if the backend changed the catalog."""
+        seen = call_versions.get()
+        if seen is None:
+            seen = await self.mongo.get_versions()
+        self._saw_catalog_version(seen["catalog"])
+
+    async def get_course(self, code: str) -> Optional[Dict[str, Any]]:
+        await self._sync_catalog()
+        return await self.mongo.get_course(code)
+
+    async def get_courses(self, codes: List[str]) -> Dict[str, Any]:
+        await self._sync_catalog()
+        found = await self.mongo.get_courses(codes)
+        return {
+            "courses": [found[c] for c in codes if c in found],
+            "missing": [c for c in codes if c not in found],
+        }
+
+    async def get_major(self, major_id: str) -> Optional[Dict[str, Any]]:
+        await self._sync_catalog()
+        return await self.mongo.get_major(major_id)
+
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.mongo.get_user(user_id)
+
+    async def eligibility(self, taken: List[str], codes: List[str]) -> Dict[str, Any]:
+        await self._sync_catalog()
+        # Only the asked-about courses matter for direct prereq checks
+        found = await self.mongo.get_courses(codes)
+        graph = self.prereq_graph.PrereqGraph.from_courses(found.values())
+        return self.prereq_graph.eligibility_report(graph, taken, codes)
+
+    async def _section_index(self):
+        # The backend process owns inserts, so refresh our copy of the index
+        # after a catalog change and otherwise now and then
+        await self._sync_catalog()
+        if time.monotonic() - self._sections_loaded_at > SECTION_RELOAD_SECONDS:
+            await self.section_store.load_section_store()
+            self._sections_loaded_at = time.monotonic()
+        return self.section_store.get_section_store()
+
+    async def sections(self, term: str, campuses: List[str], courses: List[str]) -> List[Dict[str, Any]]:
+        return (await self._section_index()).query(term, campuses or None, courses or None)
+
+    async def section_terms(self) -> Dict[str, int]:
+        return (await self._section_index()).terms()
+
+    async def walking_times(self, codes: List[str]) -> Dict[str, int]:
+        await self._sync_catalog()
+        # The backend refreshes the stored matrix; pick that up now and then
+        if time.monotonic() - self._matrix_loaded_at > SECTION_RELOAD_SECONDS:
+            await self.walking_matrix.load_walking_matrix()
+            self._matrix_loaded_at = time.monotonic()
+        return await self.compatibility.walking_times(codes)
+
+    async def versions(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        versions = await self.mongo.get_versions(user_id)
+        self._saw_catalog_version(versions["catalog"])
+        return versions
+
+    async def close(self):
+        pass
+
+
+_source = None
+
+
+def get_data_source():
+    """The configured data source, created on first use."""
+    global _source
+    if _source is None:
+        if DATA_SOURCE == "http":
+            _source = HttpDataSource()
+        elif DATA_SOURCE == "direct":
+            _source = DirectDataSource()
+        else:
+            try:
+                _source = DirectDataSource()
+            except ImportError:
+                _source = HttpDataSource()
+    return _source
@@ -0,0 +1,256 @@
+# panther_agent/solver.py
+import heapq
+import itertools
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Week as a bitset: 7 days x 288 five-minute slots
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_ORDER = "MTWRFSU"
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+DEFAULT_WEIGHTS = {
+    "gap": 0.1,            # per idle minute between classes on the same day
+    "campusSwitch": 30.0,  # per change of campus between consecutive classes
+    "walk": 1.0,           # per walking minute between consecutive classes
+    "day": 15.0,           # per day with at least one class
+}
+
+
+# Kept in step with app.services.schedule_bits.parse_days: the agent runs without the backend package
+def _day_token(token: str) -> List[int]:
+    """One word -> day indexes: a day name or abbreviation ("Tu", "Thurs"), else day letters ("MWF")."""
+    letters = all(ch in DAY_ORDER for ch in token.upper())
+    if len(token) > 1 and not (letters and token.isupper()):
+        for i, name in enumerate(DAY_NAMES):
+            if name.startswith(token.lower()):
+                return [i]
+    # Anything else that is not all day letters ("TBA") is not a day
+    return [DAY_ORDER.index(ch) for ch in token.upper()] if letters else []
+
+
+def parse_days(days: Any) -> List[int]:
+    """["MW"], "TR", ["M", "Th"], "TuTh", "Fri" -> sorted day indexes (M=0 ... U=6)."""
+    if isinstance(days, str):
+        days = [days]
+    found = set()
+    for part in days or []:
+        # "MWTh" -> "MW", "Th"; all-caps runs stay whole so "THU" is a name, "TR" letters
+        for token in re.findall(r"[A-Z]{2,}(?![a-z])|[A-Z]?[a-z]+|[A-Z]", str(part)):
+            found.update(_day_token(token))
+    return sorted(found)
+
+
+def to_minutes(hhmm: str) -> int:
+    h, m = hhmm.strip().split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+def time_mask(day_indexes: List[int], start: int, end: int) -> int:
+    """Bitset of the five-minute slots covered by [start, end) on each day."""
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)  # ceil
+    day_bits = ((1 << (last - first)) - 1) << first
+    mask = 0
+    for d in day_indexes:
+        mask |= day_bits << (d * SLOTS_PER_DAY)
+    return mask
+
+
+class _Section:
+    __slots__ = ("raw", "course", "credits", "days", "start", "end", "mask", "campus", "location")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self.course = raw["course"].strip().upper().replace(" ", "")
+        self.credits = int(raw.get("credits", 0) or 0)
+        self.days = parse_days(raw.get("days"))
+        self.start = to_minutes(raw["start"])
+        self.end = to_minutes(raw["end"])
+        self.mask = time_mask(self.days, self.start, self.end)
+        self.campus = raw.get("campus")
+        self.location = raw.get("location") or raw.get("place_id")
+
+
+def _walk_fn(walk_minutes: Optional[Callable[[Any, Any], float]]) -> Callable[[Any, Any], float]:
+    if walk_minutes is None:
+        return lambda a, b: 0.0
+
+    def walk(a, b):
+        if a is None or b is None or a == b:
+            return 0.0
+        return float(walk_minutes(a, b) or 0.0)
+    return walk
+
+
+def _day_metrics(day: List[_Section], walk) -> Tuple[float, int, float, bool]:
+    """(gap minutes, campus switches, walk minutes, feasible) for one day's sorted sections."""
+    gap = walk_total = 0.0
+    switches = 0
+    for a, b in zip(day, day[1:]):
+        idle = b.start - a.end
+        w = walk(a.location, b.location)
+        if w > idle:
+            return 0.0, 0, 0.0, False
+        gap += idle
+        walk_total += w
+        if a.campus != b.campus:
+            switches += 1
+    return gap, switches, walk_total, True
+
+
+def _lower_bound(chosen: List[_Section], weights: Dict[str, float]) -> float:
+    """Cost that can only grow as sections are added (days used, campuses per day)."""
+    per_day: Dict[int, set] = {}
+    for s in chosen:
+        for d in s.days:
+            per_day.setdefault(d, set()).add(s.campus)
+    return (
+        weights["day"] * len(per_day)
+        + weights["campusSwitch"] * sum(len(c) - 1 for c in per_day.values())
+    )
+
+
+def _evaluate(chosen: List[_Section], weights: Dict[str, float], walk) -> Optional[Tuple[float, Dict[str, Any]]]:
+    per_day: Dict[int, List[_Section]] = {}
+    for s in chosen:
+        for d in s.days:
+            per_day.setdefault(d, []).append(s)
+    gap = walk_total = 0.0
+    switches = 0
+    for day in per_day.values():
+        day.sort(key=lambda s: s.start)
+        g, sw, w, ok = _day_metrics(day, walk)
+        if not ok:
+            return None
+        gap += g
+        switches += sw
+        walk_total += w
+    cost = (
+        weights["gap"] * gap
+        + weights["campusSwitch"] * switches
+        + weights["walk"] * walk_total
+        + weights["day"] * len(per_day)
+    )
+    metrics = {
+        "gapMinutes": int(gap),
+        "campusSwitches": switches,
+        "walkMinutes": round(walk_total, 1),
+        "days": "".join(DAY_ORDER[d] for d in sorted(per_day)),
+    }
+    return cost, metrics
+
+
+def solve(
+    sections: List[Dict[str, Any]],
+    prefs: Dict[str, Any],
+    walk_minutes: Optional[Callable[[Any, Any], float]] = None,
+) -> Dict[str, Any]:
+    """
+    Enumerate conflict-free schedules with backtracking and return the top-K by cost.
+
+    prefs:
+      creditsTarget  minimum credits for a schedule (default 9)
+      maxCredits     maximum credits (default creditsTarget + 3)
+      required       course codes every schedule must include
+      daysOff        days that must stay free, e.g. ["F"]
+      earliest / latest  "HH:MM" bounds for class times
+      weights        overrides for DEFAULT_WEIGHTS
+      topK           number of schedules to return (default 5)
+      timeBudgetMs   search time limit (default 2000)
+    walk_minutes(a, b): walking minutes between two section locations. Back-to-back
+    classes that can't be reached in time are treated as a conflict.
+    """
+    target = int(prefs.get("creditsTarget", 9))
+    max_credits = int(prefs.get("maxCredits", target + 3))
+    top_k = max(1, int(prefs.get("topK", 5)))
+    deadline = time.monotonic() + float(prefs.get("timeBudgetMs", 2000)) / 1000.0
+    weights = {**DEFAULT_WEIGHTS, **(prefs.get("weights") or {})}
+    required = {c.strip().upper().replace(" ", "") for c in prefs.get("required") or []}
+    walk = _walk_fn(walk_minutes)
+
+    # Hard filters before search
+    blocked = time_mask(parse_days(prefs.get("daysOff") or []), 0, 24 * 60)
+    earliest = to_minutes(prefs["earliest"]) if prefs.get("earliest") else 0
+    latest = to_minutes(prefs["latest"]) if prefs.get("latest") else 24 * 60
+    by_course: Dict[str, List[_Section]] = {}
+    for raw in sections:
+        s = _Section(raw)
+        if s.mask & blocked or s.start < earliest or s.end > latest:
+            continue
+        by_course.setdefault(s.course, []).append(s)
+
+    # Fewest options first so conflicts surface early; required courses before optional
+    groups = sorted(by_course.items(), key=lambda kv: (kv[0] not in required, len(kv[1])))
+    missing_required = sorted(required - by_course.keys())
+    # Best-case credits still available from group i onward
+    suffix_credits = [0] * (len(groups) + 1)
+    for i in range(len(groups) - 1, -1, -1):
+        suffix_credits[i] = suffix_credits[i + 1] + max(s.credits for s in groups[i][1])
+
+    best: List[Tuple[float, int, List[_Section], Dict[str, Any]]] = []  # max-heap on cost
+    counter = itertools.count()
+    stats = {"nodes": 0, "complete": True}
+
+    def worst_cost() -> float:
+        return -best[0][0] if len(best) >= top_k else float("inf")
+
+    def record(chosen: List[_Section]):
+        result = _evaluate(chosen, weights, walk)
+        if result is None:
+            return
+        cost, metrics = result
+        if cost >= worst_cost():
+            return
+        entry = (-cost, next(counter), list(chosen), metrics)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        else:
+            heapq.heapreplace(best, entry)
+
+    def search(i: int, chosen: List[_Section], mask: int, credits: int):
+        stats["nodes"] += 1
+        if stats["nodes"] % 1024 == 0 and time.monotonic() > deadline:
+            stats["complete"] = False
+            raise TimeoutError
+        if credits + suffix_credits[i] < target:
+            return
+        if chosen and _lower_bound(chosen, weights) >= worst_cost():
+            return
+        if i == len(groups):
+            if credits >= target:
+                record(chosen)
+            return
+        course, options = groups[i]
+        for s in options:
+            if s.mask & mask or credits + s.credits > max_credits:
+                continue
+            chosen.append(s)
+            search(i + 1, chosen, mask | s.mask, credits + s.credits)
+            chosen.pop()
+        if course not in required:
+            search(i + 1, chosen, mask, credits)
+
+    if not missing_required:
+        try:
+            search(0, [], 0, 0)
+        except TimeoutError:
+            pass
+
+    ranked = sorted(best, key=lambda e: (-e[0], e[1]))
+    return {
+        "schedules": [
+            {
+                "sections": [s.raw for s in sorted(chosen, key=lambda s: s.course)],
+                "credits": sum(s.credits for s in chosen),
+                "score": round(-neg_cost, 2),
+                "metrics": metrics,
+            }
+            for neg_cost, _, chosen, metrics in ranked
+        ],
+        "complete": stats["complete"],
+        "nodes": stats["nodes"],
+        "missing_required": missing_required,
+    }
@@ -0,0 +1,155 @@
+# panther_agent/tool_cache.py
+"""
+Memoization for deterministic agent tools.
+
+A cached result is keyed on the tool, its arguments, the backend's catalog
+version and, for tools that read a user, that user's revision. A catalog
+write or user edit bumps those counters, so later calls miss and recompute.
+The recomputation reads through the data source, which must not answer from
+data older than the version it reported: the HTTP source reads the backend,
+and the direct source drops its catalog caches when the version moves (see
+data_access). TTL and LRU eviction bound how long and how many entries are kept.
+
+The versions are fetched once per outermost tool call and shared with the
+tools it calls (compute_remaining_for_major -> get_user_profile, ...), so a
+cached call costs one small versions lookup instead of the full fan-out.
+"""
+import copy
+import functools
+import inspect
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .data_access import call_versions, get_data_source
+
+TOOL_CACHE_ENABLED = os.getenv("PANTHER_TOOL_CACHE", "1") != "0"
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU with per-entry expiry, like app.services.cache.TTLCache; kept
+    here so the agent package imports without the backend.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+tool_cache = TTLCache(
+    "agent_tools",
+    maxsize=int(os.getenv("PANTHER_TOOL_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("PANTHER_TOOL_CACHE_TTL", "300")),
+)
+
+# tool name -> {"hits": n, "misses": n, "bypassed": n}
+_tool_stats: Dict[str, Dict[str, int]] = {}
+
+async def _lookup_versions(user_id: Optional[str]):
+    """(catalog version, user revision) for this call, reusing the enclosing call's lookup."""
+    seen = call_versions.get()
+    if seen is not None and (user_id is None or user_id in seen["users"]):
+        return seen["catalog"], seen["users"].get(user_id), seen
+    data = await get_data_source().versions(user_id)
+    if seen is None:
+        seen = {"catalog": data["catalog"], "users": {}}
+    if user_id is not None:
+        seen["users"][user_id] = data.get("user")
+    return seen["catalog"], seen["users"].get(user_id), seen
+
+
+def memoize_tool(user_arg: Optional[str] = None, cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    Cache an async tool's results. `user_arg` names the parameter holding a
+    user id when the result depends on that user's document; `cache_if` can
+    veto caching a result (e.g. one built from partially failed lookups).
+    The wrapper keeps the tool's signature and docstring for the agent runtime.
+    """
+    def decorator(func):
+        name = func.__name__
+        signature = inspect.signature(func)
+        stats = _tool_stats.setdefault(name, {"hits": 0, "misses": 0, "bypassed": 0})
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not TOOL_CACHE_ENABLED:
+                return await func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            user_id = (bound.arguments.get(user_arg) or "").strip() if user_arg else None
+            try:
+                catalog, revision, seen = await _lookup_versions(user_id)
+            except Exception:
+                # Versions unavailable: run uncached rather than risk a stale answer
+                stats["bypassed"] += 1
+                return await func(*args, **kwargs)
+
+            key = (name, repr(sorted(bound.arguments.items())), catalog, revision)
+            cached = tool_cache.get(key)
+            if cached is not MISSING:
+                stats["hits"] += 1
+                return cached
+            stats["misses"] += 1
+            token = call_versions.set(seen)
+            try:
+                result = await func(*args, **kwargs)
+            finally:
+                call_versions.reset(token)
+            if cache_if is None or cache_if(result):
+                tool_cache.set(key, result)
+            return result
+
+        return wrapper
+    return decorator
+
+
+def tool_cache_stats() -> Dict[str, Any]:
+    """Overall cache stats plus hit rate per tool."""
+    per_tool = {}
+    for name, s in _tool_stats.items():
+        total = s["hits"] + s["misses"]
+        per_tool[name] = {**s, "hit_rate": round(s["hits"] / total, 4) if total else 0.0}
+    return {**tool_cache.stats(), "tools": per_tool}
+
+
+def clear_tool_cache():
+    tool_cache.invalidate()
@@ -1,8 +1,13 @@
 # panther_agent/tools.py
 from typing import List, Dict, Any
-import os, httpx
+import asyncio, os
 
-API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000/api")
+from .data_access import SOURCE_ERRORS, get_data_source
+from .solver import solve
+from .tool_cache import memoize_tool
+
+COURSE_BATCH_SIZE = int(os.getenv("PANTHER_COURSE_BATCH_SIZE", "50"))
+COURSE_LOOKUP_CONCURRENCY = int(os.getenv("PANTHER_COURSE_LOOKUP_CONCURRENCY", "8"))
 
 
 # ---- tiny sample catalog ----
@@ -30,6 +35,9 @@ SAMPLE_SECTIONS: List[Dict[str, Any]] = [
     {"term": "Fall 2025", "campus": "BBC", "course": "CDA 3102", "crn": "20001", "days": ["TR"], "start": "11:00", "end": "12:15", "credits": 3},
 ]
 
+def _norm(code: str) -> str:
+    return (code or "").strip().upper().replace(" ", "")
+
 def load_major_template(major: str) -> Dict[str, Any]:
     """Return a simple bucket template of required course codes for a major."""
     major_id = "COMPSC:BS" if major.upper().startswith("CS") else major
@@ -38,84 +46,77 @@ def load_major_template(major: str) -> Dict[str, Any]:
 
 def diff_requirements(template: Dict[str, Any], completed: List[str]) -> Dict[str, Any]:
     """Given template + completed course codes, return what’s still needed and eligible next."""
-    done = set(c.strip().upper().replace(" ", "") for c in completed or [])
+    done = {_norm(c) for c in completed or []}
     eligible: List[str] = []
     needed_buckets: List[Dict[str, Any]] = []
 
-    def _norm(x: str) -> str: return x.strip().upper().replace(" ", "")
-
     for b in template.get("buckets", []):
-        remaining: List[str] = []
-        for code in b.get("courses", []):
-            n = _norm(code)
-            if n in done:
-                continue
-            # check prereqs
-            pre_ok = True
-            for p in SAMPLE_PREREQS.get(code, []):
-                if _norm(p) not in done:
-                    pre_ok = False
-                    break
-            if pre_ok:
-                remaining.append(code)
+        remaining = [
+            code for code in b.get("courses", [])
+            if _norm(code) not in done and all(_norm(p) in done for p in SAMPLE_PREREQS.get(code, []))
+        ]
         needed_buckets.append({"id": b.get("id", "core"), "choose": b.get("choose", 0), "remaining": remaining})
         eligible.extend(remaining)
 
     return {"needed": needed_buckets, "eligible": sorted(set(eligible))}
 
-def get_sections(term: str, campuses: List[str], course_codes: List[str]) -> List[Dict[str, Any]]:
-    """Filter sample sections by term, campuses, and course list."""
+async def get_sections(term: str, campuses: List[str], course_codes: List[str]) -> List[Dict[str, Any]]:
+    """
+    Filter sections by term, campuses, and course list; an empty campus or
+    course list matches nothing.
+    Reads the section index through the data source; falls back to the
+    bundled sample sections if it can't be reached or holds no sections yet.
+    """
     term = term.strip()
+    if not campuses or not course_codes:
+        return []
+    source = get_data_source()
+    try:
+        found = await source.sections(term, list(campuses), list(course_codes))
+        if found or await source.section_terms():
+            return found
+    except SOURCE_ERRORS:
+        pass
     campus_set = set(campuses or [])
     course_set = {c.strip().upper().replace(" ", "") for c in course_codes or []}
-    def _norm(x: str) -> str: return x.strip().upper().replace(" ", "")
-    out = []
-    for s in SAMPLE_SECTIONS:
-        if s["term"] != term:
-            continue
-        if s["campus"] not in campus_set:
-            continue
-        if _norm(s["course"]) not in course_set:
-            continue
-        out.append(s)
-    return out
-
-def schedule_solver(sections: List[Dict[str, Any]], prefs: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Very simple greedy scheduler: pick non-overlapping until ~9 credits."""
-    target = int(prefs.get("creditsTarget", 9))
-    chosen: List[Dict[str, Any]] = []
-
-    def overlap(a, b):
-        same_day = any(d in b["days"] for d in a["days"])
-        if not same_day:
-            return False
-        return not (a["end"] <= b["start"] or b["end"] <= a["start"])
-
-    for s in sections:
-        if any(overlap(s, c) for c in chosen):
-            continue
-        chosen.append(s)
-        if sum(c["credits"] for c in chosen) >= target:
-            break
-    return [{"sections": chosen, "credits": sum(c["credits"] for c in chosen)}]
-
-
-# ---------- tiny HTTP helper ----------
-def _get(path: str) -> Dict[str, Any]:
-    with httpx.Client(timeout=10.0) as client:
-        r = client.get(f"{API_BASE}{path}")
-        r.raise_for_status()
-        return r.json()
+    return [
+        s for s in SAMPLE_SECTIONS
+        if s["term"] == term
+        and s["campus"] in campus_set
+        and s["course"].replace(" ", "") in course_set
+    ]
 
-# ---------- core data fetchers ----------
-def get_course_details(code: str) -> Dict[str, Any]:
+async def schedule_solver(sections: List[Dict[str, Any]], prefs: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Return canonical course info for a course code.
-    Uses GET /api/courses/{code}.
+    Return the top-K conflict-free schedules for the given sections, best first.
+    See solver.solve for the supported prefs. Walking minutes between section
+    locations come from the backend's walking matrix; prefs["walkMinutes"] may
+    map "LOC_A|LOC_B" to minutes to add or override pairs. If the backend
+    can't be reached, only prefs["walkMinutes"] is used.
     """
-    code = (code or "").strip().upper()
-    data = _get(f"/courses/{code}")
-    # Normalize fields and types a bit
+    codes = sorted({s["location"] for s in sections if s.get("location")})
+    walk_table: Dict[str, float] = {}
+    if len(codes) > 1:
+        try:
+            walk_table = await get_data_source().walking_times(codes) or {}
+        except SOURCE_ERRORS:
+            pass
+    walk_table.update(prefs.get("walkMinutes") or {})
+
+    def walk_minutes(a, b):
+        return walk_table.get(f"{a}|{b}", walk_table.get(f"{b}|{a}", 0))
+
+    return solve(sections, prefs, walk_minutes)["schedules"]
+
+
+# ---------- data source ----------
+def _require(data: Any, what: str) -> Any:
+    if data is None:
+        raise LookupError(f"{what} not found")
+    return data
+
+# ---------- core data fetchers ----------
+def _normalize_course(data: Dict[str, Any], code: str) -> Dict[str, Any]:
     return {
         "code": data.get("code", code),
         "name": data.get("name", ""),
@@ -125,13 +126,67 @@ def get_course_details(code: str) -> Dict[str, Any]:
         "coreqs": data.get("coreqs") or [],
     }
 
-def get_major_info(major_id: str) -> Dict[str, Any]:
+@memoize_tool()
+async def get_course_details(code: str) -> Dict[str, Any]:
+    """
+    Return canonical course info for a course code.
+    """
+    code = (code or "").strip().upper()
+    data = _require(await get_data_source().get_course(code), f"Course {code}")
+    # Normalize fields and types a bit
+    return _normalize_course(data, code)
+
+async def _course_one_by_one(codes: List[str], limit: asyncio.Semaphore) -> Dict[str, Any]:
+    """Per-course lookups, gathered concurrently; failures are reported instead of raised."""
+    async def one(code):
+        async with limit:
+            return await get_data_source().get_course(code)
+
+    results = await asyncio.gather(*(one(c) for c in codes), return_exceptions=True)
+    out = {"courses": [], "missing": [], "failed": []}
+    for code, res in zip(codes, results):
+        if isinstance(res, Exception):
+            out["failed"].append(code)
+        elif res is None:
+            out["missing"].append(code)
+        else:
+            out["courses"].append(res)
+    return out
+
+@memoize_tool(cache_if=lambda r: not r["failed"])
+async def get_courses_details(codes: List[str]) -> Dict[str, Any]:
+    """
+    Return canonical course info for many course codes.
+    Codes are looked up in concurrent batches of COURSE_BATCH_SIZE; a batch that
+    fails is retried one course at a time, at most COURSE_LOOKUP_CONCURRENCY at once.
+    Returns {courses: {code: info}, missing: [codes], failed: [codes]}.
+    """
+    codes = list(dict.fromkeys((c or "").strip().upper() for c in codes or []))
+    limit = asyncio.Semaphore(COURSE_LOOKUP_CONCURRENCY)
+
+    async def batch(chunk):
+        try:
+            async with limit:
+                data = await get_data_source().get_courses(chunk)
+            return {"courses": data.get("courses") or [], "missing": data.get("missing") or [], "failed": []}
+        except Exception:
+            return await _course_one_by_one(chunk, limit)
+
+    chunks = [codes[i:i + COURSE_BATCH_SIZE] for i in range(0, len(codes), COURSE_BATCH_SIZE)]
+    courses, missing, failed = {}, [], []
+    for part in await asyncio.gather(*(batch(c) for c in chunks)):
+        courses.update({c["code"]: _normalize_course(c, c["code"]) for c in part["courses"]})
+        missing.extend(part["missing"])
+        failed.extend(part["failed"])
+    return {"courses": courses, "missing": missing, "failed": failed}
+
+@memoize_tool()
+async def get_major_info(major_id: str) -> Dict[str, Any]:
     """
     Return required course codes for a major.
-    Uses GET /api/majors/{major_id}.
     """
     mid = (major_id or "").strip()
-    data = _get(f"/majors/{mid}")
+    data = _require(await get_data_source().get_major(mid), f"Major {mid}")
     req = data.get("required_courses") or []
     # normalize to list[str]
     if req and isinstance(req[0], dict):
@@ -142,13 +197,13 @@ def get_major_info(major_id: str) -> Dict[str, Any]:
         "required_courses": req,
     }
 
-def get_user_profile(user_id: str) -> Dict[str, Any]:
+@memoize_tool(user_arg="user_id")
+async def get_user_profile(user_id: str) -> Dict[str, Any]:
     """
     Return user profile including major and taken courses.
-    Uses GET /api/users/{user_id}.
     """
     uid = (user_id or "").strip()
-    data = _get(f"/users/{uid}")
+    data = _require(await get_data_source().get_user(uid), f"User {uid}")
     return {
         "user_id": data.get("user_id", uid),
         "major": data.get("major", ""),
@@ -157,11 +212,12 @@ def get_user_profile(user_id: str) -> Dict[str, Any]:
     }
 
 # ---------- analysis / logic tools ----------
-def get_course_requirements(code: str) -> Dict[str, Any]:
+@memoize_tool()
+async def get_course_requirements(code: str) -> Dict[str, Any]:
     """
     Returns prereqs/coreqs for a course, plus a short plain-English summary.
     """
-    c = get_course_details(code)
+    c = await get_course_details(code)
     prereqs = c["prereqs"]
     coreqs = c["coreqs"]
     parts = []
@@ -183,46 +239,65 @@ def get_course_requirements(code: str) -> Dict[str, Any]:
         "summary": "\n".join(parts),
     }
 
-def user_meets_prereqs(user_id: str, course_code: str) -> Dict[str, Any]:
+@memoize_tool(user_arg="user_id")
+async def user_meets_prereqs(user_id: str, course_code: str) -> Dict[str, Any]:
     """
     Checks whether user has completed the prereqs for a given course.
     Returns {eligible: bool, missing: [codes], taken: [...]}.
     """
-    user = get_user_profile(user_id)
-    taken = {x.strip().upper() for x in (user.get("taken_courses") or [])}
-    c = get_course_details(course_code)
-    prereqs = [p.strip().upper() for p in (c.get("prereqs") or [])]
-    missing = [p for p in prereqs if p not in taken]
+    user = await get_user_profile(user_id)
+    taken = sorted({x.strip().upper() for x in (user.get("taken_courses") or [])})
+    code = (course_code or "").strip().upper()
+    data = await get_data_source().eligibility(taken, [code])
+    result = data["results"][code]
     return {
         "user_id": user["user_id"],
-        "course": c["code"],
-        "eligible": len(missing) == 0,
-        "missing": missing,
-        "taken": sorted(taken),
+        "course": code,
+        "eligible": result["eligible"],
+        "missing": result["missing"],
+        "taken": taken,
     }
 
-def compute_remaining_for_major(user_id: str) -> Dict[str, Any]:
+async def _prereq_checks(taken: List[str], codes: List[str]) -> Dict[str, Any]:
+    """Eligibility results per code, from one call for all of them."""
+    if not codes:
+        return {}
+    return (await get_data_source().eligibility(taken, codes))["results"]
+
+@memoize_tool(user_arg="user_id", cache_if=lambda r: not r["failed_lookups"])
+async def compute_remaining_for_major(user_id: str, major_id: str = "") -> Dict[str, Any]:
     """
     For a user, compute which required major courses remain and which ones are currently eligible
-    (i.e., all prereqs satisfied).
+    (i.e., all prereqs satisfied). Pass the user's major_id when it is already known so the user
+    and major are fetched concurrently; the user's own major is used if they differ.
+    Courses whose lookup failed are listed in failed_lookups.
     """
-    user = get_user_profile(user_id)
-    major = get_major_info(user.get("major", ""))
-    taken = {x.strip().upper() for x in (user.get("taken_courses") or [])}
+    if major_id:
+        user, major = await asyncio.gather(get_user_profile(user_id), get_major_info(major_id))
+        if (user.get("major") or "").strip() not in ("", major["major_id"]):
+            major = await get_major_info(user["major"])
+    else:
+        user = await get_user_profile(user_id)
+        major = await get_major_info(user.get("major", ""))
 
     remaining = []
     eligible_now = []
 
-    for code in (major.get("required_courses") or []):
-        c = get_course_details(code)
-        if c["code"] in taken:
-            continue
-        prereqs = [p.strip().upper() for p in (c.get("prereqs") or [])]
-        missing = [p for p in prereqs if p not in taken]
+    required = [(code or "").strip().upper() for code in (major.get("required_courses") or [])]
+    taken = sorted({_norm(c) for c in user.get("taken_courses") or []})
+    pending = [code for code in required if _norm(code) not in taken]
+    # Course details and the prereq checks both only need the required list
+    batch, checks = await asyncio.gather(get_courses_details(required), _prereq_checks(taken, pending))
+    missing_courses = batch["missing"]
+    pending = [code for code in pending if code in batch["courses"]]
+
+    for code in pending:
+        c = batch["courses"][code]
+        missing = checks[code]["missing"]
         remaining.append({
             "code": c["code"],
             "name": c["name"],
-            "prereqs": prereqs,
+            "prereqs": c["prereqs"],
             "missing_prereqs": missing,
             "credits": c["credits"],
         })
@@ -234,5 +309,7 @@ def compute_remaining_for_major(user_id: str) -> Dict[str, Any]:
         "major_id": major["major_id"],
         "major_name": major["name"],
         "remaining_required": remaining,     # list of dicts
-        "eligible_now": sorted(eligible_now) # list[str]
+        "eligible_now": sorted(eligible_now), # list[str]
+        "missing_courses": missing_courses,  # codes not found in the catalog
+        "failed_lookups": batch["failed"],   # codes whose lookup errored; results are partial
     }
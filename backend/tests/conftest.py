@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the backend as `app` / `panther_agent`, like uvicorn and adk run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
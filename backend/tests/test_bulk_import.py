@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("motor")
+
+from app.services import bulk_import
+from app.services.bulk_import import parse_payload
+
+
+def test_jsonl_groups_lines_by_their_kind():
+    text = '{"kind": "courses", "code": "COP 2210"}\n\n{"code": "PG6"}\n'
+    assert parse_payload(text, "jsonl", "locations") == {
+        "courses": [{"code": "COP 2210"}],
+        "locations": [{"code": "PG6"}],
+    }
+
+
+@pytest.mark.parametrize("line", ["[]", "3", '"COP 2210"', "null"])
+def test_jsonl_line_that_is_not_an_object_names_the_line(line):
+    with pytest.raises(ValueError, match="line 2"):
+        parse_payload('{"code": "COP 2210"}\n' + line, "jsonl", "courses")
+
+
+def test_jsonl_invalid_json_names_the_line():
+    with pytest.raises(ValueError, match="line 1"):
+        parse_payload("{not json", "jsonl", "courses")
+
+
+def test_json_scalar_is_rejected():
+    with pytest.raises(ValueError):
+        parse_payload("3", "json", "courses")
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError, match="Unknown import kind"):
+        parse_payload('{"kind": "rooms", "code": "x"}', "jsonl")
+
+
+@pytest.mark.parametrize("text", ['{"courses": 3}', '{"courses": {"code": "COP 2210"}}', '{"sections": null}'])
+def test_json_kind_that_is_not_a_list_is_rejected(text):
+    with pytest.raises(ValueError, match="list of records"):
+        parse_payload(text, "json")
+
+
+def test_json_list_needs_a_known_kind():
+    with pytest.raises(ValueError, match="Unknown import kind"):
+        parse_payload('[{"code": "x"}]', "json", None)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCourses:
+    """Upserts on an exact code, like the unique index on courses.code."""
+
+    def __init__(self, codes):
+        self.docs = {code: {"code": code, "name": ""} for code in codes}
+
+    def find(self, query, projection=None):
+        wanted = set(query["code"]["$in"])
+        return FakeCursor([{"code": c} for c in self.docs if c in wanted])
+
+    async def bulk_write(self, ops, ordered=True):
+        upserted = 0
+        for op in ops:
+            code = op._filter["code"]
+            upserted += code not in self.docs
+            self.docs.setdefault(code, {}).update(op._doc["$set"])
+        return type("Result", (), {"bulk_api_result": {"nMatched": len(ops) - upserted, "nModified": 0,
+                                                       "nUpserted": upserted}})()
+
+
+def test_course_import_updates_a_code_stored_without_spaces(monkeypatch):
+    courses = FakeCourses(["COP2210"])
+
+    async def bump():
+        pass
+
+    monkeypatch.setattr(bulk_import, "db", {"courses": courses})
+    monkeypatch.setattr(bulk_import, "bump_catalog_version", bump)
+    records = [
+        {"code": "COP 2210", "name": "Programming I", "description": "", "credits": 3},
+        {"code": "COP 3337", "name": "Programming II", "description": "", "credits": 3},
+        {"code": "COP3337", "name": "Computer Programming II", "description": "", "credits": 3},
+    ]
+    report = asyncio.run(bulk_import.import_records("courses", records))
+    assert sorted(courses.docs) == ["COP2210", "COP3337"]
+    assert courses.docs["COP2210"]["name"] == "Programming I"
+    assert courses.docs["COP3337"]["name"] == "Computer Programming II"
+    assert (report["upserted"], report["duplicates"]) == (1, 1)
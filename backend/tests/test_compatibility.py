@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("motor")
+
+from app.services import compatibility, walking_matrix
+from app.services.section_store import SectionStore
+from app.services.walking_matrix import UNKNOWN, WalkingMatrix
+
+PLACES = {"PG6": "place-pg6", "EC": "place-ec", "CASE": "place-case", "NOPLACE": None}
+
+
+def _campus(monkeypatch, durations):
+    """Locations PG6, EC and CASE with walking seconds durations[origin][destination]."""
+    async def get_location(code):
+        return {"code": code, "google_maps_place_id": PLACES.get(code)}
+
+    m = WalkingMatrix(["place-pg6", "place-ec", "place-case"])
+    m.durations[:] = durations
+    m.distances[:] = 0
+    monkeypatch.setattr(compatibility, "get_location", get_location)
+    monkeypatch.setattr(walking_matrix, "matrix", m)
+
+
+def test_walking_times_covers_both_directions_of_known_pairs(monkeypatch):
+    _campus(monkeypatch, [[0, 400, 301], [420, 0, UNKNOWN], [301, UNKNOWN, 0]])
+    times = asyncio.run(compatibility.walking_times(["PG6", "EC", "CASE", "NOPLACE", "PG6", ""]))
+    assert times == {"PG6|EC": 7, "EC|PG6": 7, "PG6|CASE": 6, "CASE|PG6": 6}
+
+
+def _block(start, end, code):
+    return {"start_time": start, "end_time": end, "location": {"code": code}}
+
+
+def _section(crn, days, start, end, location):
+    return {"term": "Fall 2025", "campus": "MMC", "course": "COP 2210", "crn": crn,
+            "days": days, "start": start, "end": end, "location": location}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    # CASE -> EC is a 15 minute walk, EC -> CASE only 5
+    _campus(monkeypatch, [[0, 400, 301], [420, 0, 300], [301, 900, 0]])
+    store = SectionStore()
+    store.extend([
+        _section("1", "M", "10:00", "10:50", "CASE"),  # 10 minutes to walk CASE -> EC: too far
+        _section("2", "M", "09:30", "10:30", "CASE"),  # overlaps the 09:00 block
+        _section("3", "W", "10:00", "10:50", "PG6"),   # a day with nothing else on it
+        _section("4", "M", "12:30", "13:20", "EC"),    # same building as the block before
+        _section("5", "M", "12:30", "13:20", "CASE"),  # EC -> CASE in 5 of the 30 minutes
+    ])
+    monkeypatch.setattr(compatibility, "get_section_store", lambda: store)
+    return store
+
+
+USER = {"schedule": {"mon": [_block("09:00", "09:50", "PG6"), _block("11:00", "12:00", "EC")]}}
+
+
+def test_compatible_sections_rejects_and_ranks(store):
+    result = asyncio.run(compatibility.compatible_sections(USER, "Fall 2025", ["COP2210"]))
+    assert result["rejected"] == {"conflict": 1, "walk": 1}
+    assert result["schedule_days"] == ["mon"]
+    options = result["results"]["COP 2210"]
+    assert [o["crn"] for o in options] == ["4", "5", "3"]
+    assert [o["score"] for o in options] == [3.0, 7.5, 15.0]
+    assert options[1]["walk_minutes"] == 5 and not options[1]["walk_unknown"]
+
+
+def test_walk_to_the_next_block_uses_the_outbound_leg(store):
+    # Section 1 only fits if the walk out is read as EC -> CASE (5 minutes)
+    result = asyncio.run(compatibility.compatible_sections(USER, "Fall 2025", ["COP2210"]))
+    assert "1" not in [o["crn"] for o in result["results"]["COP 2210"]]
+    walking_matrix.matrix.durations[2, 1] = 300
+    result = asyncio.run(compatibility.compatible_sections(USER, "Fall 2025", ["COP2210"]))
+    assert "1" in [o["crn"] for o in result["results"]["COP 2210"]]
+
+
+def test_buffer_minutes_tighten_the_walk(store):
+    result = asyncio.run(compatibility.compatible_sections(USER, "Fall 2025", ["COP2210"], buffer_minutes=26))
+    assert [o["crn"] for o in result["results"]["COP 2210"]] == ["4", "3"]
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services import degree_planner
+from app.services.cache import plan_cache
+from app.services.prereq_graph import PrereqGraph
+
+
+@pytest.fixture
+def graph():
+    return PrereqGraph.from_courses([
+        {"code": "COP 2210", "credits": 4},
+        {"code": "COP 3337", "credits": 3, "prereqs": ["COP 2210"]},
+        {"code": "COP 3530", "credits": 3, "prereqs": ["COP 3337"], "coreqs": ["MAD 2104"]},
+        {"code": "MAD 2104", "credits": 3},
+    ])
+
+
+def test_build_plan_orders_prereqs_and_accepts_any_spelling(graph):
+    plan = degree_planner.build_plan(graph, ["cop3530", "COP3337"], {"cop 2210"}, max_credits=6)
+    terms = [[c["code"] for c in t["courses"]] for t in plan["terms"]]
+    assert terms == [["COP 3337", "MAD 2104"], ["COP 3530"]]
+    assert plan["optimal"] and plan["assumed_credits"] == []
+
+
+def test_prereq_outside_the_catalog_is_assumed(graph):
+    plan = degree_planner.build_plan(PrereqGraph.from_prereq_map({"X 2": ["X 1"]}), ["X 2"], set())
+    assert plan["assumed_credits"] == ["X 1"]
+    assert [[c["code"] for c in t["courses"]] for t in plan["terms"]] == [["X 1"], ["X 2"]]
+
+
+def test_cached_plan_only_reuses_a_non_optimal_plan_for_smaller_budgets(monkeypatch, graph):
+    calls = []
+
+    def build_plan(graph, required, taken, max_credits, time_budget_ms):
+        calls.append(time_budget_ms)
+        return {"optimal": time_budget_ms >= 500}
+
+    monkeypatch.setattr(degree_planner, "build_plan", build_plan)
+    plan_cache.invalidate()
+    args = ("CS:BS", graph, ["COP 3530"], ["COP 2210"], 15)
+    assert degree_planner.cached_plan(*args, time_budget_ms=0) == ({"optimal": False}, False)
+    assert degree_planner.cached_plan(*args, time_budget_ms=0)[1] is True
+    assert degree_planner.cached_plan(*args, time_budget_ms=1000) == ({"optimal": True}, False)
+    # An optimal plan answers any budget
+    assert degree_planner.cached_plan(*args, time_budget_ms=5000)[1] is True
+    assert calls == [0, 1000]
+    plan_cache.invalidate()
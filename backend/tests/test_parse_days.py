@@ -0,0 +1,48 @@
+import importlib.util
+import os
+
+import pytest
+
+from app.services.schedule_bits import parse_days, to_minutes
+
+# Loaded by path: importing the panther_agent package builds the ADK agent
+_spec = importlib.util.spec_from_file_location(
+    "agent_solver", os.path.join(os.path.dirname(__file__), "..", "panther_agent", "solver.py"))
+agent_solver = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(agent_solver)
+
+CASES = [
+    ("MWF", [0, 2, 4]),
+    ("TR", [1, 3]),
+    ("MTWRFSU", [0, 1, 2, 3, 4, 5, 6]),
+    ("Tu", [1]),
+    ("Fr", [4]),
+    ("Th", [3]),
+    ("TuTh", [1, 3]),
+    ("MWTh", [0, 2, 3]),
+    ("SaSu", [5, 6]),
+    (["M", "Th"], [0, 3]),
+    (["MW"], [0, 2]),
+    ("Mon Wed Fri", [0, 2, 4]),
+    ("THU", [3]),
+    ("Tuesday", [1]),
+    ("mwf", [0, 2, 4]),
+    ("", []),
+    (None, []),
+    ("TBA", []),
+]
+
+
+@pytest.mark.parametrize("days, expected", CASES)
+def test_parse_days(days, expected):
+    assert parse_days(days) == expected
+
+
+@pytest.mark.parametrize("days, expected", CASES)
+def test_agent_parse_days_matches_backend(days, expected):
+    assert agent_solver.parse_days(days) == expected
+
+
+def test_to_minutes():
+    assert to_minutes("09:30") == agent_solver.to_minutes("09:30") == 570
+    assert to_minutes("14:05:00") == 845
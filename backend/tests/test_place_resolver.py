@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("motor")
+
+from app.services import google_services, place_resolver
+from app.services.place_resolver import RateLimiter, normalize_address
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1240 S.W. 108 AVE,  Miami", "1240 sw 108 ave miami"),
+    ("  11200 SW 8th St; Miami, FL ", "11200 sw 8th st miami fl"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_address(raw, expected):
+    assert normalize_address(raw) == expected
+
+
+def test_rate_limiter_allows_a_burst_then_paces():
+    async def run():
+        limiter = RateLimiter(rate=50, burst=3)
+        stamps = []
+        for _ in range(6):
+            await limiter.acquire()
+            stamps.append(time.monotonic())
+        return stamps
+
+    stamps = asyncio.run(run())
+    assert stamps[2] - stamps[0] < 0.01
+    # The three after the burst wait about 1/50 s each
+    assert stamps[5] - stamps[2] >= 3 / 50 * 0.8
+
+
+def test_a_failing_lookup_only_marks_its_own_address(monkeypatch):
+    async def find_place(address):
+        if address == "bad":
+            raise KeyError("place_id")
+        return "OK", {"place_id": f"pid-{address}", "lat": 1.0, "lng": 2.0}
+
+    monkeypatch.setattr(google_services, "api_key", "test-key")
+    monkeypatch.setattr(google_services, "find_place", find_place)
+    results = asyncio.run(place_resolver.resolve_addresses(["a", "bad", "b", "a"], rate=1000))
+    assert results == {
+        "a": ("OK", {"place_id": "pid-a", "lat": 1.0, "lng": 2.0}),
+        "bad": ("ERROR", None),
+        "b": ("OK", {"place_id": "pid-b", "lat": 1.0, "lng": 2.0}),
+    }
+
+
+def test_resolving_without_an_api_key_is_a_value_error(monkeypatch):
+    monkeypatch.setattr(google_services, "api_key", None)
+    with pytest.raises(ValueError):
+        asyncio.run(place_resolver.resolve_addresses(["a"]))
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return [dict(d) for d in self.docs]
+
+
+class FakeLocations:
+    """Just the queries and updates resolve_locations sends."""
+
+    def __init__(self, docs):
+        self.docs = {d["code"]: dict(d) for d in docs}
+
+    def find(self, query, projection=None):
+        if "place_address" in query:
+            keys = set(query["place_address"]["$in"])
+            return FakeCursor([d for d in self.docs.values() if d.get("place_address") in keys
+                               and d.get("place_status") == "resolved" and d.get("google_maps_place_id")])
+        return FakeCursor(list(self.docs.values()))
+
+    async def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            doc = self.docs[op._filter["code"]]
+            doc.update(op._doc.get("$set", {}))
+            for field in op._doc.get("$unset", {}):
+                doc.pop(field, None)
+
+
+class FakeDb:
+    def __init__(self, docs):
+        self.locations = FakeLocations(docs)
+
+
+@pytest.fixture
+def moved_location(monkeypatch):
+    """PG6 was resolved at its old address and has since moved."""
+    db = FakeDb([{"code": "PG6", "address": "200 New Rd", "google_maps_place_id": "old-pid",
+                  "lat": 1.0, "lng": 2.0, "place_address": "100 old rd", "place_status": "resolved"}])
+    bumps = []
+
+    async def bump():
+        bumps.append(1)
+
+    monkeypatch.setattr(place_resolver, "db", db)
+    monkeypatch.setattr(place_resolver, "bump_catalog_version", bump)
+    monkeypatch.setattr(google_services, "api_key", "test-key")
+    monkeypatch.setattr(place_resolver, "PLACES_MAX_RETRIES", 0)
+    return db.locations.docs["PG6"], bumps
+
+
+def _answer(monkeypatch, status, candidate=None):
+    async def find_place(address):
+        return status, candidate
+    monkeypatch.setattr(google_services, "find_place", find_place)
+
+
+def test_not_found_after_a_move_drops_the_old_place_id(monkeypatch, moved_location):
+    doc, bumps = moved_location
+    _answer(monkeypatch, "ZERO_RESULTS")
+    report = asyncio.run(place_resolver.resolve_locations(rate=1000))
+    assert report["not_found"] == 1 and bumps
+    assert "google_maps_place_id" not in doc and "lat" not in doc
+    assert doc["place_status"] == "not_found" and doc["place_address"] == "200 new rd"
+    assert place_resolver._needs_resolving(doc, retry_failed=True)
+    assert not place_resolver._needs_resolving(doc, retry_failed=False)
+
+
+def test_failed_lookup_after_a_move_is_retried(monkeypatch, moved_location):
+    doc, bumps = moved_location
+    _answer(monkeypatch, "ERROR")
+    report = asyncio.run(place_resolver.resolve_locations(rate=1000))
+    assert report["error"] == 1 and not bumps
+    assert doc["place_status"] == "error" and doc["place_address"] == "100 old rd"
+    assert place_resolver._needs_resolving(doc, retry_failed=False)
+
+    _answer(monkeypatch, "OK", {"place_id": "new-pid", "lat": 3.0, "lng": 4.0})
+    asyncio.run(place_resolver.resolve_locations(rate=1000))
+    assert doc["google_maps_place_id"] == "new-pid" and doc["place_address"] == "200 new rd"
+    assert not place_resolver._needs_resolving(doc, retry_failed=True)
@@ -0,0 +1,24 @@
+import random
+
+from app.services.polyline import decode_polyline, encode_polyline
+
+# The example from Google's encoded polyline algorithm documentation
+GOOGLE_POINTS = [(3850000, -12020000), (4070000, -12095000), (4325200, -12645300)]
+GOOGLE_ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_matches_google_reference():
+    assert encode_polyline(GOOGLE_POINTS) == GOOGLE_ENCODED
+    assert decode_polyline(GOOGLE_ENCODED) == GOOGLE_POINTS
+
+
+def test_round_trip():
+    rng = random.Random(7)
+    points = [(rng.randint(-9000000, 9000000), rng.randint(-18000000, 18000000)) for _ in range(200)]
+    points += [(0, 0), (0, 0), (-1, 1), (1, -1)]
+    assert decode_polyline(encode_polyline(points)) == points
+
+
+def test_empty():
+    assert encode_polyline([]) == ""
+    assert decode_polyline("") == []
@@ -0,0 +1,55 @@
+from app.services.prereq_graph import PrereqGraph
+
+
+def _graph_of(prereqs, *added):
+    graph = PrereqGraph.from_prereq_map(prereqs)
+    for code, parents in added:
+        graph.add_course({"code": code, "prereqs": parents})
+    return graph
+
+
+def test_course_added_behind_a_cycle_is_cyclic():
+    graph = _graph_of({"A": ["B"], "B": ["A"], "X": []}, ("C", ["A"]), ("D", ["C", "X"]))
+    assert graph.cycles() == ["A", "B", "C", "D"]
+    assert graph.topological_order() == ["X"]
+    assert graph.critical_path_length("D") is None
+
+
+def test_incremental_build_matches_full_build():
+    prereqs = {
+        "A": ["B"], "B": ["A"], "X": [],
+        "Y": ["X"], "Z": ["Y|X", "A"], "W": ["Y"],
+    }
+    full = PrereqGraph.from_prereq_map(prereqs)
+    incremental = PrereqGraph()
+    for code, parents in prereqs.items():
+        incremental.add_course({"code": code, "prereqs": parents})
+    assert incremental.cycles() == full.cycles() == ["A", "B", "Z"]
+    assert incremental.topological_order() == full.topological_order() == ["X", "Y", "W"]
+    assert incremental.all_prereqs("W") == full.all_prereqs("W") == ["X", "Y"]
+
+
+def test_breaking_a_cycle_clears_its_dependents():
+    graph = _graph_of({"A": ["B"], "B": ["A"]}, ("C", ["A"]), ("B", []))
+    assert graph.cycles() == []
+    assert graph.topological_order() == ["B", "A", "C"]
+    assert graph.critical_path_length() == 3
+
+
+def test_alternatives_are_not_required_ancestors():
+    graph = PrereqGraph.from_prereq_map({
+        "A": ["X"], "B": ["X"], "C": ["A|B"], "D": ["C"], "E": ["A|B", "B"],
+    })
+    assert graph.all_prereqs("C") == ["X"]
+    assert graph.all_prereqs("D") == ["C", "X"]
+    assert graph.all_prereqs("E") == ["B", "X"]
+    assert graph.unlocks("A") == ["C", "E"]
+    assert graph.unlocks("A", transitive=True) == []
+    assert graph.unlocks("B", transitive=True) == ["E"]
+    assert graph.unlocks("X", transitive=True) == ["A", "B", "C", "D", "E"]
+
+
+def test_alternatives_closure_survives_incremental_updates():
+    graph = _graph_of({"A": [], "B": [], "C": ["A|B"], "D": ["C"]}, ("A", ["X"]), ("B", ["X"]))
+    full = PrereqGraph.from_prereq_map({"A": ["X"], "B": ["X"], "C": ["A|B"], "D": ["C"]})
+    assert graph.all_prereqs("D") == full.all_prereqs("D") == ["C", "X"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("motor")
+
+from app.services import route_cache, route_provider
+from app.services.cache import route_cache as memory
+
+
+class FakeRouteCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["key"])
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["key"]] = doc
+
+
+class FakeDb:
+    def __init__(self):
+        self.route_cache = FakeRouteCollection()
+
+
+class CountingProvider:
+    """Two-minute straight legs for any sequence of place ids."""
+    mode = "TEST_WALK"
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_route(self, location_list):
+        ids = [loc["place_id"] for loc in location_list]
+        self.calls.append(ids)
+        legs = [{"staticDuration": "120s", "distanceMeters": 150, "polyline": {"encodedPolyline": ""}}
+                for _ in ids[1:]]
+        return {"routes": [{"duration": f"{120 * len(legs)}s", "distanceMeters": 150 * len(legs),
+                            "polyline": {"encodedPolyline": ""}, "legs": legs}]}
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = CountingProvider()
+    monkeypatch.setattr(route_cache, "db", FakeDb())
+    monkeypatch.setattr(route_provider, "provider", provider)
+    memory.invalidate()
+    yield provider
+    memory.invalidate()
+
+
+def _route(*ids):
+    return asyncio.run(route_cache.get_route([{"place_id": pid} for pid in ids]))
+
+
+def test_route_is_assembled_from_cached_legs(provider):
+    _route("a", "b", "c")
+    _route("c", "d")
+    route = _route("b", "c", "d")
+    assert provider.calls == [["a", "b", "c"], ["c", "d"]]
+    assert route["routes"][0]["duration"] == "240s"
+    assert len(route["routes"][0]["legs"]) == 2
+
+
+@pytest.mark.parametrize("cached", [
+    {"routes": [{"duration": "0s"}]},
+    {"routes": [{"legs": []}]},
+    {"routes": []},
+])
+def test_legless_cached_pair_falls_back_to_a_live_fetch(provider, cached):
+    memory.set(route_cache.route_key(("a", "b")), cached)
+    _route("b", "c")
+    route = _route("a", "b", "c")
+    assert provider.calls == [["b", "c"], ["a", "b", "c"]]
+    assert route["routes"][0]["duration"] == "240s"
+
+
+def test_duration_seconds():
+    assert route_cache.duration_seconds("754s") == 754
+    assert route_cache.duration_seconds("12.5s") == 12
+    assert route_cache.duration_seconds(None) == 0
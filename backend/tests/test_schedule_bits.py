@@ -0,0 +1,61 @@
+import pytest
+
+from app.services.schedule_bits import WeekBits, encode_day
+
+
+def _block(start, end, code):
+    return {"start_time": start, "end_time": end, "location": {"code": code}}
+
+
+@pytest.fixture
+def week():
+    return WeekBits.from_schedule({
+        "mon": [_block("10:00", "11:15", "PG6"), _block("13:00", "14:00", "EC")],
+        "thu": [_block("09:30", "10:45", "CASE")],
+    })
+
+
+@pytest.mark.parametrize("day, expected", [
+    (0, 0), ("mon", 0), ("Monday", 0), ("M", 0), ("tues", 1), ("R", 3), (" thu ", 3), ("u", 6),
+])
+def test_day_index(day, expected):
+    assert WeekBits.day_index(day) == expected
+
+
+@pytest.mark.parametrize("day", ["", "MT", "X", "mo", "monkey", 7, -1])
+def test_day_index_rejects_unknown_days(day):
+    with pytest.raises(ValueError):
+        WeekBits.day_index(day)
+
+
+def test_encode_day_rounds_blocks_out_to_slots():
+    day = encode_day([_block("10:02", "10:58", "PG6")])
+    assert day["blocks"] == [[120, 132]]
+    assert day["locations"] == ["PG6"]
+    assert int(day["bits"], 16) == ((1 << 12) - 1) << 120
+
+
+def test_conflicts(week):
+    assert week.conflicts("mon", 11 * 60, 12 * 60)
+    assert not week.conflicts("mon", 11 * 60 + 15, 13 * 60)
+    assert not week.conflicts("tue", 10 * 60, 11 * 60)
+    assert week.conflicting_blocks("R", 10 * 60, 10 * 60 + 30) == [
+        {"start": "09:30", "end": "10:45", "location": "CASE"}]
+
+
+def test_free_time(week):
+    assert week.free_time("mon", 30, 9 * 60, 15 * 60) == [(540, 600), (675, 780), (840, 900)]
+    assert week.free_time("mon", 90, 9 * 60, 15 * 60) == [(675, 780)]
+    assert week.free_time("sun") == [(0, 24 * 60)]
+
+
+def test_neighbours(week):
+    assert week.neighbours("mon", 12 * 60, 12 * 60 + 30) == ((675, "PG6"), (780, "EC"))
+    assert week.neighbours("mon", 8 * 60, 9 * 60) == (None, (600, "PG6"))
+    assert week.neighbours("wed", 8 * 60, 9 * 60) == (None, None)
+
+
+def test_week_mask_puts_each_day_in_its_own_slot_range(week):
+    mask = week.week_mask()
+    assert mask & week.bits[0] == week.bits[0]
+    assert mask >> (3 * 288) == week.bits[3]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("motor")
+
+from app.services import route_provider, walking_matrix
+from app.services.walking_matrix import UNKNOWN, WalkingMatrix
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.replaced = []
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self.docs)
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.replaced.append(doc)
+
+
+class FakeDb:
+    def __init__(self, place_ids):
+        self.locations = FakeCollection({"google_maps_place_id": pid} for pid in place_ids)
+        self.walking_matrix = FakeCollection()
+
+
+class FlakyProvider:
+    """Routes every pair at 60 s / 80 m, except that the first `failures` calls fail."""
+    mode = "TEST_WALK"
+    max_matrix_side = 2
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    async def compute_route_matrix(self, origins, destinations):
+        self.calls.append((list(origins), list(destinations)))
+        if len(self.calls) <= self.failures:
+            return None
+        return [
+            {"originIndex": i, "destinationIndex": j, "duration": "60s",
+             "distanceMeters": 80, "condition": "ROUTE_EXISTS"}
+            for i in range(len(origins)) for j in range(len(destinations))
+        ]
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    def make(place_ids, provider):
+        monkeypatch.setattr(walking_matrix, "db", FakeDb(place_ids))
+        monkeypatch.setattr(route_provider, "provider", provider)
+        monkeypatch.setattr(walking_matrix, "matrix", WalkingMatrix())
+    return make
+
+
+def test_unfilled_lists_rows_and_columns_with_unknown_pairs():
+    m = WalkingMatrix(["a", "b", "c"])
+    m.durations[:] = 0
+    m.durations[0, 2] = UNKNOWN
+    assert m.unfilled(["a", "b", "c"]) == (["a"], ["c"])
+    assert m.unfilled(["a", "b"]) == ([], [])
+
+
+def test_refresh_retries_pairs_from_a_failed_block(fake_env):
+    provider = FlakyProvider(failures=1)
+    fake_env(["a", "b", "c"], provider)
+
+    first = asyncio.run(walking_matrix.refresh_walking_matrix())
+    assert first.unfilled(first.place_ids)[0]  # the failed block left gaps
+
+    second = asyncio.run(walking_matrix.refresh_walking_matrix())
+    assert second.unfilled(second.place_ids) == ([], [])
+    assert second.leg("a", "c") == (60, 80)
+
+
+def test_refresh_is_a_no_op_once_everything_is_known(fake_env):
+    provider = FlakyProvider(failures=0)
+    fake_env(["a", "b"], provider)
+
+    asyncio.run(walking_matrix.refresh_walking_matrix())
+    calls = len(provider.calls)
+    asyncio.run(walking_matrix.refresh_walking_matrix())
+    assert len(provider.calls) == calls
@@ -478,16 +478,21 @@ locations = [
     {"code": "EC",     "full_name": "Engineering Center",                                           "address": "10555 W Flagler St, Miami, FL 33174",                                                   "google_maps_place_id": "ChIJd7VebNW-2YgRAdPCOn7hsak"}
 ]
 
-# Upload major
-r = requests.post(f"{BASE_URL}/majors", json=major_data)
-print("Major:", r.status_code, r.json())
-
-# Upload course
-for course_data in courses_data:
-    r = requests.post(f"{BASE_URL}/courses", json=course_data)
-    print("Course:", course_data["code"], r.status_code, r.json())
+sections = [
+    {"term": "Fall 2025", "campus": "MMC", "course": "COP2210", "crn": "10001", "days": ["MW"], "start": "10:00", "end": "11:15", "credits": 3, "location": "CASE"},
+    {"term": "Fall 2025", "campus": "MMC", "course": "COP3337", "crn": "10002", "days": ["TR"], "start": "09:30", "end": "10:45", "credits": 3, "location": "EC"},
+    {"term": "Fall 2025", "campus": "MMC", "course": "COP3530", "crn": "10003", "days": ["MW"], "start": "12:00", "end": "13:15", "credits": 3, "location": "CP"},
+    {"term": "Fall 2025", "campus": "BBC", "course": "CDA3102", "crn": "20001", "days": ["TR"], "start": "11:00", "end": "12:15", "credits": 3},
+]
 
-# Upload location
-for location_data in locations:
-    r = requests.post(f"{BASE_URL}/locations", json=location_data)
-    print("location:", location_data["code"], r.status_code, r.json())
+# Upload everything in one bulk import (upserts, so re-running is safe)
+r = requests.post(
+    f"{BASE_URL}/admin/import",
+    json={"locations": locations, "courses": courses_data, "majors": [major_data], "sections": sections},
+)
+print("Import:", r.status_code)
+for report in r.json().get("imports", []):
+    print(f"{report['kind']}: {report['written']} written, {report['invalid']} invalid, "
+          f"{report['records_per_second']} records/s")
+    for err in report["errors"]:
+        print("  ", err["key"], err["error"])
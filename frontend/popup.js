@@ -17,14 +17,28 @@ function setCachedData(key, data) {
     localStorage.setItem(key, JSON.stringify({ data, timestamp: Date.now() }));
 }
 
+// Fetch every page of a cursor-paginated listing endpoint ({ items, next_cursor })
+async function fetchAllPages(path) {
+    const items = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams({ limit: '1000' });
+        if (cursor) params.set('after', cursor);
+        const response = await fetch(`${API_BASE_URL}${path}?${params}`);
+        if (!response.ok) throw new Error(`Failed to fetch ${path}`);
+        const page = await response.json();
+        items.push(...page.items);
+        cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+}
+
 async function fetchAllMajors() {
     const cacheKey = 'majorsCache';
     const cachedMajors = getCachedData(cacheKey);
     if (cachedMajors) return cachedMajors;
     try {
-        const response = await fetch(`${API_BASE_URL}/majors`);
-        if (!response.ok) throw new Error('Failed to fetch majors');
-        const majors = await response.json();
+        const majors = await fetchAllPages('/majors');
         setCachedData(cacheKey, majors);
         return majors;
     } catch (error) {
@@ -39,9 +53,7 @@ async function fetchAllCourses() {
     const cachedCourses = getCachedData(cacheKey);
     if (cachedCourses) return cachedCourses;
     try {
-        const response = await fetch(`${API_BASE_URL}/courses`);
-        if (!response.ok) throw new Error('Failed to fetch courses');
-        const courses = await response.json();
+        const courses = await fetchAllPages('/courses');
         setCachedData(cacheKey, courses);
         return courses;
     } catch (error) {
@@ -56,9 +68,7 @@ async function fetchAllLocations() {
     const cachedLocations = getCachedData(cacheKey);
     if (cachedLocations) return cachedLocations;
     try {
-        const response = await fetch(`${API_BASE_URL}/locations`);
-        if (!response.ok) throw new Error('Failed to fetch locations');
-        let locations = await response.json();
+        let locations = await fetchAllPages('/locations');
         // Normalize to { code, full_name }
         locations = locations.map(loc => ({
             code: loc.code || '',
@@ -94,9 +104,7 @@ async function setupMajorDropdown() {
     majorDropdown.addEventListener('change', async function () {
         const selectedMajor = this.value;
         if (selectedMajor) {
-            const userData = await getUserData();
-            userData.major = selectedMajor;
-            await saveUserData(userData);
+            await patchUser([{ op: 'set_major', major: selectedMajor }]);
             location.reload(); // reload to update checklist
         }
     });
@@ -164,7 +172,7 @@ function initMap() {
         const blocks = (userData.schedule && userData.schedule[selectedDay]) ? userData.schedule[selectedDay] : [];
         const placeIds = blocks.map(b => b.location && b.location.google_maps_place_id).filter(Boolean);
         if (placeIds.length) {
-            fetchAndDisplayRoute(placeIds);
+            fetchAndDisplayItinerary(selectedDay);
         } else {
             clearRenderedRoute();
         }
@@ -405,6 +413,35 @@ async function fetchAndDisplayRoute(placeIds) {
     }
 }
 
+// Fetch the stored itinerary for a day of the user's schedule (the backend
+// only resolves the route again when that day's stops changed)
+async function fetchAndDisplayItinerary(day) {
+    try {
+        const response = await fetch(`${API_BASE_URL}/users/${getUserId()}/itinerary/${day}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const itinerary = await response.json();
+        if (!itinerary.legs || itinerary.legs.length === 0) {
+            clearRenderedRoute();
+            return;
+        }
+        addMultiplePolylines(itinerary.legs.map(leg => ({
+            encodedPolyline: leg.polyline,
+            distanceMeters: leg.distance_m,
+            duration: `${leg.duration_s}s`
+        })));
+        displayRouteInfo({
+            duration: `${itinerary.total_duration_s}s`,
+            distanceMeters: itinerary.total_distance_m,
+            legs: itinerary.legs
+        });
+    } catch (error) {
+        console.error('Error fetching itinerary:', error);
+        addRouteSegments();
+    }
+}
+
 // Function to display route information
 function displayRouteInfo(route) {
     // Hide route information popup - commented out by user request
@@ -557,25 +594,31 @@ async function getUserData() {
     }
 }
 
-async function saveUserData(data) {
+// Apply field-level edits (see PATCH /api/users/{id}). Pass the revision the
+// edit was based on to have it rejected if the user changed in the meantime.
+async function patchUser(ops, revision = null) {
     const userId = getUserId();
-    console.log('Saving user data for:', userId);
-    console.log('Data being sent:', JSON.stringify(data, null, 2));
+    const body = { ops };
+    if (revision !== null && revision !== undefined) body.revision = revision;
     try {
         const res = await fetch(`${API_BASE_URL}/users/${userId}`, {
-            method: 'PUT',
+            method: 'PATCH',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(data)
+            body: JSON.stringify(body)
         });
-        
+        if (res.status === 409) {
+            showNotification('Your data changed in another window. Please try again.', true);
+            return false;
+        }
         if (!res.ok) {
             const errorText = await res.text();
-            console.error(`User update failed: ${res.status} - ${errorText}`);
-        } else {
-            console.log('Synced user data to backend for:', userId);
+            console.error(`User patch failed: ${res.status} - ${errorText}`);
+            return false;
         }
+        return true;
     } catch (error) {
-        console.error('Error saving user data:', error);
+        console.error('Error patching user data:', error);
+        return false;
     }
 }
 
@@ -694,6 +737,35 @@ async function fetchCourseDetails(courseCode) {
     }
 }
 
+// Prefetch many courses with a single request and fill the course cache
+async function fetchCoursesBatch(courseCodes) {
+    const cacheKey = 'coursesCache';
+    let courseCache = getCachedData(cacheKey) || {};
+    const uncached = courseCodes.filter(code => !courseCache[code]);
+    if (uncached.length === 0) return courseCache;
+    try {
+        const response = await fetch(`${API_BASE_URL}/courses:batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ codes: uncached })
+        });
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        const { courses, missing } = await response.json();
+        for (const course of courses) {
+            courseCache[course.code] = course;
+        }
+        // Missing courses get the same basic info as a 404 from fetchCourseDetails
+        for (const code of missing) {
+            courseCache[code] = { code, name: code, credits: 3, prereqs: [], coreqs: [] };
+        }
+        setCachedData(cacheKey, courseCache);
+    } catch (error) {
+        // Leave the cache alone; fetchCourseDetails falls back per course
+        console.error('Error fetching course batch:', error);
+    }
+    return courseCache;
+}
+
 // Load courses from API and populate checklist
 async function loadCoursesFromAPI() {
     console.log('loadCoursesFromAPI called');
@@ -738,6 +810,7 @@ async function loadCoursesFromAPI() {
     if (majorData.required_courses && Array.isArray(majorData.required_courses)) {
         console.log('Processing', majorData.required_courses.length, 'courses');
         // console.log('Course codes:', majorData.required_courses);
+        await fetchCoursesBatch(majorData.required_courses);
         
         for (const courseCode of majorData.required_courses) {
             // console.log('Fetching details for course:', courseCode);
@@ -1061,9 +1134,9 @@ document.addEventListener('DOMContentLoaded', function() {
             const dayNames = { mon: 'Monday', tue: 'Tuesday', wed: 'Wednesday', thu: 'Thursday', fri: 'Friday', sat: 'Saturday', sun: 'Sunday' };
             const routeDayTitle = document.getElementById('route-day-title');
             if (routeDayTitle) routeDayTitle.textContent = `${dayNames[selectedDay] || selectedDay} Route`;
-            // Call fetchAndDisplayRoute with placeIds
+            // Show the stored itinerary for the day
             if (placeIds.length > 0) {
-                fetchAndDisplayRoute(placeIds);
+                fetchAndDisplayItinerary(selectedDay);
             } else {
                 clearRenderedRoute();
             }
@@ -1189,7 +1262,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const blocksForRoute = (userData.schedule && userData.schedule[selectedDay]) ? userData.schedule[selectedDay] : [];
             const placeIds = blocksForRoute.filter(b => b && b.location && b.location.google_maps_place_id).map(block => block.location.google_maps_place_id);
             if (placeIds.length > 0) {
-                fetchAndDisplayRoute(placeIds);
+                fetchAndDisplayItinerary(selectedDay);
             } else {
                 clearRenderedRoute();
             }
@@ -1256,7 +1329,7 @@ document.addEventListener('DOMContentLoaded', function() {
             deleteBtn.onclick = async function() {
                 const userData = await getUserData();
                 userData.schedule[dayKey].splice(idx, 1);
-                await saveUserData(userData);
+                if (!await patchUser([{ op: 'set_day', day: dayKey, blocks: userData.schedule[dayKey] }], userData.revision || 0)) return;
                 addBlockModal.style.display = 'none';
                 showNotification('Block deleted');
                 editBlockState = null;
@@ -1345,7 +1418,11 @@ document.addEventListener('DOMContentLoaded', function() {
                         userData.schedule[modelDay].push(newBlock);
                     }
                     userData.schedule[modelDay].sort((a, b) => toMinutes(a.start_time) - toMinutes(b.start_time));
-                    await saveUserData(userData);
+                    const dayOps = [{ op: 'set_day', day: modelDay, blocks: userData.schedule[modelDay] }];
+                    if (modelDay !== editBlockState.dayKey) {
+                        dayOps.push({ op: 'set_day', day: editBlockState.dayKey, blocks: userData.schedule[editBlockState.dayKey] });
+                    }
+                    if (!await patchUser(dayOps, userData.revision || 0)) return;
                     addBlockModal.style.display = 'none';
                     showNotification('Block updated');
                     editBlockState = null;
@@ -1368,7 +1445,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Normal add
                 userData.schedule[modelDay].push(newBlock);
                 userData.schedule[modelDay].sort((a, b) => toMinutes(a.start_time) - toMinutes(b.start_time));
-                await saveUserData(userData);
+                if (!await patchUser([{ op: 'set_day', day: modelDay, blocks: userData.schedule[modelDay] }], userData.revision || 0)) return;
                 addBlockModal.style.display = 'none';
                 showNotification(`Block added to ${day}: ${start}-${end}`);
                 await populateScheduleCalendar();
@@ -1464,9 +1541,7 @@ document.addEventListener('DOMContentLoaded', function () {
     if (majorDropdown) {
         majorDropdown.addEventListener('change', function() {
             const selectedMajor = this.value;
-            const userData = getUserData();
-            userData.major = selectedMajor;
-            saveUserData(userData);
+            patchUser([{ op: 'set_major', major: selectedMajor }]);
             console.log('Saved major selection:', selectedMajor);
             
             // Reload courses for the new major
@@ -1520,8 +1595,7 @@ async function saveCompletedCourse(courseCode) {
     try {
         const userData = await getUserData();
         if (!userData.taken_courses.includes(courseCode)) {
-            userData.taken_courses.push(courseCode);
-            await saveUserData(userData);
+            await patchUser([{ op: 'add_taken_course', code: courseCode }]);
             console.log('Added to taken_courses:', courseCode);
             updateCreditsEarned();
         }
@@ -1535,8 +1609,7 @@ async function removeCompletedCourse(courseCode) {
         const userData = await getUserData();
         const index = userData.taken_courses.indexOf(courseCode);
         if (index > -1) {
-            userData.taken_courses.splice(index, 1);
-            await saveUserData(userData);
+            await patchUser([{ op: 'remove_taken_course', code: courseCode }]);
             console.log('Removed from taken_courses:', courseCode);
             updateCreditsEarned();
         }
@@ -1812,6 +1885,30 @@ chrome.runtime.onMessage.addListener(function (request, sender, sendResponse) {
       try { if (sid) localStorage.setItem('adkSessionId', sid); } catch {}
     };
   
+    // Read a text/event-stream response body, calling onEvent(name, data) per event
+    async function readSSE(res, onEvent) {
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+          const raw = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+          let name = 'message';
+          const dataLines = [];
+          for (const line of raw.split('\n')) {
+            if (line.startsWith('event:')) name = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+          }
+          if (dataLines.length) onEvent(name, JSON.parse(dataLines.join('\n')));
+        }
+      }
+    }
+
     async function sendToAgent(query) {
       aiOut.textContent = 'Thinking…';
       aiButton.disabled = true;
@@ -1821,24 +1918,36 @@ chrome.runtime.onMessage.addListener(function (request, sender, sendResponse) {
         const sid = getSessionId();
         if (sid) body.session_id = sid; // reuse the same ADK session
   
-        const res = await fetch(`${API_BASE_URL}/agent/ask`, {
+        const res = await fetch(`${API_BASE_URL}/agent/ask/stream`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify(body)
         });
   
-        const data = await res.json();
-  
         if (!res.ok) {
+          const data = await res.json();
           aiOut.textContent = typeof data === 'string' ? data : JSON.stringify(data, null, 2);
           return;
         }
   
-        // persist session id returned by backend
-        if (data.session_id) setSessionId(data.session_id);
-  
-        const answer = data.response ?? data.answer ?? data.output ?? data.result ?? data.text ?? data;
-        aiOut.textContent = typeof answer === 'string' ? answer : JSON.stringify(answer, null, 2);
+        // Show text as it arrives; tool calls show as a status line until text starts
+        let text = '';
+        let failed = false;
+        await readSSE(res, (name, data) => {
+          if (name === 'session') {
+            setSessionId(data.session_id); // persist session id returned by backend
+          } else if (name === 'delta') {
+            text += data.text;
+            aiOut.textContent = text;
+          } else if (name === 'tool_call' && !text) {
+            aiOut.textContent = `Thinking… (${data.name})`;
+          } else if (name === 'error') {
+            failed = true;
+            aiOut.textContent = text ? `${text}\n\n${data.detail}` : data.detail;
+          } else if (name === 'done' && !failed) {
+            aiOut.textContent = data.response;
+          }
+        });
   
       } catch (e) {
         console.error(e);
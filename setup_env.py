@@ -41,6 +41,9 @@ DB_NAME=shellhacks2025
 
 # Backend API base URL
 API_BASE=http://127.0.0.1:8000/api
+
+# How agent tools read data: auto (in-process MongoDB when possible), direct, or http
+PANTHER_DATA_SOURCE=auto
 """
     
     # Write .env file